@@ -5,6 +5,7 @@ Simple script to create database tables
 from sqlalchemy import create_engine
 from models.user import Base as UserBase
 from models.opportunity import Base as OpportunityBase
+from models.ai_usage import Base as AIUsageBase
 import os
 from dotenv import load_dotenv
 
@@ -27,6 +28,9 @@ def create_tables():
     print("Creating opportunity tables...")
     OpportunityBase.metadata.create_all(bind=engine)
     
+    print("Creating AI usage ledger tables...")
+    AIUsageBase.metadata.create_all(bind=engine)
+    
     print("✅ Database tables created successfully!")
 
 if __name__ == "__main__":
@@ -5,10 +5,11 @@ Syntraq AI - Database Connection Manager
 A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+from typing import List
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -27,13 +28,62 @@ async def init_db():
     # Import all models to ensure tables are created
     from models.opportunity import Base as OpportunityBase
     from models.user import Base as UserBase
-    
+    from models.ai_usage import Base as AIUsageBase
+
     print("Creating database tables...")
     # Create tables for each base
     UserBase.metadata.create_all(bind=engine)
     OpportunityBase.metadata.create_all(bind=engine)
+    AIUsageBase.metadata.create_all(bind=engine)
     print("✅ Database tables created!")
 
+    # Service-owned tables, plus columns added to tables that existed before them; create_all never alters a table
+    from services.cash_flow_arrays import ensure_cash_flow_projections
+    from services.financial_ledger import ensure_financial_ledger
+    from services.gsa_pricing import ensure_gsa_pricing
+    from services.award_warehouse import ensure_award_warehouse
+    from services.competitor_index import backfill_competitor_index
+    from services.teaming_graph import ensure_teaming_graph
+    from services.federal_api import ensure_response_store
+
+    ensure_response_store(engine)
+    ensure_gsa_pricing(engine)
+    ensure_award_warehouse(engine)
+    ensure_teaming_graph(engine)
+    indexed = backfill_competitor_index(engine)
+    if indexed:
+        print(f"Indexed NAICS, certifications and vehicles for {indexed} competitors")
+    ensure_financial_ledger(engine)
+    backfilled = ensure_cash_flow_projections(engine)
+    if backfilled:
+        print(f"Packed {backfilled} legacy cash flow projections")
+
+def add_missing_columns(bind, table) -> List[str]:
+    """ALTER TABLE ... ADD COLUMN for each model column the existing table lacks, then create its indexes
+
+    Safe to run repeatedly. A table that does not exist yet is left alone for create_all.
+    Returns the names of the columns added.
+    """
+
+    inspector = inspect(bind)
+    if not inspector.has_table(table.name):
+        return []
+
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    quote = bind.dialect.identifier_preparer.quote
+    added = []
+    with bind.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+            added.append(column.name)
+
+    for index in table.indexes:
+        index.create(bind=bind, checkfirst=True)
+    return added
+
 def get_db():
     db = SessionLocal()
     try:
@@ -14,13 +14,18 @@ from fastapi.security import HTTPBearer
 import uvicorn
 from contextlib import asynccontextmanager
 
-from routers import opportunities, users, ai_summarizer, decisions, market_research, financial, resources, communications, proposals, arts, pars
-from database.connection import init_db
+from routers import opportunities, users, ai_summarizer, decisions, market_research, financial, resources, communications, proposals, arts, pars, admin
+from database.connection import init_db, engine
+from services.metrics import instrument_request, install_query_instrumentation, metrics_response
+from services.query_budget import install_query_budget
+from services.federal_api import close_http_client
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
     yield
+    # Federal API calls share one pooled client for the app's lifetime
+    await close_http_client()
 
 app = FastAPI(
     title="Syntraq AI MVP",
@@ -37,6 +42,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request, DB and OpenAI metrics; also binds the request context used by the AI usage ledger
+app.middleware("http")(instrument_request)
+install_query_instrumentation(engine)
+install_query_budget(engine)  # No-op unless QUERY_BUDGET_MODE is log or raise
+
 security = HTTPBearer()
 
 app.include_router(opportunities.router, prefix="/api/opportunities", tags=["opportunities"])
@@ -50,6 +60,7 @@ app.include_router(communications.router, prefix="/api/communications", tags=["c
 app.include_router(proposals.router, prefix="/api/proposals", tags=["proposals"])
 app.include_router(arts.router, prefix="/api/arts", tags=["arts"])
 app.include_router(pars.router, prefix="/api/pars", tags=["pars"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -59,5 +70,9 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
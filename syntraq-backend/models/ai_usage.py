@@ -0,0 +1,35 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - AI Usage Ledger Models
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime
+
+Base = declarative_base()
+
+class AIUsageRecord(Base):
+    __tablename__ = "ai_usage_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    # Attribution
+    caller = Column(String, index=True)  # Service.method that issued the call
+    endpoint = Column(String, index=True, nullable=True)  # Route template, None outside HTTP requests
+    model = Column(String)
+
+    # Usage
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+
+    # Performance and outcome
+    latency_ms = Column(Float)
+    cache_hit = Column(Boolean, default=False)
+    retries = Column(Integer, default=0)
+    outcome = Column(String, default="success")  # success, error
+    error_type = Column(String, nullable=True)
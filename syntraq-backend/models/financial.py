@@ -5,7 +5,7 @@ Syntraq AI - FVMS (Financial Viability & Management System) Models
 A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, Enum, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -131,7 +131,12 @@ class CashFlowProjection(Base):
     project_id = Column(Integer, ForeignKey("financial_projects.id"))
     projection_date = Column(DateTime, default=datetime.utcnow)
     
-    # Monthly projections (24 months)
+    # Monthly projections packed as PROJECTION_MONTHS little-endian float64 values (see services.cash_flow_arrays)
+    horizon_months = Column(Integer, default=0)
+    inflows = Column(LargeBinary, nullable=True)
+    outflows = Column(LargeBinary, nullable=True)
+    
+    # Legacy layout, read only for projections written before the packed columns
     month_1_inflow = Column(Float, default=0.0)
     month_1_outflow = Column(Float, default=0.0)
     month_2_inflow = Column(Float, default=0.0)
@@ -146,7 +151,7 @@ class CashFlowProjection(Base):
     month_6_outflow = Column(Float, default=0.0)
     
     # Extended projections stored as JSON for flexibility
-    extended_projections = Column(JSON)  # Months 7-24
+    extended_projections = Column(JSON)  # Months 7-24 (legacy)
     
     # Cash flow metrics
     cumulative_cash_flow = Column(JSON)  # Monthly cumulative
@@ -170,6 +175,7 @@ class ProjectExpense(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("financial_projects.id"))
+    external_reference = Column(String, nullable=True, index=True)  # Source-system id, the key for bulk import upserts
     
     # Expense details
     expense_date = Column(DateTime)
@@ -209,6 +215,7 @@ class ProjectInvoice(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("financial_projects.id"))
+    external_reference = Column(String, nullable=True, index=True)  # Source-system id, the key for bulk import upserts
     
     # Invoice details
     invoice_number = Column(String, unique=True, index=True)
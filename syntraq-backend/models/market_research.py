@@ -5,7 +5,7 @@ Syntraq AI - Market Research Intelligence Panel Models
 A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -49,6 +49,27 @@ class CompetitorProfile(Base):
     awards = relationship("ContractAward", back_populates="contractor")
     teaming_relationships = relationship("TeamingRelationship", back_populates="partner")
 
+class CompetitorNaics(Base):
+    __tablename__ = "competitor_naics"
+    
+    # Derived from CompetitorProfile.naics_codes; rewritten on every competitor write
+    competitor_id = Column(Integer, ForeignKey("competitor_profiles.id"), primary_key=True)
+    naics_code = Column(String, primary_key=True, index=True)
+
+class CompetitorCertification(Base):
+    __tablename__ = "competitor_certifications"
+    
+    # Derived from CompetitorProfile.certifications
+    competitor_id = Column(Integer, ForeignKey("competitor_profiles.id"), primary_key=True)
+    certification = Column(String, primary_key=True, index=True)
+
+class CompetitorVehicle(Base):
+    __tablename__ = "competitor_vehicles"
+    
+    # Derived from CompetitorProfile.contract_vehicles
+    competitor_id = Column(Integer, ForeignKey("competitor_profiles.id"), primary_key=True)
+    contract_vehicle = Column(String, primary_key=True, index=True)
+
 class ContractAward(Base):
     __tablename__ = "contract_awards"
     
@@ -74,7 +95,7 @@ class ContractAward(Base):
     set_aside = Column(String)
     
     # Timeline
-    award_date = Column(DateTime)
+    award_date = Column(DateTime, index=True)
     start_date = Column(DateTime)
     end_date = Column(DateTime)
     period_of_performance = Column(Integer)  # months
@@ -83,14 +104,41 @@ class ContractAward(Base):
     place_of_performance = Column(JSON)
     
     # Relationships
-    contractor_id = Column(Integer, ForeignKey("competitor_profiles.id"))
+    contractor_id = Column(Integer, ForeignKey("competitor_profiles.id"), index=True)
     contractor = relationship("CompetitorProfile", back_populates="awards")
     
     # Tracking
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Teaming graph refresh watermark
     source = Column(String, default="FPDS")  # FPDS, manual, etc.
     raw_data = Column(JSON)
+    
+    # Market analysis filters by NAICS or agency and reads the most recent awards first
+    __table_args__ = (
+        Index("ix_contract_awards_naics_award_date", "naics_code", "award_date"),
+        Index("ix_contract_awards_agency_award_date", "agency", "award_date"),
+    )
+
+class AwardMonthlyCube(Base):
+    __tablename__ = "award_monthly_cube"
+    
+    # Derived from ContractAward; maintained by the award warehouse loader, rebuilt with rebuild_award_cube
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(String)  # YYYY-MM of award_date
+    naics_code = Column(String, default="")  # "" when the award has none, so the key stays unique
+    agency = Column(String, default="")
+    set_aside_class = Column(String, default="none")  # none, small, 8a, hubzone, wosb, sdvosb, other
+    
+    award_count = Column(Integer, default=0)
+    total_value = Column(Float, default=0.0)
+    small_business_awards = Column(Integer, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("month", "naics_code", "agency", "set_aside_class", name="uq_award_monthly_cube_key"),
+        Index("ix_award_monthly_cube_naics_month", "naics_code", "month"),
+    )
 
 class TeamingRelationship(Base):
     __tablename__ = "teaming_relationships"
@@ -117,7 +165,28 @@ class TeamingRelationship(Base):
     
     # Tracking
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Teaming graph refresh watermark
+
+class TeamingGraphSnapshot(Base):
+    """Latest teaming graph as packed adjacency arrays, so workers start without rebuilding it"""
+    __tablename__ = "teaming_graph_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Node and code dictionaries; array entries are positions in these lists
+    companies = Column(JSON)
+    naics_codes = Column(JSON)
+    agencies = Column(JSON)
+    
+    # np.savez archive of the edge, award link, profile map and adjacency arrays
+    arrays = Column(LargeBinary)
+    node_count = Column(Integer)
+    edge_count = Column(Integer)
+    
+    # Rows updated at or after these were not yet folded in
+    teaming_watermark = Column(DateTime, nullable=True)
+    award_watermark = Column(DateTime, nullable=True)
+    built_at = Column(DateTime, default=datetime.utcnow)
 
 class MarketAnalysis(Base):
     __tablename__ = "market_analyses"
@@ -193,4 +262,45 @@ class GSAPricing(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     source = Column(String, default="GSA")
-    raw_data = Column(JSON)
\ No newline at end of file
+    raw_data = Column(JSON)
+    
+    # Re-imported price lists are matched on contract, SIN and product/labor category
+    __table_args__ = (
+        Index("ix_gsa_pricing_contract_sin_product", "contract_number", "sin_number", "product_name"),
+    )
+
+class GSAPricingCategory(Base):
+    __tablename__ = "gsa_pricing_categories"
+    
+    # Derived from GSAPricing: the SIN or category text normalized to NAICS/PSC, and the unit, so rate
+    # distributions are read from the (code, unit, price) indexes alone
+    pricing_id = Column(Integer, ForeignKey("gsa_pricing.id"), primary_key=True)
+    naics_code = Column(String, nullable=True)
+    psc_code = Column(String, nullable=True)
+    unit = Column(String)  # hour, day, each, ...
+    price = Column(Float)
+    
+    __table_args__ = (
+        Index("ix_gsa_pricing_categories_naics_unit_price", "naics_code", "unit", "price"),
+        Index("ix_gsa_pricing_categories_psc_unit_price", "psc_code", "unit", "price"),
+    )
+
+class GSAPricingToken(Base):
+    __tablename__ = "gsa_pricing_tokens"
+    
+    # Inverted index over GSAPricing product/labor category names
+    token = Column(String, primary_key=True)
+    pricing_id = Column(Integer, ForeignKey("gsa_pricing.id"), primary_key=True, index=True)
+
+class FederalAPIResponse(Base):
+    __tablename__ = "federal_api_responses"
+    
+    # Last body returned for a federal API request, revalidated with its ETag/Last-Modified
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True)  # sha256 of the URL and query, credentials excluded
+    url = Column(Text)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    body = Column(JSON)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    revalidated_at = Column(DateTime, default=datetime.utcnow)
@@ -5,7 +5,7 @@ Syntraq AI - RDP (Resource & Delivery Planner) Models
 A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -89,6 +89,27 @@ class Employee(Base):
     allocations = relationship("ResourceAllocation", back_populates="employee")
     time_entries = relationship("TimeEntry", back_populates="employee")
 
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)  # Normalized: lowercase, single spaces
+    display_name = Column(String)  # Spelling first seen
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class EmployeeSkill(Base):
+    __tablename__ = "employee_skills"
+    
+    # Derived from Employee.primary_skills / secondary_skills; rewritten on every employee write
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True, index=True)
+    company_id = Column(Integer, index=True)
+    is_primary = Column(Boolean, default=True)
+    
+    __table_args__ = (
+        Index("ix_employee_skills_company_skill", "company_id", "skill_id"),
+    )
+
 class ExternalResource(Base):
     __tablename__ = "external_resources"
     
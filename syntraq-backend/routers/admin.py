@@ -0,0 +1,150 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Admin API Router
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+import tempfile
+
+from database.connection import get_db
+from services.ai_usage import AIUsageReportService
+from services.award_warehouse import AwardWarehouseLoader, iter_award_archive
+from services.award_cube import rebuild_award_cube
+from services.competitor_index import CompetitorIndexService
+from services.teaming_graph import TeamingGraphService
+from services.gsa_pricing import GSAPricingLoader, GSAPricingIndexService
+from routers.users import get_current_user
+from models.user import User
+
+router = APIRouter()
+
+IMPORT_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+@router.get("/ai-usage/summary")
+async def get_ai_usage_summary(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Get AI cost, token and latency totals by model and caller"""
+
+    return AIUsageReportService(db).get_summary(days)
+
+@router.get("/ai-usage/endpoints")
+async def get_ai_usage_by_endpoint(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Get per-endpoint p50/p95 AI latency and cost rollups"""
+
+    return {
+        "period_days": days,
+        "endpoints": AIUsageReportService(db).get_endpoint_rollup(days)
+    }
+
+@router.post("/award-warehouse/import")
+async def import_award_archive(
+    request: Request,
+    source: str = Query("USAspending", pattern="^(USAspending|FPDS)$"),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Load an FPDS/USAspending award archive (CSV, gzipped CSV or ZIP of CSVs) into the award warehouse"""
+
+    # Archives run to gigabytes, so the body is spooled to disk and read back one row at a time
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+
+        # The load is synchronous and can run for minutes, so it stays off the event loop
+        loader = AwardWarehouseLoader(db, source=source)
+        return await run_in_threadpool(loader.load, iter_award_archive(spool, "upload"))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Award archive import failed: {str(e)}")
+    finally:
+        spool.close()
+
+@router.post("/award-warehouse/rebuild-cube")
+async def rebuild_award_trend_cube(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Recompute the monthly award cube behind /market-trends from every loaded award"""
+
+    try:
+        return {"status": "success", "cube_cells": rebuild_award_cube(db)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Award cube rebuild failed: {str(e)}")
+
+@router.post("/competitor-index/rebuild")
+async def rebuild_competitor_index(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Backfill the competitor NAICS, certification and contract vehicle tables from competitor profiles"""
+
+    try:
+        return {"status": "success", **CompetitorIndexService(db).rebuild()}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Competitor index rebuild failed: {str(e)}")
+
+@router.post("/gsa-pricing/import")
+async def import_gsa_pricing(
+    request: Request,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Load a GSA price list or CALC labor rate export (CSV, gzipped CSV or ZIP of CSVs) into the rate index"""
+
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+
+        return await run_in_threadpool(GSAPricingLoader(db).load, iter_award_archive(spool, "upload"))
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"GSA pricing import failed: {str(e)}")
+    finally:
+        spool.close()
+
+@router.post("/gsa-pricing/rebuild-index")
+async def rebuild_gsa_pricing_index(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Re-derive NAICS/PSC codes and labor category tokens for every stored GSA price"""
+
+    try:
+        return {"status": "success", **GSAPricingIndexService(db).rebuild_index()}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"GSA pricing index rebuild failed: {str(e)}")
+
+@router.post("/teaming-graph/rebuild")
+async def rebuild_teaming_graph(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Rebuild the teaming graph and its snapshot from scratch instead of refreshing it incrementally"""
+
+    try:
+        graph = TeamingGraphService(db).rebuild()
+        return {"status": "success", "companies": len(graph.companies), "edges": graph.edge_count}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Teaming graph rebuild failed: {str(e)}")
@@ -6,7 +6,7 @@ A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from pydantic import BaseModel
@@ -284,7 +284,9 @@ async def get_communications(
 ):
     """Get communications with filtering"""
     
-    query = db.query(Communication).filter(Communication.company_id == current_user.id)
+    query = db.query(Communication).options(
+        joinedload(Communication.contact)
+    ).filter(Communication.company_id == current_user.id)
     
     if contact_id:
         query = query.filter(Communication.contact_id == contact_id)
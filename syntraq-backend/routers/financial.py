@@ -1,20 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from pydantic import BaseModel
+import io
+import tempfile
 
 from database.connection import get_db
 from models.financial import (
     FinancialProject, ProjectBudget, CashFlowProjection, 
-    ProjectExpense, FinancialAlert, CompanyFinancials, ProjectStatus
+    ProjectExpense, FinancialAlert, CompanyFinancials
 )
 from services.financial_analysis import FinancialAnalysisService
+from services.portfolio_reporting import PortfolioReportingService
+from services.cash_flow_arrays import monthly_breakdown
+from services.dashboard_cache import invalidate_financial_dashboards
+from services.financial_ledger import LEDGERS, LedgerExportService, LedgerImportService, iter_parquet_records
+from services.time_entry_import import iter_csv_records, iter_ndjson_records
 from routers.users import get_current_user
 from models.user import User
 
 router = APIRouter()
 
+IMPORT_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
 # Add copyright notice at top of router
 """
 © 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
@@ -111,6 +121,7 @@ async def create_project(
     
     db.add(project)
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     db.refresh(project)
     
     return {
@@ -249,6 +260,7 @@ async def create_project_budget(
     try:
         budget_data = request.dict()
         result = await service.create_project_budget(project_id, budget_data, current_user.id)
+        invalidate_financial_dashboards(current_user.id)
         
         return {
             "status": "success",
@@ -291,6 +303,33 @@ async def get_project_roi_analysis(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"ROI analysis failed: {str(e)}")
 
+@router.get("/projects/{project_id}/risk-simulation")
+async def get_project_risk_simulation(
+    project_id: int,
+    scenarios: int = Query(10000, ge=1000, le=100000),
+    seed: Optional[int] = Query(None, description="Fix the random seed for reproducible results"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Monte Carlo simulation of payment delays, labor-rate drift, scope growth and collection periods"""
+    
+    # Verify project ownership
+    project = db.query(FinancialProject).filter(
+        FinancialProject.id == project_id,
+        FinancialProject.created_by == current_user.id
+    ).first()
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    service = FinancialAnalysisService(db)
+    
+    try:
+        return service.simulate_project_risk(project_id, scenarios, seed)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk simulation failed: {str(e)}")
+
 @router.get("/projects/{project_id}/cash-flow")
 async def get_cash_flow_projection(
     project_id: int,
@@ -315,27 +354,9 @@ async def get_cash_flow_projection(
     if not cash_flow:
         raise HTTPException(status_code=404, detail="No cash flow projection found")
     
-    # Compile monthly data
-    monthly_data = []
-    
-    # First 6 months from columns
-    for month in range(1, 7):
-        inflow = getattr(cash_flow, f'month_{month}_inflow', 0)
-        outflow = getattr(cash_flow, f'month_{month}_outflow', 0)
-        monthly_data.append({
-            'month': month,
-            'inflow': inflow,
-            'outflow': outflow,
-            'net_flow': inflow - outflow
-        })
-    
-    # Extended months from JSON
-    if cash_flow.extended_projections:
-        monthly_data.extend(cash_flow.extended_projections)
-    
     return {
         "project_id": project_id,
-        "monthly_projections": monthly_data,
+        "monthly_projections": monthly_breakdown(cash_flow),
         "cumulative_cash_flow": cash_flow.cumulative_cash_flow,
         "peak_cash_requirement": cash_flow.peak_cash_requirement,
         "payback_period": cash_flow.payback_period,
@@ -376,6 +397,7 @@ async def add_project_expense(
     
     db.add(expense)
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     db.refresh(expense)
     
     return {
@@ -386,6 +408,7 @@ async def add_project_expense(
 
 @router.get("/dashboard")
 async def get_financial_dashboard(
+    refresh: bool = Query(False, description="Rebuild the snapshot instead of serving the cached one"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -394,7 +417,7 @@ async def get_financial_dashboard(
     service = FinancialAnalysisService(db)
     
     try:
-        dashboard = await service.generate_financial_dashboard(current_user.id)
+        dashboard = await service.generate_financial_dashboard(current_user.id, use_cache=not refresh)
         return dashboard
         
     except Exception as e:
@@ -402,6 +425,7 @@ async def get_financial_dashboard(
 
 @router.get("/treasury/dashboard")
 async def get_treasury_dashboard(
+    refresh: bool = Query(False, description="Rebuild the snapshot instead of serving the cached one"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -410,7 +434,7 @@ async def get_treasury_dashboard(
     service = FinancialAnalysisService(db)
     
     try:
-        treasury_dashboard = await service.generate_treasury_dashboard(current_user.id)
+        treasury_dashboard = await service.generate_treasury_dashboard(current_user.id, use_cache=not refresh)
         return treasury_dashboard
         
     except Exception as e:
@@ -496,6 +520,7 @@ async def acknowledge_alert(
         alert.action_taken = action_taken
     
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     
     return {
         "status": "success",
@@ -641,6 +666,7 @@ async def update_company_financials(
         db.add(company_financials)
     
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     db.refresh(company_financials)
     
     return {
@@ -655,6 +681,80 @@ async def update_company_financials(
         "message": "Expense added successfully"
     }
 
+@router.get("/ledger/{ledger}/export")
+async def export_ledger(
+    ledger: str,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    project_id: Optional[int] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all expenses or invoices across the user's projects as CSV or Parquet"""
+    
+    if ledger not in LEDGERS:
+        raise HTTPException(status_code=404, detail="Ledger must be 'expenses' or 'invoices'")
+    
+    service = LedgerExportService(db)
+    filters = {"project_id": project_id, "start_date": start_date, "end_date": end_date}
+    
+    # The request session stays open until the response body has been sent, so rows are
+    # pulled from the server-side cursor as the client reads
+    if format == "parquet":
+        body = service.stream_parquet(ledger, current_user.id, **filters)
+        media_type = "application/vnd.apache.parquet"
+    else:
+        body = service.stream_csv(ledger, current_user.id, **filters)
+        media_type = "text/csv"
+    
+    filename = f"{ledger}-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@router.post("/ledger/{ledger}/import")
+async def import_ledger(
+    ledger: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson|parquet)$", description="Defaults from Content-Type"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upsert expenses or invoices by external_reference from a CSV, NDJSON or Parquet request body"""
+    
+    if ledger not in LEDGERS:
+        raise HTTPException(status_code=404, detail="Ledger must be 'expenses' or 'invoices'")
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "parquet" if "parquet" in content_type else "ndjson" if "json" in content_type else "csv"
+    
+    # Spool the body (to disk past a few MB) so rows are parsed and validated one at a time
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        
+        if format == "parquet":
+            records = iter_parquet_records(spool)
+        else:
+            stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+            records = iter_ndjson_records(stream) if format == "ndjson" else iter_csv_records(stream)
+        
+        service = LedgerImportService(db)
+        result = service.import_records(ledger, current_user.id, records)
+        invalidate_financial_dashboards(current_user.id)
+        return result
+        
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ledger import failed: {str(e)}")
+    finally:
+        spool.close()
+
 @router.get("/projects/{project_id}/expenses")
 async def get_project_expenses(
     project_id: int,
@@ -707,6 +807,7 @@ async def get_project_expenses(
 
 @router.get("/dashboard")
 async def get_financial_dashboard(
+    refresh: bool = Query(False, description="Rebuild the snapshot instead of serving the cached one"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -715,7 +816,7 @@ async def get_financial_dashboard(
     service = FinancialAnalysisService(db)
     
     try:
-        dashboard = await service.generate_financial_dashboard(current_user.id)
+        dashboard = await service.generate_financial_dashboard(current_user.id, use_cache=not refresh)
         return dashboard
         
     except Exception as e:
@@ -794,6 +895,7 @@ async def acknowledge_alert(
     alert.acknowledged_at = datetime.utcnow()
     
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     
     return {"status": "success", "message": "Alert acknowledged"}
 
@@ -838,67 +940,22 @@ async def update_company_financials(
         db.add(financials)
     
     db.commit()
+    invalidate_financial_dashboards(current_user.id)
     
     return {"status": "success", "message": "Company financials updated"}
 
 @router.get("/reporting/portfolio-analysis")
 async def get_portfolio_analysis(
-    months_back: int = Query(12, ge=1, le=36),
+    months_back: int = Query(12, ge=1, le=120),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get portfolio analysis and trends"""
     
-    start_date = datetime.now() - timedelta(days=30 * months_back)
-    
-    projects = db.query(FinancialProject).filter(
-        FinancialProject.created_by == current_user.id,
-        FinancialProject.created_at >= start_date
-    ).all()
-    
-    # Calculate metrics
-    total_value = sum(p.contract_value or p.estimated_value or 0 for p in projects)
-    active_projects = [p for p in projects if p.status == ProjectStatus.ACTIVE]
-    completed_projects = [p for p in projects if p.status == ProjectStatus.COMPLETED]
-    
-    # Win rate calculation
-    total_bids = len([p for p in projects if p.status in [ProjectStatus.AWARDED, ProjectStatus.COMPLETED, ProjectStatus.CANCELLED]])
-    wins = len([p for p in projects if p.status in [ProjectStatus.AWARDED, ProjectStatus.COMPLETED]])
-    win_rate = (wins / total_bids * 100) if total_bids > 0 else 0
-    
-    # Average margins
-    projects_with_budgets = []
-    for project in projects:
-        budget = db.query(ProjectBudget).filter(ProjectBudget.project_id == project.id).first()
-        if budget:
-            margin = ((budget.total_price - budget.total_cost) / budget.total_price * 100) if budget.total_price > 0 else 0
-            projects_with_budgets.append({
-                'project_name': project.project_name,
-                'margin': margin,
-                'total_value': budget.total_price
-            })
-    
-    avg_margin = sum(p['margin'] for p in projects_with_budgets) / len(projects_with_budgets) if projects_with_budgets else 0
+    service = PortfolioReportingService(db)
     
-    return {
-        "period_months": months_back,
-        "portfolio_summary": {
-            "total_projects": len(projects),
-            "total_value": total_value,
-            "active_projects": len(active_projects),
-            "completed_projects": len(completed_projects),
-            "win_rate": win_rate,
-            "average_margin": avg_margin
-        },
-        "project_breakdown": [
-            {
-                "project_name": project.project_name,
-                "status": project.status.value,
-                "value": project.contract_value or project.estimated_value,
-                "margin": next((p['margin'] for p in projects_with_budgets if p['project_name'] == project.project_name), None),
-                "created_date": project.created_at.isoformat()
-            }
-            for project in projects
-        ],
-        "margin_analysis": projects_with_budgets
-    }
\ No newline at end of file
+    try:
+        return service.get_portfolio_analysis(current_user.id, months_back)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Portfolio analysis failed: {str(e)}")
\ No newline at end of file
@@ -4,8 +4,15 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from database.connection import get_db
-from models.market_research import MarketAnalysis, CompetitorProfile, ContractAward
+from models.market_research import MarketAnalysis, CompetitorProfile, CompetitorNaics, CompetitorCertification, ContractAward
 from services.market_intelligence import MarketIntelligenceService
+from services.pricing_stats import PricingStatsService
+from services.gsa_pricing import GSAPricingIndexService
+from services.award_cube import MarketTrendService
+from services.competitor_index import CompetitorIndexService
+from services.market_cache import invalidate_market_components
+from services.market_batch import start_market_analysis_batch, get_batch_job
+from services.teaming_graph import TeamingGraphService, invalidate_teaming_graph
 from routers.users import get_current_user
 from models.user import User
 from pydantic import BaseModel
@@ -23,10 +30,16 @@ class MarketAnalysisResponse(BaseModel):
     ai_insights: Dict
     confidence_score: float
     analysis_date: datetime
+    stale: bool = False  # Served from the stored analysis while a refresh runs
+    refreshing: bool = False
     
     class Config:
         from_attributes = True
 
+class MarketAnalysisBatchRequest(BaseModel):
+    opportunity_ids: List[int]
+    reuse_insights: bool = True  # Keep LLM insights younger than a week instead of regenerating them
+
 class CompetitorResponse(BaseModel):
     id: int
     company_name: str
@@ -78,13 +91,39 @@ async def get_market_analysis(
             pricing_benchmarks=analysis.get('pricing_benchmarks', []),
             ai_insights=analysis.get('ai_analysis', {}),
             confidence_score=analysis.get('confidence_score', 75.0),
-            analysis_date=datetime.utcnow()
+            analysis_date=analysis.get('analysis_date') or datetime.utcnow(),
+            stale=analysis.get('stale', False),
+            refreshing=analysis.get('refreshing', False)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Market analysis failed: {str(e)}")
-    finally:
-        await service.close()
+
+@router.post("/analysis/batch", status_code=202)
+async def start_batch_market_analysis(
+    request: MarketAnalysisBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start market analysis for a list of opportunities; poll the returned job for progress"""
+    
+    try:
+        return start_market_analysis_batch(db.get_bind(), request.opportunity_ids, current_user.id, request.reuse_insights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/analysis/batch/{job_id}")
+async def get_batch_market_analysis(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a batch market analysis job"""
+    
+    job = get_batch_job(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    return job
 
 @router.get("/competitors", response_model=List[CompetitorResponse])
 async def get_competitors(
@@ -101,13 +140,17 @@ async def get_competitors(
     query = db.query(CompetitorProfile).filter(CompetitorProfile.is_active == True)
     
     if naics_code:
-        query = query.filter(CompetitorProfile.naics_codes.contains([naics_code]))
+        query = query.join(CompetitorNaics, CompetitorNaics.competitor_id == CompetitorProfile.id).filter(
+            CompetitorNaics.naics_code == naics_code
+        )
     
     if size_standard:
         query = query.filter(CompetitorProfile.size_standard == size_standard)
     
     if certification:
-        query = query.filter(CompetitorProfile.certifications.contains([certification]))
+        query = query.join(CompetitorCertification, CompetitorCertification.competitor_id == CompetitorProfile.id).filter(
+            CompetitorCertification.certification == certification
+        )
     
     competitors = query.offset(skip).limit(limit).all()
     
@@ -240,78 +283,27 @@ async def get_pricing_intelligence(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get pricing intelligence and benchmarks"""
+    """Get pricing intelligence and benchmarks over every matching award from the last three years"""
     
-    # Get contract award pricing data
-    query = db.query(ContractAward)
-    
-    if naics_code:
-        query = query.filter(ContractAward.naics_code == naics_code)
-    
-    if psc_code:
-        query = query.filter(ContractAward.psc_code == psc_code)
-    
-    awards = query.filter(
-        ContractAward.total_value > 0,
-        ContractAward.award_date >= datetime.now() - timedelta(days=365*3)
-    ).limit(100).all()
-    
-    # Calculate pricing statistics
-    values = [award.total_value for award in awards if award.total_value]
-    
-    if not values:
-        return {
-            "data_points": 0,
-            "pricing_statistics": {},
-            "market_benchmarks": []
-        }
-    
-    values.sort()
-    n = len(values)
-    
-    pricing_stats = {
-        "average": sum(values) / n,
-        "median": values[n//2] if n % 2 == 1 else (values[n//2-1] + values[n//2]) / 2,
-        "min": min(values),
-        "max": max(values),
-        "percentile_25": values[int(n * 0.25)],
-        "percentile_75": values[int(n * 0.75)],
-        "std_deviation": (sum([(x - sum(values)/n)**2 for x in values]) / n) ** 0.5
-    }
-    
-    # Market benchmarks by contract size
-    benchmarks = []
-    size_ranges = [
-        (0, 100000, "Micro Purchase"),
-        (100000, 500000, "Small Business"),
-        (500000, 5000000, "Medium Contract"),
-        (5000000, float('inf'), "Large Contract")
-    ]
+    # service_category is accepted for compatibility; awards carry no GSA category to match it against
+    return PricingStatsService(db).get_pricing_intelligence(naics_code, psc_code)
+
+@router.get("/gsa-rates")
+async def get_gsa_rates(
+    naics_code: Optional[str] = Query(None),
+    psc_code: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Labor category words, e.g. 'senior cybersecurity engineer'"),
+    unit: str = Query("hour"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """GSA rate distribution and labor categories by NAICS/PSC, or ranked by labor category words within them"""
     
-    for min_val, max_val, category in size_ranges:
-        range_values = [v for v in values if min_val <= v < max_val]
-        if range_values:
-            benchmarks.append({
-                "category": category,
-                "count": len(range_values),
-                "average_value": sum(range_values) / len(range_values),
-                "value_range": f"${min_val:,.0f} - ${max_val:,.0f}" if max_val != float('inf') else f"${min_val:,.0f}+"
-            })
-    
-    return {
-        "data_points": len(values),
-        "pricing_statistics": pricing_stats,
-        "market_benchmarks": benchmarks,
-        "recent_awards": [
-            {
-                "contractor": award.contractor.company_name if award.contractor else "Unknown",
-                "value": award.total_value,
-                "award_date": award.award_date.isoformat(),
-                "agency": award.agency
-            }
-            for award in awards[:10]
-        ]
-    }
+    try:
+        return GSAPricingIndexService(db).get_rates(naics_code, psc_code, q, unit, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/market-trends")
 async def get_market_trends(
@@ -321,66 +313,44 @@ async def get_market_trends(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get market trends and analytics"""
+    """Get market trends and analytics from the monthly award cube"""
     
-    start_date = datetime.now() - timedelta(days=30 * months_back)
-    
-    query = db.query(ContractAward).filter(ContractAward.award_date >= start_date)
+    return MarketTrendService(db).get_market_trends(naics_code, agency, months_back)
+
+@router.get("/teaming/partners")
+async def get_teaming_partners(
+    company: str = Query(...),
+    naics_code: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Most frequent teaming partners of a company, optionally on contracts in one NAICS"""
     
-    if naics_code:
-        query = query.filter(ContractAward.naics_code == naics_code)
+    return TeamingGraphService(db).get_graph().top_partners(company, naics_code, limit)
+
+@router.get("/teaming/paths")
+async def get_teaming_paths(
+    company: str = Query(...),
+    agency: str = Query(...),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """One- and two-hop teaming paths from a company to companies holding awards at an agency"""
     
-    if agency:
-        query = query.filter(ContractAward.agency.ilike(f"%{agency}%"))
+    return TeamingGraphService(db).get_graph().paths_to_agency(company, agency, limit)
+
+@router.get("/teaming/centrality")
+async def get_teaming_centrality(
+    naics_code: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Most connected companies in the teaming graph, optionally within one NAICS"""
     
-    awards = query.all()
-    
-    # Group by month
-    monthly_data = {}
-    for award in awards:
-        month_key = award.award_date.strftime("%Y-%m")
-        if month_key not in monthly_data:
-            monthly_data[month_key] = {
-                "award_count": 0,
-                "total_value": 0,
-                "small_business_awards": 0,
-                "average_value": 0
-            }
-        
-        monthly_data[month_key]["award_count"] += 1
-        monthly_data[month_key]["total_value"] += award.total_value or 0
-        
-        # Check if small business (simplified check)
-        if award.set_aside and any(sb in award.set_aside.lower() for sb in ['small', '8(a)', 'wosb', 'hubzone']):
-            monthly_data[month_key]["small_business_awards"] += 1
-    
-    # Calculate averages
-    for month_data in monthly_data.values():
-        if month_data["award_count"] > 0:
-            month_data["average_value"] = month_data["total_value"] / month_data["award_count"]
-    
-    # Sort by month
-    trends = []
-    for month in sorted(monthly_data.keys()):
-        data = monthly_data[month]
-        trends.append({
-            "month": month,
-            "award_count": data["award_count"],
-            "total_value": data["total_value"],
-            "average_value": data["average_value"],
-            "small_business_percentage": (data["small_business_awards"] / data["award_count"] * 100) if data["award_count"] > 0 else 0
-        })
-    
-    return {
-        "period_months": months_back,
-        "trends": trends,
-        "summary": {
-            "total_awards": len(awards),
-            "total_value": sum(award.total_value or 0 for award in awards),
-            "average_monthly_awards": len(awards) / months_back if months_back > 0 else 0,
-            "small_business_share": len([a for a in awards if a.set_aside and 'small' in a.set_aside.lower()]) / len(awards) * 100 if awards else 0
-        }
-    }
+    return TeamingGraphService(db).get_graph().centrality(naics_code, limit)
 
 @router.post("/competitor/add")
 async def add_competitor(
@@ -413,7 +383,11 @@ async def add_competitor(
     )
     
     db.add(competitor)
+    db.flush()
+    CompetitorIndexService(db).sync_competitor(competitor)
     db.commit()
+    invalidate_market_components(('competitors', 'teaming'))
+    invalidate_teaming_graph()
     db.refresh(competitor)
     
     return {"status": "success", "competitor_id": competitor.id, "message": "Competitor added successfully"}
\ No newline at end of file
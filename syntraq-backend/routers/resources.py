@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from pydantic import BaseModel
+import io
+import tempfile
 
 from database.connection import get_db
 from models.resources import (
     Employee, ExternalResource, DeliveryPlan, ResourceAllocation,
     TimeEntry, DeliveryStatusUpdate, ResourceCapacityPlan,
-    SkillLevel, ResourceType, AllocationStatus
+    SkillLevel, ResourceType, AllocationStatus, Skill, EmployeeSkill
 )
 from services.resource_planning import ResourcePlanningService
+from services.utilization_report import UtilizationReportService, invalidate_utilization_snapshot, apply_time_entries_to_snapshot
+from services.time_entry_import import TimeEntryImportService, iter_csv_records, iter_ndjson_records
+from services.skills_index import SkillIndexService, normalize_skill, invalidate_skill_matrix
 from routers.users import get_current_user
 from models.user import User
 
 router = APIRouter()
 
+IMPORT_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
 class EmployeeCreateRequest(BaseModel):
     first_name: str
     last_name: str
@@ -29,6 +36,20 @@ class EmployeeCreateRequest(BaseModel):
     billable_rate: Optional[float] = None
     security_clearance: Optional[str] = None
 
+class EmployeeUpdateRequest(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    position_title: Optional[str] = None
+    employment_type: Optional[str] = None
+    primary_skills: Optional[List[str]] = None
+    secondary_skills: Optional[List[str]] = None
+    base_location: Optional[str] = None
+    hourly_rate: Optional[float] = None
+    billable_rate: Optional[float] = None
+    security_clearance: Optional[str] = None
+    is_active: Optional[bool] = None
+
 class DeliveryPlanCreateRequest(BaseModel):
     plan_name: str
     start_date: str
@@ -38,6 +59,8 @@ class DeliveryPlanCreateRequest(BaseModel):
     methodology: str = "Agile"
     total_effort_hours: Optional[float] = None
     peak_team_size: Optional[int] = None
+    required_skills: List[str] = []
+    required_clearance: Optional[str] = None
 
 class ResourceAllocationRequest(BaseModel):
     role_title: str
@@ -111,8 +134,11 @@ async def add_employee(
     )
     
     db.add(employee)
+    db.flush()
+    SkillIndexService(db).sync_employee(employee)
     db.commit()
     db.refresh(employee)
+    invalidate_utilization_snapshot(current_user.id)
     
     return {
         "employee_id": employee.id,
@@ -121,6 +147,42 @@ async def add_employee(
         "message": "Employee added successfully"
     }
 
+@router.put("/employees/{employee_id}")
+async def update_employee(
+    employee_id: int,
+    request: EmployeeUpdateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update an employee; skill changes are written through to the skill index"""
+    
+    employee = db.query(Employee).filter(
+        Employee.id == employee_id,
+        Employee.company_id == current_user.id
+    ).first()
+    
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    changes = request.model_dump(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(employee, field, value)
+    
+    if {'primary_skills', 'secondary_skills'} & changes.keys():
+        SkillIndexService(db).sync_employee(employee)
+    elif 'is_active' in changes:
+        # Inactive employees drop out of the bitset matrix
+        invalidate_skill_matrix(current_user.id)
+    
+    db.commit()
+    invalidate_utilization_snapshot(current_user.id)
+    
+    return {
+        "employee_id": employee.id,
+        "status": "success",
+        "message": "Employee updated successfully"
+    }
+
 @router.get("/employees", response_model=List[EmployeeResponse])
 async def get_employees(
     active_only: bool = Query(True),
@@ -138,7 +200,15 @@ async def get_employees(
         query = query.filter(Employee.is_active == True)
     
     if skill:
-        query = query.filter(Employee.primary_skills.contains([skill]))
+        SkillIndexService(db).index_missing_employees(current_user.id)
+        primary_holders = db.query(EmployeeSkill.employee_id).join(
+            Skill, Skill.id == EmployeeSkill.skill_id
+        ).filter(
+            EmployeeSkill.company_id == current_user.id,
+            EmployeeSkill.is_primary == True,
+            Skill.name == normalize_skill(skill)
+        )
+        query = query.filter(Employee.id.in_(primary_holders))
     
     employees = query.offset(skip).limit(limit).all()
     
@@ -314,6 +384,7 @@ async def create_delivery_plan(
     try:
         plan_data = request.dict()
         result = await service.create_delivery_plan(project_id, plan_data, current_user.id)
+        invalidate_utilization_snapshot(current_user.id)
         
         return {
             "status": "success",
@@ -469,6 +540,7 @@ async def add_resource_allocation(
     db.add(allocation)
     db.commit()
     db.refresh(allocation)
+    invalidate_utilization_snapshot(current_user.id)
     
     return {
         "allocation_id": allocation.id,
@@ -517,6 +589,10 @@ async def add_time_entry(
     db.add(time_entry)
     db.commit()
     db.refresh(time_entry)
+    apply_time_entries_to_snapshot(
+        current_user.id,
+        [(time_entry.employee_id, time_entry.work_date, time_entry.hours_worked, time_entry.billable_hours)]
+    )
     
     return {
         "time_entry_id": time_entry.id,
@@ -524,6 +600,40 @@ async def add_time_entry(
         "message": "Time entry added"
     }
 
+@router.post("/time-entries/bulk")
+async def import_time_entries(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults from Content-Type"),
+    atomic: bool = Query(False, description="Reject the whole file if any row fails"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk import time entries from a CSV or NDJSON request body"""
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+    
+    # Spool the body (to disk past a few MB) so rows are parsed and validated one at a time
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        records = iter_ndjson_records(stream) if format == "ndjson" else iter_csv_records(stream)
+        
+        service = TimeEntryImportService(db)
+        return service.import_entries(current_user.id, records, atomic=atomic)
+        
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Time entry import failed: {str(e)}")
+    finally:
+        spool.close()
+
 @router.get("/delivery-plans/{plan_id}/progress")
 async def get_delivery_progress(
     plan_id: int,
@@ -575,72 +685,69 @@ async def get_capacity_analysis(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Capacity analysis failed: {str(e)}")
 
+@router.get("/capacity-timeline")
+async def get_capacity_timeline(
+    planning_months: int = Query(6, ge=1, le=36),
+    granularity: str = Query("week", pattern="^(day|week)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get available vs. allocated hours per day or week"""
+    
+    service = ResourcePlanningService(db)
+    
+    try:
+        return service.get_capacity_timeline(current_user.id, planning_months, granularity)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Capacity timeline failed: {str(e)}")
+
+@router.get("/free-employees")
+async def get_free_employees(
+    start_date: datetime,
+    end_date: datetime,
+    min_free_percentage: float = Query(50.0, ge=0, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get employees with at least the given free capacity on every day between the dates"""
+    
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date")
+    
+    service = ResourcePlanningService(db)
+    
+    try:
+        free_employees = service.find_free_employees(current_user.id, min_free_percentage, start_date, end_date)
+        return {
+            "period": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat()
+            },
+            "min_free_percentage": min_free_percentage,
+            "employees": free_employees
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Availability search failed: {str(e)}")
+
 @router.get("/resource-utilization")
 async def get_resource_utilization(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
+    use_snapshot: bool = Query(False, description="Serve the cached last-30-days snapshot when no dates are given"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get resource utilization report"""
     
-    if not start_date:
-        start_date = datetime.now() - timedelta(days=30)
-    if not end_date:
-        end_date = datetime.now()
-    
-    # Get all employees
-    employees = db.query(Employee).filter(
-        Employee.company_id == current_user.id,
-        Employee.is_active == True
-    ).all()
-    
-    utilization_data = []
+    service = UtilizationReportService(db)
     
-    for emp in employees:
-        # Get allocations in period
-        allocations = db.query(ResourceAllocation).filter(
-            ResourceAllocation.employee_id == emp.id,
-            ResourceAllocation.start_date <= end_date,
-            ResourceAllocation.end_date >= start_date
-        ).all()
-        
-        total_allocation = sum(alloc.allocation_percentage for alloc in allocations)
-        
-        # Get actual time entries
-        time_entries = db.query(TimeEntry).filter(
-            TimeEntry.employee_id == emp.id,
-            TimeEntry.work_date >= start_date,
-            TimeEntry.work_date <= end_date
-        ).all()
-        
-        total_hours = sum(entry.hours_worked for entry in time_entries)
-        billable_hours = sum(entry.billable_hours for entry in time_entries)
+    try:
+        return service.get_utilization_report(current_user.id, start_date, end_date, use_snapshot)
         
-        utilization_data.append({
-            "employee_id": emp.id,
-            "name": f"{emp.first_name} {emp.last_name}",
-            "position": emp.position_title,
-            "planned_allocation": min(total_allocation, 100),
-            "actual_hours": total_hours,
-            "billable_hours": billable_hours,
-            "billable_rate": (billable_hours / total_hours * 100) if total_hours > 0 else 0,
-            "skills": emp.primary_skills or []
-        })
-    
-    return {
-        "period": {
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat()
-        },
-        "utilization_data": utilization_data,
-        "summary": {
-            "total_employees": len(employees),
-            "average_utilization": sum(u["planned_allocation"] for u in utilization_data) / len(utilization_data) if utilization_data else 0,
-            "total_hours": sum(u["actual_hours"] for u in utilization_data),
-            "total_billable": sum(u["billable_hours"] for u in utilization_data)
-        }
-    }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Utilization report failed: {str(e)}")
 
 @router.get("/skills-inventory")
 async def get_skills_inventory(
@@ -649,67 +756,53 @@ async def get_skills_inventory(
 ):
     """Get company skills inventory and gaps"""
     
-    # Get all employees and their skills
-    employees = db.query(Employee).filter(
-        Employee.company_id == current_user.id,
-        Employee.is_active == True
-    ).all()
-    
-    # Aggregate skills
-    skills_inventory = {}
+    service = SkillIndexService(db)
     
-    for emp in employees:
-        primary_skills = emp.primary_skills or []
-        secondary_skills = emp.secondary_skills or []
-        
-        for skill in primary_skills:
-            if skill not in skills_inventory:
-                skills_inventory[skill] = {'primary': 0, 'secondary': 0, 'total': 0}
-            skills_inventory[skill]['primary'] += 1
-            skills_inventory[skill]['total'] += 1
+    try:
+        return service.get_inventory(current_user.id)
         
-        for skill in secondary_skills:
-            if skill not in skills_inventory:
-                skills_inventory[skill] = {'primary': 0, 'secondary': 0, 'total': 0}
-            skills_inventory[skill]['secondary'] += 1
-            skills_inventory[skill]['total'] += 1
-    
-    # Get current project requirements
-    active_plans = db.query(DeliveryPlan).filter(
-        DeliveryPlan.created_by == current_user.id,
-        DeliveryPlan.status.in_(['approved', 'active'])
-    ).all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Skills inventory failed: {str(e)}")
+
+@router.get("/skills/search", response_model=List[EmployeeResponse])
+async def search_employees_by_skills(
+    skills: List[str] = Query(..., min_length=1),
+    match: str = Query("all", pattern="^(all|any)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Find active employees holding all (or any) of the given skills"""
     
-    required_skills = {}
-    for plan in active_plans:
-        if plan.required_skills:
-            for skill_req in plan.required_skills:
-                skill_name = skill_req.get('skill') if isinstance(skill_req, dict) else skill_req
-                quantity = skill_req.get('quantity', 1) if isinstance(skill_req, dict) else 1
-                
-                if skill_name not in required_skills:
-                    required_skills[skill_name] = 0
-                required_skills[skill_name] += quantity
-    
-    # Identify gaps
-    skill_gaps = []
-    for skill, required_count in required_skills.items():
-        available_count = skills_inventory.get(skill, {}).get('total', 0)
-        if required_count > available_count:
-            skill_gaps.append({
-                'skill': skill,
-                'required': required_count,
-                'available': available_count,
-                'gap': required_count - available_count
-            })
+    service = SkillIndexService(db)
+    employees = service.find_employees(current_user.id, skills, match_all=(match == "all"))
     
-    return {
-        "skills_inventory": skills_inventory,
-        "required_skills": required_skills,
-        "skill_gaps": skill_gaps,
-        "summary": {
-            "total_skills": len(skills_inventory),
-            "total_gaps": len(skill_gaps),
-            "coverage_percentage": (len(skills_inventory) - len(skill_gaps)) / len(required_skills) * 100 if required_skills else 100
-        }
-    }
\ No newline at end of file
+    return [
+        EmployeeResponse(
+            id=emp.id,
+            first_name=emp.first_name,
+            last_name=emp.last_name,
+            email=emp.email,
+            position_title=emp.position_title,
+            primary_skills=emp.primary_skills or [],
+            current_utilization=emp.current_utilization,
+            is_available=emp.is_available
+        )
+        for emp in employees
+    ]
+
+@router.post("/skills/reindex")
+async def reindex_employee_skills(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Rebuild the employee skill index from employee records"""
+    
+    service = SkillIndexService(db)
+    
+    try:
+        counts = service.rebuild_company(current_user.id)
+        return {"status": "success", **counts}
+        
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Skill reindex failed: {str(e)}")
\ No newline at end of file
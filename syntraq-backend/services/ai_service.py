@@ -6,6 +6,7 @@ A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
 """
 
 import openai
+import asyncio
 import os
 import json
 import time
@@ -13,17 +14,29 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from dotenv import load_dotenv
 
+from services.ai_usage import InstrumentedAsyncOpenAI
+
 load_dotenv()
 
 class AIService:
     """AI service for opportunity analysis and summarization"""
     
     def __init__(self):
-        self.client = openai.AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        self._client = None
         self.model = "gpt-4o-mini"  # Cost-effective model for MVP
     
+    @property
+    def client(self) -> InstrumentedAsyncOpenAI:
+        # Built on first use: creating the OpenAI client costs tens of milliseconds, which requests
+        # answered from cached snapshots never need to pay
+        if self._client is None:
+            # Retries are handled by the instrumentation layer so they show up in the usage ledger
+            self._client = InstrumentedAsyncOpenAI(openai.AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0
+            ))
+        return self._client
+    
     async def generate_executive_summary(
         self, 
         opportunity: Any,
@@ -0,0 +1,242 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - AI Usage Instrumentation & Ledger
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import openai
+import asyncio
+import contextvars
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from collections import defaultdict
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+from models.ai_usage import AIUsageRecord
+from services.request_context import get_request_context
+from services.metrics import record_openai_call
+
+# USD per 1M tokens as (input, output); matched by longest model-name prefix
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate USD cost of a completion from token counts"""
+
+    matches = [name for name in MODEL_PRICING if model.startswith(name)]
+    if not matches:
+        return 0.0
+
+    input_rate, output_rate = MODEL_PRICING[max(matches, key=len)]
+    return (prompt_tokens * input_rate + completion_tokens * output_rate) / 1_000_000
+
+def record_usage(
+    caller: str,
+    model: str,
+    latency_ms: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cache_hit: bool = False,
+    retries: int = 0,
+    error: Optional[BaseException] = None
+) -> None:
+    """Append one entry to the AI usage ledger; never raises into the caller"""
+
+    context = get_request_context()
+    if not cache_hit:
+        record_openai_call(latency_ms / 1000)
+
+    record = AIUsageRecord(
+        caller=caller,
+        endpoint=context.route if context else None,
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cost_usd=0.0 if cache_hit else estimate_cost(model, prompt_tokens, completion_tokens),
+        latency_ms=round(latency_ms, 2),
+        cache_hit=cache_hit,
+        retries=retries,
+        outcome="error" if error else "success",
+        error_type=type(error).__name__ if error else None
+    )
+
+    # Write outside the request context so ledger inserts are not counted as the endpoint's queries,
+    # and off the event loop so the commit does not stall other requests
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        contextvars.Context().run(_write_record, record)
+        return
+    loop.run_in_executor(None, contextvars.Context().run, _write_record, record)
+
+def _write_record(record: AIUsageRecord) -> None:
+    db = SessionLocal()
+    try:
+        db.add(record)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to write AI usage record: {e}")
+    finally:
+        db.close()
+
+def _resolve_caller(frame) -> str:
+    """Name the Service.method that issued a completion call"""
+
+    instance = frame.f_locals.get("self")
+    if instance is not None:
+        return f"{type(instance).__name__}.{frame.f_code.co_name}"
+    return frame.f_code.co_name
+
+class InstrumentedChatCompletions:
+    """Wraps chat.completions.create with retries and usage-ledger recording"""
+
+    def __init__(self, completions: Any):
+        self._completions = completions
+
+    async def create(self, **kwargs) -> Any:
+        caller = _resolve_caller(sys._getframe(1))
+        model = kwargs.get("model", "unknown")
+        start_time = time.perf_counter()
+        retries = 0
+
+        while True:
+            try:
+                response = await self._completions.create(**kwargs)
+                break
+            except RETRYABLE_ERRORS as e:
+                if retries < MAX_RETRIES:
+                    retries += 1
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (retries - 1) + random.uniform(0, 0.25))
+                    continue
+                record_usage(caller, model, (time.perf_counter() - start_time) * 1000, retries=retries, error=e)
+                raise
+            except Exception as e:
+                record_usage(caller, model, (time.perf_counter() - start_time) * 1000, retries=retries, error=e)
+                raise
+
+        usage = getattr(response, "usage", None)
+        record_usage(
+            caller,
+            model,
+            (time.perf_counter() - start_time) * 1000,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            retries=retries
+        )
+
+        return response
+
+class InstrumentedAsyncOpenAI:
+    """Drop-in AsyncOpenAI client whose chat completions are written to the usage ledger"""
+
+    def __init__(self, client: openai.AsyncOpenAI):
+        self._client = client
+        self.chat = SimpleNamespace(completions=InstrumentedChatCompletions(client.chat.completions))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+def _percentile(sorted_values: List[float], percentile: float) -> Optional[float]:
+    """Linear-interpolated percentile of an already sorted list"""
+
+    if not sorted_values:
+        return None
+
+    rank = (len(sorted_values) - 1) * percentile / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+class AIUsageReportService:
+    """Cost and latency rollups over the AI usage ledger"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_endpoint_rollup(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Per-endpoint call counts, p50/p95 latency, tokens and cost"""
+
+        rows = self._load_rows(days)
+
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row.endpoint or "background"].append(row)
+
+        rollup = [
+            {"endpoint": endpoint, **self._summarize(endpoint_rows)}
+            for endpoint, endpoint_rows in grouped.items()
+        ]
+        rollup.sort(key=lambda r: r["cost_usd"], reverse=True)
+
+        return rollup
+
+    def get_summary(self, days: int = 7) -> Dict[str, Any]:
+        """Overall totals with breakdowns by model and by caller"""
+
+        rows = self._load_rows(days)
+
+        by_model = defaultdict(list)
+        by_caller = defaultdict(list)
+        for row in rows:
+            by_model[row.model].append(row)
+            by_caller[row.caller].append(row)
+
+        return {
+            "period_days": days,
+            "totals": self._summarize(rows),
+            "by_model": {model: self._summarize(model_rows) for model, model_rows in by_model.items()},
+            "by_caller": sorted(
+                [{"caller": caller, **self._summarize(caller_rows)} for caller, caller_rows in by_caller.items()],
+                key=lambda r: r["cost_usd"],
+                reverse=True
+            )
+        }
+
+    def _load_rows(self, days: int) -> List[Tuple]:
+        since = datetime.utcnow() - timedelta(days=days)
+
+        return self.db.query(
+            AIUsageRecord.endpoint,
+            AIUsageRecord.caller,
+            AIUsageRecord.model,
+            AIUsageRecord.prompt_tokens,
+            AIUsageRecord.completion_tokens,
+            AIUsageRecord.cost_usd,
+            AIUsageRecord.latency_ms,
+            AIUsageRecord.cache_hit,
+            AIUsageRecord.retries,
+            AIUsageRecord.outcome
+        ).filter(AIUsageRecord.created_at >= since).all()
+
+    def _summarize(self, rows: List[Tuple]) -> Dict[str, Any]:
+        latencies = sorted(row.latency_ms for row in rows if row.latency_ms is not None)
+        calls = len(rows)
+
+        return {
+            "calls": calls,
+            "errors": sum(1 for row in rows if row.outcome == "error"),
+            "cache_hits": sum(1 for row in rows if row.cache_hit),
+            "retries": sum(row.retries or 0 for row in rows),
+            "prompt_tokens": sum(row.prompt_tokens or 0 for row in rows),
+            "completion_tokens": sum(row.completion_tokens or 0 for row in rows),
+            "cost_usd": round(sum(row.cost_usd or 0 for row in rows), 6),
+            "latency_p50_ms": _percentile(latencies, 50),
+            "latency_p95_ms": _percentile(latencies, 95),
+            "error_rate": (sum(1 for row in rows if row.outcome == "error") / calls * 100) if calls else 0
+        }
@@ -0,0 +1,292 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Resource Availability Engine & Capacity Timeline
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models.resources import Employee, ExternalResource, ResourceAllocation, AllocationStatus
+
+# Allocations that actually consume capacity
+COMMITTED_STATUSES = [AllocationStatus.CONFIRMED, AllocationStatus.ACTIVE]
+
+# Allocations that count as demand when planning ahead
+PLANNING_STATUSES = [AllocationStatus.PLANNED, AllocationStatus.CONFIRMED, AllocationStatus.ACTIVE]
+
+WORKDAYS_PER_WEEK = 5
+DEFAULT_WEEKLY_HOURS = 40.0
+DEFAULT_MAX_UTILIZATION = 85.0
+
+class CapacityTimeline:
+    """Day-bucketed allocation index: one row per resource, one column per calendar day"""
+
+    def __init__(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        allocations: Iterable[Tuple[int, datetime, datetime, float]],
+        capacities: Optional[Dict[int, Tuple[float, float]]] = None
+    ):
+        """Build from (resource_id, start, end, percentage) rows and optional resource_id -> (weekly hours, max utilization %)"""
+
+        self.start_date = datetime.combine(start_date.date(), datetime.min.time())
+        self.days = max((end_date.date() - start_date.date()).days + 1, 1)
+        capacities = capacities or {}
+
+        allocations = [row for row in allocations if row[0] is not None and row[1] is not None and row[2] is not None]
+        self.resource_ids = list(dict.fromkeys(list(capacities) + [row[0] for row in allocations]))
+        self._rows = {resource_id: index for index, resource_id in enumerate(self.resource_ids)}
+
+        self.weekly_hours = np.array([capacities.get(rid, (None, None))[0] or DEFAULT_WEEKLY_HOURS for rid in self.resource_ids])
+        self.max_utilization = np.array([capacities.get(rid, (None, None))[1] or DEFAULT_MAX_UTILIZATION for rid in self.resource_ids])
+
+        day_numbers = np.arange(self.days)
+        self.dates = [self.start_date + timedelta(days=int(day)) for day in day_numbers]
+        self.workdays = np.array([date.weekday() < WORKDAYS_PER_WEEK for date in self.dates])
+
+        # Difference array per resource, prefix-summed into allocation % per day
+        load = np.zeros((len(self.resource_ids), self.days + 1))
+        if allocations:
+            rows = np.array([self._rows[row[0]] for row in allocations])
+            starts = np.array([self._day_index(row[1]) for row in allocations])
+            ends = np.array([self._day_index(row[2]) for row in allocations])
+            percentages = np.array([row[3] or 0.0 for row in allocations], dtype=float)
+
+            in_window = (ends >= 0) & (starts < self.days)
+            starts = np.clip(starts[in_window], 0, self.days - 1)
+            ends = np.clip(ends[in_window], 0, self.days - 1)
+            rows = rows[in_window]
+            percentages = percentages[in_window]
+
+            np.add.at(load, (rows, starts), percentages)
+            np.add.at(load, (rows, ends + 1), -percentages)
+
+        self.load = np.cumsum(load, axis=1)[:, :self.days]
+
+    def _day_index(self, value: datetime) -> int:
+        return (value.date() - self.start_date.date()).days
+
+    def _day_slice(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> slice:
+        first = max(self._day_index(start_date), 0) if start_date else 0
+        last = min(self._day_index(end_date), self.days - 1) if end_date else self.days - 1
+        return slice(first, last + 1)
+
+    def peak_utilization(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[int, float]:
+        """Highest allocation % on any day in the range, per resource"""
+
+        window = self.load[:, self._day_slice(start_date, end_date)]
+        if window.shape[1] == 0:
+            return {resource_id: 0.0 for resource_id in self.resource_ids}
+
+        peaks = window.max(axis=1)
+        return {resource_id: float(peak) for resource_id, peak in zip(self.resource_ids, peaks)}
+
+    def free_resources(
+        self,
+        min_free_percentage: float,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Resources with at least min_free_percentage headroom under their max utilization on every day in the range"""
+
+        window = self.load[:, self._day_slice(start_date, end_date)]
+        peaks = window.max(axis=1) if window.shape[1] else np.zeros(len(self.resource_ids))
+        free = self.max_utilization - np.minimum(peaks, 100.0)
+
+        matches = np.nonzero(free >= min_free_percentage)[0]
+        ordered = matches[np.argsort(-free[matches], kind="stable")]
+
+        return [
+            {
+                'resource_id': self.resource_ids[index],
+                'peak_allocation': float(peaks[index]),
+                'free_percentage': float(free[index])
+            }
+            for index in ordered
+        ]
+
+    def daily_hours(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Available and allocated hours per day across all resources (weekends carry no capacity)"""
+
+        hours_per_day = self.weekly_hours / WORKDAYS_PER_WEEK
+        available = np.where(self.workdays, hours_per_day.sum(), 0.0)
+        allocated = np.where(self.workdays, (self.load / 100.0 * hours_per_day[:, None]).sum(axis=0), 0.0)
+        return available, allocated
+
+    def total_hours(self) -> Tuple[float, float]:
+        """Total (available, allocated) hours over the whole timeline"""
+
+        available, allocated = self.daily_hours()
+        return float(available.sum()), float(allocated.sum())
+
+    def daily_capacity(self) -> List[Dict[str, Any]]:
+        available, allocated = self.daily_hours()
+        return [
+            self._capacity_entry(self.dates[day], self.dates[day], available[day], allocated[day])
+            for day in range(self.days)
+        ]
+
+    def weekly_capacity(self) -> List[Dict[str, Any]]:
+        """Available vs. allocated hours in 7-day buckets from the timeline start"""
+
+        available, allocated = self.daily_hours()
+        weeks = []
+        for first in range(0, self.days, 7):
+            last = min(first + 7, self.days) - 1
+            weeks.append(self._capacity_entry(
+                self.dates[first], self.dates[last],
+                available[first:last + 1].sum(), allocated[first:last + 1].sum()
+            ))
+        return weeks
+
+    def _capacity_entry(self, start: datetime, end: datetime, available: float, allocated: float) -> Dict[str, Any]:
+        return {
+            'start_date': start.date().isoformat(),
+            'end_date': end.date().isoformat(),
+            'available_hours': round(float(available), 2),
+            'allocated_hours': round(float(allocated), 2),
+            'utilization_percentage': round(float(allocated / available * 100), 2) if available > 0 else 0.0
+        }
+
+class AvailabilityEngine:
+    """Batched allocation loading and capacity timelines for a company and window"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_allocations_in_period(
+        self,
+        company_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        statuses: List[AllocationStatus] = PLANNING_STATUSES
+    ) -> List[ResourceAllocation]:
+        """All employee allocations for the company overlapping the period, in one query"""
+
+        return self.db.query(ResourceAllocation).join(
+            Employee, Employee.id == ResourceAllocation.employee_id
+        ).filter(
+            Employee.company_id == company_id,
+            *self._allocation_filters(start_date, end_date, statuses, None)
+        ).all()
+
+    def build_employee_timeline(
+        self,
+        company_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        employees: Optional[List[Employee]] = None,
+        allocations: Optional[List[ResourceAllocation]] = None,
+        statuses: List[AllocationStatus] = COMMITTED_STATUSES,
+        exclude_delivery_plan_id: Optional[int] = None
+    ) -> CapacityTimeline:
+        """Timeline over employees; pass already-loaded employees/allocations to avoid re-querying them"""
+
+        if employees is None:
+            employees = self.db.query(Employee).filter(
+                Employee.company_id == company_id,
+                Employee.is_active == True
+            ).all()
+
+        if allocations is None:
+            rows = self.db.query(
+                ResourceAllocation.employee_id,
+                ResourceAllocation.start_date,
+                ResourceAllocation.end_date,
+                ResourceAllocation.allocation_percentage
+            ).join(
+                Employee, Employee.id == ResourceAllocation.employee_id
+            ).filter(
+                Employee.company_id == company_id,
+                *self._allocation_filters(start_date, end_date, statuses, exclude_delivery_plan_id)
+            ).all()
+        else:
+            rows = [
+                (alloc.employee_id, alloc.start_date, alloc.end_date, alloc.allocation_percentage)
+                for alloc in allocations
+            ]
+
+        capacities = {
+            emp.id: (emp.standard_hours_per_week, emp.max_utilization_percentage)
+            for emp in employees
+        }
+
+        return CapacityTimeline(start_date, end_date, rows, capacities)
+
+    def build_external_timeline(
+        self,
+        company_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        statuses: List[AllocationStatus] = COMMITTED_STATUSES,
+        exclude_delivery_plan_id: Optional[int] = None
+    ) -> CapacityTimeline:
+        """Timeline over external resources that have allocations in the window"""
+
+        rows = self.db.query(
+            ResourceAllocation.external_resource_id,
+            ResourceAllocation.start_date,
+            ResourceAllocation.end_date,
+            ResourceAllocation.allocation_percentage
+        ).join(
+            ExternalResource, ExternalResource.id == ResourceAllocation.external_resource_id
+        ).filter(
+            ExternalResource.company_id == company_id,
+            *self._allocation_filters(start_date, end_date, statuses, exclude_delivery_plan_id)
+        ).all()
+
+        return CapacityTimeline(start_date, end_date, rows)
+
+    def get_employee_utilization(
+        self,
+        company_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        exclude_delivery_plan_id: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Peak committed utilization (capped at 100%) per employee with allocations in the window"""
+
+        timeline = self.build_employee_timeline(
+            company_id, start_date, end_date, employees=[], exclude_delivery_plan_id=exclude_delivery_plan_id
+        )
+        return {rid: min(peak, 100.0) for rid, peak in timeline.peak_utilization().items()}
+
+    def get_external_utilization(
+        self,
+        company_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        exclude_delivery_plan_id: Optional[int] = None
+    ) -> Dict[int, float]:
+        """Peak committed utilization (capped at 100%) per external resource with allocations in the window"""
+
+        timeline = self.build_external_timeline(
+            company_id, start_date, end_date, exclude_delivery_plan_id=exclude_delivery_plan_id
+        )
+        return {rid: min(peak, 100.0) for rid, peak in timeline.peak_utilization().items()}
+
+    def _allocation_filters(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        statuses: List[AllocationStatus],
+        exclude_delivery_plan_id: Optional[int]
+    ) -> List[Any]:
+        filters = [
+            ResourceAllocation.start_date <= end_date,
+            ResourceAllocation.end_date >= start_date,
+            ResourceAllocation.status.in_(statuses)
+        ]
+        if exclude_delivery_plan_id is not None:
+            # Re-planning an existing plan should not count its own allocations against availability
+            filters.append(or_(
+                ResourceAllocation.delivery_plan_id.is_(None),
+                ResourceAllocation.delivery_plan_id != exclude_delivery_plan_id
+            ))
+        return filters
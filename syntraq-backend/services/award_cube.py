@@ -0,0 +1,221 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Monthly Award Cube
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, update, delete, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.market_research import AwardMonthlyCube, ContractAward
+
+REBUILD_FETCH_SIZE = 10000
+
+# Classes counted as small-business awards; matches the substrings /market-trends has always used
+SMALL_BUSINESS_CLASSES = {'small', '8a', 'hubzone', 'wosb', 'sdvosb'}
+
+CubeKey = Tuple[str, str, str, str]  # (month, naics_code, agency, set_aside_class)
+
+def set_aside_class(set_aside: Optional[str]) -> str:
+    if not set_aside:
+        return 'none'
+    text = set_aside.lower()
+    if '8(a)' in text or '8a ' in text:
+        return '8a'
+    if 'hubzone' in text:
+        return 'hubzone'
+    if 'wosb' in text or 'women' in text:
+        return 'wosb'
+    if 'veteran' in text or 'sdvosb' in text:
+        return 'sdvosb'
+    if 'small' in text:
+        return 'small'
+    return 'other'
+
+def cube_key(award_date: Optional[datetime], naics_code: Optional[str], agency: Optional[str], set_aside: Optional[str]) -> Optional[CubeKey]:
+    """Cube cell for an award; awards without a date are not part of any month"""
+
+    if award_date is None:
+        return None
+    return (award_date.strftime('%Y-%m'), naics_code or '', agency or '', set_aside_class(set_aside))
+
+class CubeDeltas:
+    """Per-cell (count, value, small-business count) changes collected over one write batch"""
+
+    def __init__(self):
+        self.cells: Dict[CubeKey, List[float]] = {}
+
+    def add(self, key: Optional[CubeKey], total_value: Optional[float], sign: int = 1) -> None:
+        if key is None:
+            return
+        cell = self.cells.setdefault(key, [0, 0.0, 0])
+        cell[0] += sign
+        cell[1] += sign * (total_value or 0.0)
+        if key[3] in SMALL_BUSINESS_CLASSES:
+            cell[2] += sign
+
+    def apply(self, db: Session) -> None:
+        """Fold the deltas into the cube with one lookup, one bulk update and one bulk insert; the caller commits"""
+
+        cells = {key: cell for key, cell in self.cells.items() if any(cell)}
+        if not cells:
+            return
+
+        key_columns = (AwardMonthlyCube.month, AwardMonthlyCube.naics_code, AwardMonthlyCube.agency, AwardMonthlyCube.set_aside_class)
+        existing = {}
+        keys = list(cells)
+        for first in range(0, len(keys), 500):
+            chunk = keys[first:first + 500]
+            for row in db.query(AwardMonthlyCube.id, *key_columns, AwardMonthlyCube.award_count,
+                                AwardMonthlyCube.total_value, AwardMonthlyCube.small_business_awards).filter(
+                tuple_(*key_columns).in_(chunk)
+            ).all():
+                existing[tuple(row[1:5])] = row
+
+        now = datetime.utcnow()
+        updates = [
+            {
+                'id': row.id,
+                'award_count': row.award_count + cells[key][0],
+                'total_value': row.total_value + cells[key][1],
+                'small_business_awards': row.small_business_awards + cells[key][2],
+                'updated_at': now
+            }
+            for key, row in existing.items()
+        ]
+        inserts = self._new_rows({key: cell for key, cell in cells.items() if key not in existing}, now)
+
+        if updates:
+            db.execute(update(AwardMonthlyCube), updates)
+        if inserts:
+            db.execute(insert(AwardMonthlyCube), inserts)
+
+    @staticmethod
+    def _new_rows(cells: Dict[CubeKey, List[float]], now: datetime) -> List[Dict[str, Any]]:
+        return [
+            {
+                'month': month, 'naics_code': naics_code, 'agency': agency, 'set_aside_class': set_aside,
+                'award_count': count, 'total_value': value, 'small_business_awards': small, 'updated_at': now
+            }
+            for (month, naics_code, agency, set_aside), (count, value, small) in cells.items()
+        ]
+
+def rebuild_award_cube(db: Session) -> int:
+    """Recompute the cube from every award in one streamed pass; returns the number of cells"""
+
+    deltas = CubeDeltas()
+    result = db.execute(
+        select(ContractAward.award_date, ContractAward.naics_code, ContractAward.agency,
+               ContractAward.set_aside, ContractAward.total_value).execution_options(yield_per=REBUILD_FETCH_SIZE)
+    )
+    for award_date, naics_code, agency, set_aside, total_value in result:
+        deltas.add(cube_key(award_date, naics_code, agency, set_aside), total_value)
+
+    db.execute(delete(AwardMonthlyCube))
+    if deltas.cells:
+        db.execute(insert(AwardMonthlyCube), CubeDeltas._new_rows(deltas.cells, datetime.utcnow()))
+    db.commit()
+    return len(deltas.cells)
+
+class MarketTrendService:
+    """Monthly award trends read from the cube instead of the awards themselves"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_market_trends(self, naics_code: Optional[str] = None, agency: Optional[str] = None, months_back: int = 24) -> Dict[str, Any]:
+        # Whole months: the month containing the window start is included in full
+        start_month = (datetime.now() - timedelta(days=30 * months_back)).strftime('%Y-%m')
+
+        award_count = func.sum(AwardMonthlyCube.award_count)
+        query = self.db.query(
+            AwardMonthlyCube.month,
+            award_count,
+            func.sum(AwardMonthlyCube.total_value),
+            func.sum(AwardMonthlyCube.small_business_awards)
+        ).filter(AwardMonthlyCube.month >= start_month)
+
+        if naics_code:
+            query = query.filter(AwardMonthlyCube.naics_code == naics_code)
+
+        if agency:
+            query = query.filter(AwardMonthlyCube.agency.ilike(f"%{agency}%"))
+
+        rows = query.group_by(AwardMonthlyCube.month).having(award_count > 0).order_by(AwardMonthlyCube.month).all()
+
+        trends = [
+            {
+                "month": month,
+                "award_count": count,
+                "total_value": total_value,
+                "average_value": total_value / count,
+                "small_business_percentage": small / count * 100
+            }
+            for month, count, total_value, small in rows
+        ]
+
+        total_awards = sum(trend["award_count"] for trend in trends)
+        small_awards = sum(small for _, _, _, small in rows)
+
+        return {
+            "period_months": months_back,
+            "trends": trends,
+            "summary": {
+                "total_awards": total_awards,
+                "total_value": sum(trend["total_value"] for trend in trends),
+                "average_monthly_awards": total_awards / months_back if months_back > 0 else 0,
+                "small_business_share": small_awards / total_awards * 100 if total_awards else 0
+            }
+        }
+
+def _benchmark(awards: int = 300000, seed: int = 7) -> None:
+    """python -m services.award_cube: cube-backed trends versus grouping every award in Python"""
+
+    import random
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from services.award_warehouse import ensure_award_warehouse
+
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(seed)
+    agencies = [f"Department {i}" for i in range(12)]
+    set_asides = [None, "SMALL BUSINESS SET ASIDE - TOTAL", "8(A) SOLE SOURCE", "HUBZONE SET-ASIDE", "FULL AND OPEN"]
+    now = datetime.now()
+    db.execute(insert(ContractAward), [
+        {
+            "contract_number": f"BENCH-{i}",
+            "naics_code": str(541500 + rng.randrange(15)),
+            "agency": rng.choice(agencies),
+            "set_aside": rng.choice(set_asides),
+            "total_value": rng.lognormvariate(13, 1.5),
+            "award_date": now - timedelta(days=rng.randrange(365 * 6))
+        }
+        for i in range(awards)
+    ])
+    db.commit()
+
+    start_time = time.perf_counter()
+    cells = rebuild_award_cube(db)
+    rebuild_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    MarketTrendService(db).get_market_trends(months_back=60)
+    cube_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    start_month = (now - timedelta(days=30 * 60)).strftime('%Y-%m')
+    [a for a in db.query(ContractAward).all() if a.award_date.strftime('%Y-%m') >= start_month]
+    scan_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"{awards} awards -> {cells} cube cells (rebuild {rebuild_ms:.0f} ms); "
+          f"60-month trends {cube_ms:.1f} ms from cube vs {scan_ms:.0f} ms loading awards")
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,475 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Contract Award Warehouse Loader
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import csv
+import gzip
+import io
+import os
+import re
+import sys
+import zipfile
+from typing import Dict, List, Any, Optional, Iterable, Iterator, BinaryIO, Tuple
+from datetime import datetime
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from models.market_research import AwardMonthlyCube, CompetitorProfile, ContractAward
+from services.award_cube import CubeDeltas, cube_key
+from services.competitor_index import add_competitor_naics, ensure_competitor_index
+from services.pricing_stats import invalidate_pricing_stats
+from services.market_cache import invalidate_market_components
+from services.teaming_graph import invalidate_teaming_graph
+
+LOAD_BATCH_SIZE = 5000  # Awards per lookup/insert/update round and per commit
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "usaspending_contracts_sample.csv")
+
+# ContractAward / contractor field -> archive headers, normalized to lower_snake_case; the first
+# non-empty column wins. Covers USAspending award and transaction downloads and FPDS ATOM/CSV extracts.
+COLUMN_ALIASES = {
+    'contract_number': ('contract_award_unique_key', 'contract_number', 'award_id_piid', 'piid'),
+    'piid': ('award_id_piid', 'piid'),
+    'title': ('award_title', 'title'),
+    'description': ('prime_award_base_transaction_description', 'transaction_description', 'award_description', 'description_of_requirement', 'description'),
+    'agency': ('awarding_agency_name', 'contracting_agency_name', 'agency', 'department_name'),
+    'contracting_office': ('awarding_office_name', 'contracting_office_name', 'contracting_office'),
+    'base_value': ('base_and_exercised_options_value', 'current_total_value_of_award', 'base_value'),
+    'total_value': ('base_and_all_options_value', 'potential_total_value_of_award', 'total_value'),
+    'obligated_amount': ('total_dollars_obligated', 'federal_action_obligation', 'dollars_obligated', 'obligated_amount'),
+    'contract_type': ('type_of_contract_pricing_code', 'type_of_contract_pricing', 'contract_type'),
+    'naics_code': ('naics_code', 'principal_naics_code', 'naics'),
+    'psc_code': ('product_or_service_code', 'psc_code', 'product_service_code'),
+    'set_aside': ('type_of_set_aside', 'set_aside', 'type_set_aside'),
+    'award_date': ('award_base_action_date', 'date_signed', 'signed_date', 'action_date', 'award_date'),
+    'start_date': ('period_of_performance_start_date', 'effective_date', 'start_date'),
+    'end_date': ('period_of_performance_potential_end_date', 'period_of_performance_current_end_date', 'ultimate_completion_date', 'end_date'),
+    'pop_city': ('primary_place_of_performance_city_name', 'place_of_performance_city'),
+    'pop_state': ('primary_place_of_performance_state_code', 'place_of_performance_state'),
+    'pop_country': ('primary_place_of_performance_country_code', 'place_of_performance_country'),
+    'contractor_name': ('recipient_name', 'vendor_name', 'legal_business_name', 'contractor_name'),
+    'duns_number': ('recipient_duns', 'vendor_duns_number', 'duns_number', 'duns'),
+    'cage_code': ('cage_code', 'vendor_cage_code'),
+    'business_size': ('contracting_officers_determination_of_business_size', 'business_size'),
+}
+
+# FPDS pricing codes and their USAspending descriptions -> the contract types used across the app
+CONTRACT_TYPES = {
+    'J': 'FFP', 'FIRM FIXED PRICE': 'FFP',
+    'K': 'FP-EPA', 'FIXED PRICE WITH ECONOMIC PRICE ADJUSTMENT': 'FP-EPA',
+    'L': 'FPI', 'FIXED PRICE INCENTIVE': 'FPI',
+    'M': 'FPAF', 'FIXED PRICE AWARD FEE': 'FPAF',
+    'R': 'CPAF', 'COST PLUS AWARD FEE': 'CPAF',
+    'S': 'CS', 'COST NO FEE': 'CS',
+    'T': 'CS', 'COST SHARING': 'CS',
+    'U': 'CPFF', 'COST PLUS FIXED FEE': 'CPFF',
+    'V': 'CPIF', 'COST PLUS INCENTIVE FEE': 'CPIF',
+    'Y': 'T&M', 'TIME AND MATERIALS': 'T&M',
+    'Z': 'LH', 'LABOR HOURS': 'LH',
+}
+
+NO_SET_ASIDE = {'NONE', 'NO SET ASIDE USED.', 'NO SET ASIDE USED', 'N/A'}
+
+AWARD_FIELDS = (
+    'contract_number', 'piid', 'title', 'description', 'agency', 'contracting_office',
+    'base_value', 'total_value', 'obligated_amount', 'contract_type', 'naics_code', 'psc_code',
+    'set_aside', 'award_date', 'start_date', 'end_date', 'period_of_performance', 'place_of_performance'
+)
+
+def _normalize_header(header: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', header.strip().lower()).strip('_')
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    value = value.strip()
+    for parse in (
+        lambda v: datetime.fromisoformat(v.replace('Z', '+00:00')).replace(tzinfo=None),
+        lambda v: datetime.strptime(v, '%m/%d/%Y'),
+        lambda v: datetime.strptime(v, '%m/%d/%Y %H:%M:%S'),
+    ):
+        try:
+            return parse(value)
+        except ValueError:
+            continue
+    return None
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value.replace('$', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
+def _months_between(start: Optional[datetime], end: Optional[datetime]) -> Optional[int]:
+    if not start or not end or end < start:
+        return None
+    return max((end.year - start.year) * 12 + end.month - start.month + (1 if end.day >= start.day else 0), 1)
+
+def iter_award_archive(stream: BinaryIO, name: str = "") -> Iterator[Tuple[str, int, Dict[str, str]]]:
+    """Yield (file name, line number, row) from a CSV, gzipped CSV or ZIP of CSVs, one row at a time"""
+
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith('.csv'):
+                    continue
+                with archive.open(member) as member_stream:
+                    yield from _iter_csv(member_stream, member.filename)
+        return
+
+    stream.seek(0)
+    if stream.read(2) == b'\x1f\x8b':
+        stream.seek(0)
+        with gzip.GzipFile(fileobj=stream) as unzipped:
+            yield from _iter_csv(unzipped, name)
+        return
+
+    stream.seek(0)
+    yield from _iter_csv(stream, name)
+
+def _iter_csv(stream: BinaryIO, name: str) -> Iterator[Tuple[str, int, Dict[str, str]]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if not header:
+        return
+
+    columns = [_normalize_header(column) for column in header]
+    for row in reader:
+        if row:
+            yield name, reader.line_num, dict(zip(columns, row))
+
+def _flatten_record(record: Dict[str, Any], row: Dict[str, str], prefix: str = "") -> None:
+    for key, value in record.items():
+        name = _normalize_header(re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', key))
+        if isinstance(value, dict):
+            _flatten_record(value, row, f"{prefix}{name}_")
+        elif not isinstance(value, list):
+            text = '' if value is None else str(value)
+            # Both the qualified name ("naics_code" from naics.code) and the bare one ("date_signed")
+            row.setdefault(f"{prefix}{name}", text)
+            row.setdefault(name, text)
+
+def map_award_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map one JSON award from the SAM.gov/FPDS APIs through the archive column aliases; nested objects are flattened"""
+
+    row: Dict[str, str] = {}
+    _flatten_record(record, row)
+    columns = {field: [alias for alias in aliases if alias in row] for field, aliases in COLUMN_ALIASES.items()}
+    return AwardWarehouseLoader._map_row(row, columns)
+
+def ensure_award_warehouse(bind) -> None:
+    """Create the warehouse tables and their indexes where missing; existing tables get the new indexes too"""
+
+    for table in (CompetitorProfile.__table__, ContractAward.__table__, AwardMonthlyCube.__table__):
+        table.create(bind=bind, checkfirst=True)
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    ensure_competitor_index(bind)
+
+class AwardWarehouseLoader:
+    """Stream award archive rows into ContractAward and CompetitorProfile, deduplicated on contract number"""
+
+    def __init__(self, db: Session, source: str = "USAspending"):
+        self.db = db
+        self.source = source
+
+        # Caches that live for one load, so each contractor is resolved against the database once
+        self._competitor_ids: Dict[str, int] = {}  # company name -> profile id
+        self._competitor_naics: Dict[int, set] = {}
+
+    def load_paths(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """Load archive files from disk"""
+
+        def records():
+            for path in paths:
+                with open(path, "rb") as stream:
+                    yield from iter_award_archive(stream, os.path.basename(path))
+
+        return self.load(records())
+
+    def load(self, records: Iterable[Tuple[str, int, Dict[str, str]]]) -> Dict[str, Any]:
+        """Map, deduplicate and upsert rows in LOAD_BATCH_SIZE batches, committing after each"""
+
+        stats = {
+            'rows_read': 0, 'rows_skipped': 0, 'duplicates_merged': 0,
+            'awards_inserted': 0, 'awards_updated': 0, 'competitors_created': 0, 'files': []
+        }
+        batch: Dict[str, Dict[str, Any]] = {}
+        current_file = None
+        columns: Dict[str, List[str]] = {}
+
+        for name, _, row in records:
+            stats['rows_read'] += 1
+            if name != current_file or not columns:
+                # Every row of a file has the same headers, so the aliases present are resolved once per file
+                current_file = name
+                columns = {field: [alias for alias in aliases if alias in row] for field, aliases in COLUMN_ALIASES.items()}
+                if name:
+                    stats['files'].append(name)
+
+            award = self._map_row(row, columns)
+            if award is None:
+                stats['rows_skipped'] += 1
+                continue
+
+            # Transaction files repeat an award once per modification: later rows carry the current
+            # values, while the award date stays the earliest seen
+            previous = batch.get(award['contract_number'])
+            if previous is not None:
+                stats['duplicates_merged'] += 1
+                award = self._merge(previous, award)
+            batch[award['contract_number']] = award
+
+            if len(batch) >= LOAD_BATCH_SIZE:
+                self._flush(batch, stats)
+                batch = {}
+
+        if batch:
+            self._flush(batch, stats)
+
+        if stats['awards_inserted'] or stats['awards_updated']:
+            invalidate_pricing_stats()
+            invalidate_market_components(('awards', 'competitors', 'teaming'))
+            invalidate_teaming_graph()
+
+        return stats
+
+    @staticmethod
+    def _map_row(row: Dict[str, str], columns: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        values = {}
+        for field, aliases in columns.items():
+            value = None
+            for alias in aliases:
+                value = row[alias].strip()
+                if value:
+                    break
+            values[field] = value or None
+
+        if not values['contract_number'] or not values['contractor_name']:
+            return None
+
+        award_date = _parse_date(values['award_date'])
+        start_date = _parse_date(values['start_date'])
+        end_date = _parse_date(values['end_date'])
+        description = values['description'] or ''
+
+        set_aside = values['set_aside']
+        if set_aside and set_aside.upper() in NO_SET_ASIDE:
+            set_aside = None
+
+        contract_type = values['contract_type']
+        if contract_type:
+            contract_type = CONTRACT_TYPES.get(contract_type.upper(), contract_type)
+
+        place = {key: values[f'pop_{key}'] for key in ('city', 'state', 'country') if values[f'pop_{key}']}
+
+        size = (values['business_size'] or '').upper()
+
+        return {
+            'contract_number': values['contract_number'],
+            'piid': values['piid'] or values['contract_number'],
+            'title': values['title'] or description[:200] or None,
+            'description': description or None,
+            'agency': values['agency'],
+            'contracting_office': values['contracting_office'],
+            'base_value': _parse_amount(values['base_value']),
+            'total_value': _parse_amount(values['total_value']),
+            'obligated_amount': _parse_amount(values['obligated_amount']),
+            'contract_type': contract_type,
+            'naics_code': values['naics_code'],
+            'psc_code': values['psc_code'],
+            'set_aside': set_aside,
+            'award_date': award_date or start_date,
+            'start_date': start_date,
+            'end_date': end_date,
+            'period_of_performance': _months_between(start_date, end_date),
+            'place_of_performance': place or None,
+            'contractor': {
+                'company_name': values['contractor_name'],
+                'duns_number': values['duns_number'],
+                'cage_code': values['cage_code'],
+                'size_standard': 'large' if 'OTHER THAN SMALL' in size else 'small' if 'SMALL' in size else None
+            }
+        }
+
+    def _merge(self, previous: Dict[str, Any], award: Dict[str, Any]) -> Dict[str, Any]:
+        merged = {**previous, **{key: value for key, value in award.items() if value is not None}}
+        dates = [d for d in (previous['award_date'], award['award_date']) if d]
+        merged['award_date'] = min(dates) if dates else None
+        return merged
+
+    def _flush(self, batch: Dict[str, Dict[str, Any]], stats: Dict[str, Any]) -> None:
+        """One contractor resolution pass and one award lookup, then bulk insert/update, cube deltas and commit"""
+
+        contractor_ids = self._resolve_competitors(batch.values(), stats)
+        now = datetime.utcnow()
+
+        existing = {
+            row.contract_number: row
+            for row in self.db.query(
+                ContractAward.contract_number, ContractAward.id, ContractAward.award_date, ContractAward.naics_code,
+                ContractAward.agency, ContractAward.set_aside, ContractAward.total_value
+            ).filter(ContractAward.contract_number.in_(list(batch))).all()
+        }
+
+        inserts = []
+        updates = []
+        deltas = CubeDeltas()
+        for contract_number, award in batch.items():
+            values = {field: award[field] for field in AWARD_FIELDS}
+            values['contractor_id'] = contractor_ids[award['contractor']['company_name']]
+            values['updated_at'] = now
+
+            previous = existing.get(contract_number)
+            if previous is not None:
+                # The newest archive wins, except that a later modification must not move the award date forward
+                if previous.award_date and (values['award_date'] is None or previous.award_date < values['award_date']):
+                    values['award_date'] = previous.award_date
+                updates.append({'id': previous.id, **values})
+                deltas.add(cube_key(previous.award_date, previous.naics_code, previous.agency, previous.set_aside), previous.total_value, -1)
+            else:
+                inserts.append({**values, 'source': self.source, 'created_at': now})
+            deltas.add(cube_key(values['award_date'], values['naics_code'], values['agency'], values['set_aside']), values['total_value'])
+
+        if inserts:
+            self.db.execute(insert(ContractAward), inserts)
+        if updates:
+            self.db.execute(update(ContractAward), updates)
+        deltas.apply(self.db)
+        self.db.commit()
+
+        stats['awards_inserted'] += len(inserts)
+        stats['awards_updated'] += len(updates)
+
+    def _resolve_competitors(self, awards: Iterable[Dict[str, Any]], stats: Dict[str, Any]) -> Dict[str, int]:
+        """Company name -> CompetitorProfile id for the batch, creating profiles and extending NAICS lists as needed"""
+
+        contractors: Dict[str, Dict[str, Any]] = {}
+        batch_naics: Dict[str, set] = {}
+        for award in awards:
+            contractor = award['contractor']
+            name = contractor['company_name']
+            known = contractors.setdefault(name, dict(contractor))
+            for key, value in contractor.items():
+                if value and not known.get(key):
+                    known[key] = value
+            if award['naics_code']:
+                batch_naics.setdefault(name, set()).add(award['naics_code'])
+
+        unresolved = [name for name in contractors if name not in self._competitor_ids]
+        if unresolved:
+            self._lookup_competitors(unresolved, contractors)
+
+        now = datetime.utcnow()
+        new_profiles = []
+        duns_owners: Dict[str, str] = {}
+        aliases: Dict[str, str] = {}
+        for name in unresolved:
+            if name in self._competitor_ids:
+                continue
+            contractor = contractors[name]
+            duns = contractor['duns_number']
+            if duns in duns_owners:
+                aliases[name] = duns_owners[duns]
+                continue
+            if duns:
+                duns_owners[duns] = name
+            new_profiles.append({
+                'company_name': name,
+                'duns_number': duns,
+                'cage_code': contractor['cage_code'],
+                'business_type': 'prime',
+                'size_standard': contractor['size_standard'],
+                'certifications': [],
+                'naics_codes': sorted(batch_naics.get(name, ())),
+                'capabilities': [],
+                'contract_vehicles': [],
+                'is_active': True,
+                'created_at': now,
+                'updated_at': now
+            })
+
+        naics_pairs = []
+        if new_profiles:
+            self.db.execute(insert(CompetitorProfile), new_profiles)
+            self._lookup_competitors([profile['company_name'] for profile in new_profiles], contractors)
+            stats['competitors_created'] += len(new_profiles)
+            naics_pairs += [
+                (self._competitor_ids[profile['company_name']], code)
+                for profile in new_profiles for code in profile['naics_codes']
+            ]
+        for name, owner in aliases.items():
+            self._competitor_ids[name] = self._competitor_ids[owner]
+
+        # Profiles already known gain any NAICS codes seen for the first time in this batch
+        naics_updates = []
+        for name, codes in batch_naics.items():
+            profile_id = self._competitor_ids[name]
+            current = self._competitor_naics.setdefault(profile_id, set())
+            if not codes <= current:
+                naics_pairs += [(profile_id, code) for code in sorted(codes - current)]
+                current |= codes
+                naics_updates.append({'id': profile_id, 'naics_codes': sorted(current), 'updated_at': now})
+        if naics_updates:
+            self.db.execute(update(CompetitorProfile), naics_updates)
+        add_competitor_naics(self.db, naics_pairs)
+
+        return {name: self._competitor_ids[name] for name in contractors}
+
+    def _lookup_competitors(self, names: List[str], contractors: Dict[str, Dict[str, Any]]) -> None:
+        # The same DUNS under a different spelling of the name is the same company
+        duns_numbers = {contractors[name]['duns_number']: name for name in names if contractors[name]['duns_number']}
+
+        rows = self.db.query(
+            CompetitorProfile.id, CompetitorProfile.company_name, CompetitorProfile.duns_number, CompetitorProfile.naics_codes
+        ).filter(
+            CompetitorProfile.company_name.in_(names) | CompetitorProfile.duns_number.in_(list(duns_numbers))
+        ).all()
+
+        for profile_id, company_name, duns_number, naics_codes in rows:
+            self._competitor_naics[profile_id] = set(naics_codes or [])
+            if company_name in contractors:
+                self._competitor_ids[company_name] = profile_id
+            if duns_number in duns_numbers and duns_numbers[duns_number] not in self._competitor_ids:
+                self._competitor_ids[duns_numbers[duns_number]] = profile_id
+
+def _benchmark() -> None:
+    """python -m services.award_warehouse: timings for loading the sample archive twice into an in-memory database"""
+
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    db = sessionmaker(bind=engine)()
+
+    start_time = time.perf_counter()
+    first = AwardWarehouseLoader(db).load_paths([FIXTURE_PATH])
+    first_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    AwardWarehouseLoader(db).load_paths([FIXTURE_PATH])
+    second_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"{first['rows_read']} rows: first load {first_ms:.1f} ms, reload {second_ms:.1f} ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from database.connection import SessionLocal
+
+        session = SessionLocal()
+        try:
+            ensure_award_warehouse(session.get_bind())
+            print(AwardWarehouseLoader(session).load_paths(sys.argv[1:]))
+        finally:
+            session.close()
+    else:
+        _benchmark()
@@ -0,0 +1,184 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Packed Cash Flow Projections
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import numpy as np
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from sqlalchemy import func, and_, or_, inspect
+from sqlalchemy.orm import Session
+
+from database.connection import add_missing_columns
+from models.financial import CashFlowProjection
+from services.finance_math import npv, irr
+
+PROJECTION_MONTHS = 24
+MONTH_DTYPE = np.dtype("<f8")  # Little-endian float64, fixed so blobs read the same on any host
+DEFAULT_ANNUAL_DISCOUNT_RATE = 0.10
+BACKFILL_BATCH_SIZE = 500
+
+def pack_months(values: Iterable[float]) -> bytes:
+    """Zero-padded PROJECTION_MONTHS float vector as bytes; months past the horizon are dropped"""
+
+    array = np.zeros(PROJECTION_MONTHS, dtype=MONTH_DTYPE)
+    values = np.asarray(list(values), dtype=float)[:PROJECTION_MONTHS]
+    array[:len(values)] = values
+    return array.tobytes()
+
+def unpack_months(blob: Optional[bytes]) -> np.ndarray:
+    array = np.zeros(PROJECTION_MONTHS)
+    if blob:
+        values = np.frombuffer(blob, dtype=MONTH_DTYPE)[:PROJECTION_MONTHS]
+        array[:len(values)] = values
+    return array
+
+def projection_columns(inflows: Iterable[float], outflows: Iterable[float]) -> Dict[str, Any]:
+    """CashFlowProjection column values for month-by-month inflows and outflows"""
+
+    inflows = np.asarray(list(inflows), dtype=float)[:PROJECTION_MONTHS]
+    outflows = np.asarray(list(outflows), dtype=float)[:PROJECTION_MONTHS]
+    cumulative = np.cumsum(inflows - outflows)
+
+    return {
+        'horizon_months': len(inflows),
+        'inflows': pack_months(inflows),
+        'outflows': pack_months(outflows),
+        'cumulative_cash_flow': cumulative.tolist(),
+        'peak_cash_requirement': float(cumulative.min()) if cumulative.size else 0.0
+    }
+
+def projection_arrays(cash_flow: CashFlowProjection) -> Tuple[np.ndarray, np.ndarray]:
+    """Inflow and outflow month vectors; rows written before the packed format are read from the month columns"""
+
+    if cash_flow.inflows is not None and cash_flow.outflows is not None:
+        return unpack_months(cash_flow.inflows), unpack_months(cash_flow.outflows)
+
+    inflows = np.zeros(PROJECTION_MONTHS)
+    outflows = np.zeros(PROJECTION_MONTHS)
+    for month in range(1, 7):
+        inflows[month - 1] = getattr(cash_flow, f'month_{month}_inflow') or 0.0
+        outflows[month - 1] = getattr(cash_flow, f'month_{month}_outflow') or 0.0
+
+    for offset, projection in enumerate(cash_flow.extended_projections or []):
+        month = int(projection.get('month') or offset + 7)
+        if 1 <= month <= PROJECTION_MONTHS:
+            inflows[month - 1] = projection.get('inflow') or 0.0
+            outflows[month - 1] = projection.get('outflow') or 0.0
+
+    return inflows, outflows
+
+def projection_horizon(cash_flow: CashFlowProjection) -> int:
+    if cash_flow.horizon_months:
+        return cash_flow.horizon_months
+    return min(6 + len(cash_flow.extended_projections or []), PROJECTION_MONTHS)
+
+def ensure_cash_flow_projections(bind) -> int:
+    """Add the packed month columns to an existing cash_flow_projections table and pack legacy rows into them
+
+    Rows are read through projection_arrays(), so the month_N columns and extended_projections JSON
+    are left in place. Returns the number of rows packed.
+    """
+
+    add_missing_columns(bind, CashFlowProjection.__table__)
+    if not inspect(bind).has_table(CashFlowProjection.__tablename__):
+        return 0
+
+    packed = 0
+    with Session(bind=bind) as session:
+        while True:
+            legacy = session.query(CashFlowProjection).filter(
+                or_(CashFlowProjection.inflows.is_(None), CashFlowProjection.outflows.is_(None))
+            ).order_by(CashFlowProjection.id).limit(BACKFILL_BATCH_SIZE).all()
+            if not legacy:
+                return packed
+
+            for cash_flow in legacy:
+                inflows, outflows = projection_arrays(cash_flow)
+                cash_flow.horizon_months = projection_horizon(cash_flow)
+                cash_flow.inflows = pack_months(inflows)
+                cash_flow.outflows = pack_months(outflows)
+            session.commit()
+            packed += len(legacy)
+
+def monthly_breakdown(cash_flow: CashFlowProjection) -> List[Dict[str, Any]]:
+    """Per-month inflow, outflow, net and cumulative rows up to the projection horizon"""
+
+    inflows, outflows = projection_arrays(cash_flow)
+    months = projection_horizon(cash_flow)
+    net = inflows[:months] - outflows[:months]
+    cumulative = np.cumsum(net)
+
+    return [
+        {
+            'month': month + 1,
+            'inflow': float(inflows[month]),
+            'outflow': float(outflows[month]),
+            'net_flow': float(net[month]),
+            'cumulative': float(cumulative[month])
+        }
+        for month in range(months)
+    ]
+
+def load_latest_projections(db: Session, project_ids: List[int]) -> List[CashFlowProjection]:
+    """Most recent projection per project, in one query"""
+
+    if not project_ids:
+        return []
+
+    ranked = db.query(
+        CashFlowProjection.id.label("projection_id"),
+        func.row_number().over(
+            partition_by=CashFlowProjection.project_id,
+            order_by=(CashFlowProjection.created_at.desc(), CashFlowProjection.id.desc())
+        ).label("projection_rank")
+    ).filter(
+        CashFlowProjection.project_id.in_(project_ids)
+    ).subquery()
+
+    return db.query(CashFlowProjection).join(
+        ranked,
+        and_(ranked.c.projection_id == CashFlowProjection.id, ranked.c.projection_rank == 1)
+    ).order_by(CashFlowProjection.project_id).all()
+
+class CashFlowMatrix:
+    """Projects x months inflow/outflow matrices so portfolio metrics reduce over every project at once"""
+
+    def __init__(self, projections: Iterable[CashFlowProjection]):
+        projections = list(projections)
+        self.project_ids = [cash_flow.project_id for cash_flow in projections]
+
+        self.inflows = np.zeros((len(projections), PROJECTION_MONTHS))
+        self.outflows = np.zeros((len(projections), PROJECTION_MONTHS))
+        for row, cash_flow in enumerate(projections):
+            self.inflows[row], self.outflows[row] = projection_arrays(cash_flow)
+
+        self.net = self.inflows - self.outflows
+
+    def net_total(self, months: int) -> float:
+        """Net cash flow across the portfolio over the first `months` months"""
+
+        return float(self.net[:, :months].sum())
+
+    def monthly_totals(self, months: int = PROJECTION_MONTHS) -> Tuple[np.ndarray, np.ndarray]:
+        """Portfolio inflow and outflow per month"""
+
+        return self.inflows[:, :months].sum(axis=0), self.outflows[:, :months].sum(axis=0)
+
+    def peak_requirements(self) -> np.ndarray:
+        """Lowest cumulative position per project (zero when a project never goes negative)"""
+
+        if not self.project_ids:
+            return np.zeros(0)
+        return np.minimum(np.cumsum(self.net, axis=1).min(axis=1), 0.0)
+
+    def npv(self, annual_rate: float = DEFAULT_ANNUAL_DISCOUNT_RATE) -> np.ndarray:
+        """Net present value per project, with month 1 undiscounted"""
+
+        return npv(annual_rate / 12, self.net)
+
+    def irr(self) -> np.ndarray:
+        """Monthly internal rate of return per project (NaN where undefined)"""
+
+        return irr(self.net)
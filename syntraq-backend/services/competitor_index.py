@@ -0,0 +1,114 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Competitor NAICS / Certification / Vehicle Index
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from typing import Dict, List, Any, Iterable, Tuple
+from sqlalchemy import insert, delete, select
+from sqlalchemy.orm import Session
+
+from models.market_research import CompetitorProfile, CompetitorNaics, CompetitorCertification, CompetitorVehicle
+
+REBUILD_BATCH_SIZE = 5000
+
+# CompetitorProfile JSON list column -> (association model, value column name)
+INDEXED_LISTS = {
+    'naics_codes': (CompetitorNaics, 'naics_code'),
+    'certifications': (CompetitorCertification, 'certification'),
+    'contract_vehicles': (CompetitorVehicle, 'contract_vehicle'),
+}
+
+def _clean_values(values: Any) -> List[str]:
+    """Distinct non-empty strings in list order; profiles written by hand can hold duplicates or blanks"""
+
+    cleaned = []
+    for value in values or []:
+        text = str(value).strip() if value is not None else ''
+        if text and text not in cleaned:
+            cleaned.append(text)
+    return cleaned
+
+def ensure_competitor_index(bind) -> None:
+    """Create the association tables, and competitor_profiles they reference, where missing"""
+
+    for model in (CompetitorProfile, *(model for model, _ in INDEXED_LISTS.values())):
+        model.__table__.create(bind=bind, checkfirst=True)
+
+def add_competitor_naics(db: Session, pairs: Iterable[Tuple[int, str]]) -> None:
+    """Index new (competitor_id, naics_code) pairs; callers pass only pairs not yet indexed and commit"""
+
+    rows = [{'competitor_id': competitor_id, 'naics_code': code} for competitor_id, code in dict.fromkeys(pairs)]
+    if rows:
+        db.execute(insert(CompetitorNaics), rows)
+
+class CompetitorIndexService:
+    """Keeps the NAICS, certification and contract vehicle association tables in step with competitor profiles"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sync_competitor(self, competitor: CompetitorProfile) -> None:
+        """Rewrite the competitor's association rows from its JSON lists; caller commits"""
+
+        for attribute, (model, column) in INDEXED_LISTS.items():
+            self.db.execute(delete(model).where(model.competitor_id == competitor.id))
+            rows = [{'competitor_id': competitor.id, column: value} for value in _clean_values(getattr(competitor, attribute))]
+            if rows:
+                self.db.execute(insert(model), rows)
+
+    def rebuild(self) -> Dict[str, int]:
+        """Backfill all three tables from every competitor profile, streaming profiles in batches"""
+
+        for model, _ in INDEXED_LISTS.values():
+            self.db.execute(delete(model))
+
+        counts = {'competitors': 0, **{model.__tablename__: 0 for model, _ in INDEXED_LISTS.values()}}
+        pending: Dict[str, List[Dict[str, Any]]] = {attribute: [] for attribute in INDEXED_LISTS}
+
+        def flush() -> None:
+            for attribute, rows in pending.items():
+                if rows:
+                    self.db.execute(insert(INDEXED_LISTS[attribute][0]), rows)
+                    rows.clear()
+
+        result = self.db.execute(
+            select(CompetitorProfile.id, *[getattr(CompetitorProfile, attribute) for attribute in INDEXED_LISTS])
+            .execution_options(yield_per=REBUILD_BATCH_SIZE)
+        )
+        for competitor_id, *lists in result:
+            counts['competitors'] += 1
+            for (attribute, (model, column)), values in zip(INDEXED_LISTS.items(), lists):
+                rows = [{'competitor_id': competitor_id, column: value} for value in _clean_values(values)]
+                pending[attribute].extend(rows)
+                counts[model.__tablename__] += len(rows)
+            if sum(len(rows) for rows in pending.values()) >= REBUILD_BATCH_SIZE:
+                flush()
+
+        flush()
+        self.db.commit()
+        return counts
+
+def backfill_competitor_index(bind) -> int:
+    """Build the index when profiles exist but none are indexed, as in databases that predate it
+
+    Returns the number of competitors indexed; 0 when the index was already populated.
+    """
+
+    with Session(bind=bind) as db:
+        indexed = any(db.query(model.competitor_id).first() is not None for model, _ in INDEXED_LISTS.values())
+        if indexed or db.query(CompetitorProfile.id).first() is None:
+            return 0
+        return CompetitorIndexService(db).rebuild()['competitors']
+
+if __name__ == "__main__":
+    # Full rebuild: create the association tables and refill them from every profile
+    from database.connection import SessionLocal
+
+    session = SessionLocal()
+    try:
+        ensure_competitor_index(session.get_bind())
+        print(CompetitorIndexService(session).rebuild())
+    finally:
+        session.close()
@@ -0,0 +1,224 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Competitor Feature Matrix & Strength Scoring
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import re
+import numpy as np
+from typing import Dict, List, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.market_research import CompetitorProfile, CompetitorNaics
+
+DEFAULT_TOP_COMPETITORS = 10  # key_competitors in a stored analysis
+FETCH_SIZE = 5000
+
+# Bit positions of the state bitmask; full names are accepted wherever a code is
+US_STATES = {
+    'AL': 'ALABAMA', 'AK': 'ALASKA', 'AZ': 'ARIZONA', 'AR': 'ARKANSAS', 'CA': 'CALIFORNIA', 'CO': 'COLORADO',
+    'CT': 'CONNECTICUT', 'DE': 'DELAWARE', 'DC': 'DISTRICT OF COLUMBIA', 'FL': 'FLORIDA', 'GA': 'GEORGIA',
+    'HI': 'HAWAII', 'ID': 'IDAHO', 'IL': 'ILLINOIS', 'IN': 'INDIANA', 'IA': 'IOWA', 'KS': 'KANSAS',
+    'KY': 'KENTUCKY', 'LA': 'LOUISIANA', 'ME': 'MAINE', 'MD': 'MARYLAND', 'MA': 'MASSACHUSETTS',
+    'MI': 'MICHIGAN', 'MN': 'MINNESOTA', 'MS': 'MISSISSIPPI', 'MO': 'MISSOURI', 'MT': 'MONTANA',
+    'NE': 'NEBRASKA', 'NV': 'NEVADA', 'NH': 'NEW HAMPSHIRE', 'NJ': 'NEW JERSEY', 'NM': 'NEW MEXICO',
+    'NY': 'NEW YORK', 'NC': 'NORTH CAROLINA', 'ND': 'NORTH DAKOTA', 'OH': 'OHIO', 'OK': 'OKLAHOMA',
+    'OR': 'OREGON', 'PA': 'PENNSYLVANIA', 'RI': 'RHODE ISLAND', 'SC': 'SOUTH CAROLINA', 'SD': 'SOUTH DAKOTA',
+    'TN': 'TENNESSEE', 'TX': 'TEXAS', 'UT': 'UTAH', 'VT': 'VERMONT', 'VA': 'VIRGINIA', 'WA': 'WASHINGTON',
+    'WV': 'WEST VIRGINIA', 'WI': 'WISCONSIN', 'WY': 'WYOMING', 'PR': 'PUERTO RICO', 'GU': 'GUAM',
+    'VI': 'VIRGIN ISLANDS'
+}
+STATE_BITS = {code: bit for bit, code in enumerate(US_STATES)}
+_STATE_NAMES = sorted(((name, code) for code, name in US_STATES.items()), key=lambda item: -len(item[0]))
+_STATE_CODE = re.compile(r"(?:^|,)\s*([A-Z]{2})\b")  # "VA", "Arlington, VA 22202"; a bare "IN" or "OR" in prose is not a state
+
+def state_code(text: Optional[str]) -> Optional[str]:
+    """First US state named in free text such as "Arlington, VA 22202" or "West Virginia" """
+
+    if not text:
+        return None
+    upper = str(text).upper()
+    # Codes first, so "Washington, DC" is not read as the state of Washington
+    for candidate in _STATE_CODE.findall(upper):
+        if candidate in STATE_BITS:
+            return candidate
+    # Longest names first, so "WEST VIRGINIA" is not read as "VIRGINIA"
+    for name, code in _STATE_NAMES:
+        if name in upper:
+            return code
+    return None
+
+class CompetitorFeatureMatrix:
+    """Scoring features of every competitor in one NAICS, one row per competitor
+
+    The opportunity-independent part of the strength score (past performance, contract vehicles,
+    revenue band) is summed once when the matrix is built; scoring an opportunity only adds the
+    set-aside, size and location terms.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]], performance_states: Optional[List[Any]] = None):
+        self.profiles = profiles
+        count = len(profiles)
+        performance_states = performance_states or [None] * count
+
+        self.ids = np.array([profile['id'] for profile in profiles], dtype=np.int64)
+        self.rating = np.array([profile['past_performance_rating'] or 0.0 for profile in profiles], dtype=float)
+        self.vehicle_count = np.array([len(profile['contract_vehicles']) for profile in profiles], dtype=np.int16)
+        self.small = np.array([profile['size_standard'] == 'small' for profile in profiles], dtype=bool)
+        self.large = np.array([profile['size_standard'] == 'large' for profile in profiles], dtype=bool)
+
+        revenue = np.array([profile['annual_revenue'] or 0.0 for profile in profiles], dtype=float)
+        self.revenue_band = np.select([revenue > 50000000, revenue > 10000000], [2, 1], 0).astype(np.int8)
+
+        # Certification bitmask: bit j of row i is set when competitor i holds certification j
+        self.cert_index: Dict[str, int] = {}
+        holders = []
+        for row, profile in enumerate(profiles):
+            for certification in profile['certifications']:
+                holders.append((row, self.cert_index.setdefault(certification, len(self.cert_index))))
+        flags = np.zeros((count, max(len(self.cert_index), 1)), dtype=bool)
+        if holders:
+            rows, bits = zip(*holders)
+            flags[list(rows), list(bits)] = True
+        self.cert_bits = np.packbits(flags, axis=1, bitorder='little')
+
+        self.state_mask = np.zeros(count, dtype=np.uint64)
+        for row, states in enumerate(performance_states):
+            mask = 0
+            for state in states or []:
+                code = state_code(state)
+                if code:
+                    mask |= 1 << STATE_BITS[code]
+            self.state_mask[row] = mask
+
+        # 3 is an average past performance rating; unrated competitors get no adjustment
+        self.base_score = (
+            50.0
+            + np.where(self.rating != 0, (self.rating - 3) * 10, 0.0)
+            + self.vehicle_count * 5.0
+            + np.choose(self.revenue_band, [0.0, 5.0, 10.0])
+        )
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    @property
+    def small_count(self) -> int:
+        return int(self.small.sum())
+
+    @property
+    def large_count(self) -> int:
+        return int(self.large.sum())
+
+    def holds_certification(self, certification: str) -> np.ndarray:
+        bit = self.cert_index.get(certification)
+        if bit is None:
+            return np.zeros(len(self), dtype=bool)
+        return (self.cert_bits[:, bit >> 3] >> (bit & 7)) & 1 == 1
+
+    def score(self, set_aside: Optional[str] = None, place_of_performance: Optional[str] = None) -> np.ndarray:
+        """Strength score (0-100) of every competitor for an opportunity"""
+
+        score = self.base_score.copy()
+        if set_aside:
+            score += 20.0 * self.holds_certification(set_aside)
+            score += 15.0 * self.small
+
+        state = state_code(place_of_performance)
+        if state:
+            performs_there = (self.state_mask >> np.uint64(STATE_BITS[state])) & np.uint64(1)
+            score += 5.0 * performs_there
+
+        return np.minimum(score, 100.0)
+
+    def rank(self, set_aside: Optional[str] = None, place_of_performance: Optional[str] = None, limit: int = DEFAULT_TOP_COMPETITORS) -> List[Dict[str, Any]]:
+        """Top competitors by strength score; ties go to the older profile"""
+
+        if not len(self):
+            return []
+
+        scores = self.score(set_aside, place_of_performance)
+        order = np.lexsort((self.ids, -scores))[:limit]
+
+        return [{**self.profiles[row], 'strength_score': float(scores[row])} for row in order]
+
+class CompetitorScoringService:
+    """Loads competitor feature matrices"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_matrix(self, naics_code: Optional[str]) -> CompetitorFeatureMatrix:
+        """Every active competitor indexed under the NAICS"""
+
+        result = self.db.execute(
+            select(
+                CompetitorProfile.id, CompetitorProfile.company_name, CompetitorProfile.size_standard,
+                CompetitorProfile.certifications, CompetitorProfile.capabilities, CompetitorProfile.past_performance_rating,
+                CompetitorProfile.contract_vehicles, CompetitorProfile.locations, CompetitorProfile.annual_revenue,
+                CompetitorProfile.performance_states
+            ).join(
+                CompetitorNaics, CompetitorNaics.competitor_id == CompetitorProfile.id
+            ).where(
+                CompetitorNaics.naics_code == naics_code,
+                CompetitorProfile.is_active == True
+            ).execution_options(yield_per=FETCH_SIZE)
+        )
+
+        profiles = []
+        performance_states = []
+        for row in result:
+            profiles.append({
+                'id': row.id,
+                'company_name': row.company_name,
+                'size_standard': row.size_standard,
+                'certifications': row.certifications or [],
+                'capabilities': row.capabilities or [],
+                'past_performance_rating': row.past_performance_rating,
+                'contract_vehicles': row.contract_vehicles or [],
+                'locations': row.locations or [],
+                'annual_revenue': row.annual_revenue
+            })
+            performance_states.append(row.performance_states)
+
+        return CompetitorFeatureMatrix(profiles, performance_states)
+
+def _benchmark(competitors: int = 20000, seed: int = 5) -> None:
+    """python -m services.competitor_scoring: matrix build and score + rank timings (correctness is in tests/test_competitor_scoring.py)"""
+
+    import random
+    import time
+
+    rng = random.Random(seed)
+    certifications = ["8(a)", "HUBZone", "WOSB", "SDVOSB", "Small Business"]
+    states = ["VA", "Maryland", "DC", "TX", "West Virginia", "CA"]
+    profiles = [
+        {
+            'id': i,
+            'company_name': f"Company {i}",
+            'size_standard': rng.choice(["small", "large", None]),
+            'certifications': rng.sample(certifications, rng.randrange(3)),
+            'capabilities': [],
+            'past_performance_rating': rng.choice([None, 1.0, 2.5, 3.0, 4.2, 5.0]),
+            'contract_vehicles': ["GSA MAS"] * rng.randrange(6),
+            'locations': [],
+            'annual_revenue': rng.choice([None, 5e6, 2e7, 9e7])
+        }
+        for i in range(competitors)
+    ]
+    performance_states = [rng.sample(states, rng.randrange(3)) for _ in profiles]
+
+    start_time = time.perf_counter()
+    matrix = CompetitorFeatureMatrix(profiles, performance_states)
+    build_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    matrix.rank("HUBZone", "Austin, TX", limit=25)
+    rank_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"{competitors} competitors: matrix build {build_ms:.0f} ms, score + rank top 25 {rank_ms:.2f} ms")
+
+if __name__ == "__main__":
+    _benchmark()
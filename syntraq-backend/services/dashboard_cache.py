@@ -0,0 +1,103 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Financial Dashboard Snapshots
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import asyncio
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+from datetime import datetime, timedelta
+
+from services.ai_usage import record_usage
+
+SNAPSHOT_MAX_AGE = timedelta(minutes=10)  # Burn rate and runway use rolling windows, so snapshots also expire
+INSIGHTS_MAX_AGE = timedelta(hours=6)
+INSIGHTS_MODEL = "gpt-4o-mini"  # Model of the insight runs, recorded against reused insights
+
+# (dashboard kind, company_id) -> {"computed_at", "dashboard"}; dropped on project, budget, expense,
+# invoice, alert or company financials writes
+_snapshots: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+# company_id -> {"generated_at", "insights", "portfolio_data"}; kept across invalidations and served
+# until a background refresh replaces them
+_insights: Dict[int, Dict[str, Any]] = {}
+_insight_tasks: Dict[int, "asyncio.Task"] = {}
+
+_lock = threading.Lock()
+
+def invalidate_financial_dashboards(company_id: int) -> None:
+    with _lock:
+        for kind in ("financial", "treasury"):
+            _snapshots.pop((kind, company_id), None)
+
+def get_dashboard_snapshot(kind: str, company_id: int) -> Optional[Dict[str, Any]]:
+    with _lock:
+        snapshot = _snapshots.get((kind, company_id))
+    if snapshot is None or datetime.utcnow() - snapshot["computed_at"] > SNAPSHOT_MAX_AGE:
+        return None
+    return snapshot
+
+def store_dashboard_snapshot(kind: str, company_id: int, dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = {"computed_at": datetime.utcnow(), "dashboard": dashboard}
+    with _lock:
+        _snapshots[(kind, company_id)] = snapshot
+    return snapshot
+
+def get_ai_insights(company_id: int) -> Optional[Dict[str, Any]]:
+    with _lock:
+        return _insights.get(company_id)
+
+def insights_refreshing(company_id: int) -> bool:
+    with _lock:
+        return company_id in _insight_tasks
+
+def schedule_insights_refresh(
+    company_id: int,
+    portfolio_data: Dict[str, Any],
+    generate: Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+) -> bool:
+    """Start a background insight run unless one is in flight or the last run already covers this portfolio"""
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    with _lock:
+        if company_id in _insight_tasks:
+            return False
+
+        current = _insights.get(company_id)
+        covered = (current is not None and current["portfolio_data"] == portfolio_data
+                   and datetime.utcnow() - current["generated_at"] <= INSIGHTS_MAX_AGE)
+        if not covered:
+            _insight_tasks[company_id] = loop.create_task(_refresh_insights(company_id, portfolio_data, generate))
+
+    if covered:
+        # The stored insights stand in for an LLM call; the ledger counts them as cache hits
+        record_usage(getattr(generate, "__qualname__", "generate_insights"), INSIGHTS_MODEL, 0.0, cache_hit=True)
+        return False
+
+    return True
+
+async def _refresh_insights(
+    company_id: int,
+    portfolio_data: Dict[str, Any],
+    generate: Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+) -> None:
+    try:
+        insights = await generate(portfolio_data)
+        with _lock:
+            _insights[company_id] = {
+                "generated_at": datetime.utcnow(),
+                "insights": insights,
+                "portfolio_data": portfolio_data
+            }
+    except Exception as e:
+        # Keep serving the previous insights; the next dashboard rebuild retries
+        print(f"AI insight refresh failed for company {company_id}: {e}")
+    finally:
+        with _lock:
+            _insight_tasks.pop(company_id, None)
@@ -0,0 +1,204 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Shared Federal API Client
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+import random
+from typing import Dict, Any, Callable, Optional, Tuple
+from datetime import datetime
+from urllib.parse import urlencode
+import httpx
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+from models.market_research import FederalAPIResponse
+
+# HTTP/2 needs the h2 package (httpx[http2]); without it the pool falls back to HTTP/1.1 keep-alive
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+HOST_CONCURRENCY = int(os.getenv("FEDERAL_API_HOST_CONCURRENCY", "4"))  # In-flight requests per host; SAM.gov rate limits per key
+
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Each request earns RETRY_BUDGET_RATIO of a retry, up to RETRY_BUDGET_MAX banked, so an outage
+# costs at most ~20% extra traffic instead of RETRY_ATTEMPTS times every request
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MAX = 10.0
+
+SECRET_PARAMS = ("api_key",)
+
+# One client, host limiters and retry budgets per event loop; replaced when the loop changes
+_state: Dict[str, Any] = {"loop": None, "client": None, "limiters": {}, "budgets": {}}
+
+def ensure_response_store(bind) -> None:
+    FederalAPIResponse.__table__.create(bind=bind, checkfirst=True)
+
+def get_http_client() -> httpx.AsyncClient:
+    """The pooled client for the running event loop, created on first use"""
+
+    loop = asyncio.get_running_loop()
+    if _state["client"] is None or _state["loop"] is not loop:
+        _state.update(
+            loop=loop,
+            client=httpx.AsyncClient(
+                http2=HTTP2_ENABLED,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+            ),
+            limiters={},
+            budgets={}
+        )
+    return _state["client"]
+
+async def close_http_client() -> None:
+    """Close the pooled client; called on app shutdown"""
+
+    client = _state["client"]
+    _state.update(loop=None, client=None, limiters={}, budgets={})
+    if client is not None:
+        await client.aclose()
+
+class _RetryBudget:
+    def __init__(self):
+        self.tokens = RETRY_BUDGET_MAX
+
+    def deposit(self) -> None:
+        self.tokens = min(RETRY_BUDGET_MAX, self.tokens + RETRY_BUDGET_RATIO)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Retry-After when the server gives one in seconds, else full-jitter exponential backoff"""
+
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+async def request_with_retry(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> httpx.Response:
+    """Send a request under the host's concurrency cap, retrying transport errors and 429/5xx within the retry budget
+
+    The last response is returned even when its status is retryable; callers raise_for_status.
+    """
+
+    client = get_http_client()
+    host = httpx.URL(url).host
+    limiter = _state["limiters"].setdefault(host, asyncio.Semaphore(HOST_CONCURRENCY))
+    budget = _state["budgets"].setdefault(host, _RetryBudget())
+    budget.deposit()
+
+    for attempt in range(RETRY_ATTEMPTS):
+        response, error = None, None
+        try:
+            # The slot is held for the request only, not for the backoff sleep
+            async with limiter:
+                response = await client.request(method, url, params=params, headers=headers)
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+        except httpx.TransportError as e:
+            error = e
+
+        if attempt == RETRY_ATTEMPTS - 1 or not budget.withdraw():
+            break
+        await asyncio.sleep(_backoff(attempt, response))
+
+    if error is not None:
+        raise error
+    return response
+
+def response_key(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """(store key, display URL) for a request, leaving credentials out of both"""
+
+    query = sorted((key, str(value)) for key, value in (params or {}).items() if key not in SECRET_PARAMS and value is not None)
+    display_url = f"{url}?{urlencode(query)}" if query else url
+    return hashlib.sha256(display_url.encode()).hexdigest(), display_url
+
+class ResponseStore:
+    """Stored bodies and validators of federal API responses, one row per request
+
+    Each read and write uses its own short-lived session, so storing a page never commits the
+    caller's session while other pages of the same analysis are still being fetched.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def get(self, cache_key: str) -> Optional[FederalAPIResponse]:
+        """The stored row, detached from its session"""
+
+        with self.session_factory() as db:
+            return db.query(FederalAPIResponse).filter(FederalAPIResponse.cache_key == cache_key).first()
+
+    def put(self, cache_key: str, url: str, response: httpx.Response, body: Any) -> None:
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            stored = db.query(FederalAPIResponse).filter(FederalAPIResponse.cache_key == cache_key).first()
+            if stored is None:
+                stored = FederalAPIResponse(cache_key=cache_key, url=url)
+                db.add(stored)
+            stored.etag = response.headers.get("ETag")
+            stored.last_modified = response.headers.get("Last-Modified")
+            stored.body = body
+            stored.fetched_at = now
+            stored.revalidated_at = now
+            db.commit()
+
+    def revalidated(self, stored: FederalAPIResponse) -> None:
+        with self.session_factory() as db:
+            db.execute(update(FederalAPIResponse).where(FederalAPIResponse.cache_key == stored.cache_key).values(revalidated_at=datetime.utcnow()))
+            db.commit()
+
+async def fetch_json(url: str, params: Optional[Dict[str, Any]] = None, store: Optional[ResponseStore] = None) -> Any:
+    """GET a JSON body, revalidating a stored copy with If-None-Match/If-Modified-Since
+
+    A 304 answers from the store. When the API fails after retries, the stored body is served
+    instead of raising.
+    """
+
+    cache_key, display_url = response_key(url, params)
+    stored = store.get(cache_key) if store else None
+
+    headers = {}
+    if stored is not None:
+        if stored.etag:
+            headers["If-None-Match"] = stored.etag
+        if stored.last_modified:
+            headers["If-Modified-Since"] = stored.last_modified
+
+    try:
+        response = await request_with_retry("GET", url, params=params, headers=headers)
+        if response.status_code == 304 and stored is not None:
+            store.revalidated(stored)
+            return stored.body
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        if stored is None:
+            raise
+        print(f"Serving stored response for {display_url}: {e}")
+        return stored.body
+
+    body = response.json()
+    if store is not None and ("ETag" in response.headers or "Last-Modified" in response.headers or stored is not None):
+        store.put(cache_key, display_url, response, body)
+    return body
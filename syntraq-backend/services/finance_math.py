@@ -0,0 +1,165 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Numeric Finance (NPV / IRR)
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import numpy as np
+from typing import Union
+
+ArrayLike = Union[float, np.ndarray, list]
+
+IRR_TOLERANCE = 1e-10
+NEWTON_MAX_ITERATIONS = 50
+BISECTION_MAX_ITERATIONS = 200
+IRR_LOWER_BOUND = -0.99  # Per-period rate; (1 + r) must stay positive
+IRR_UPPER_BOUND = 1e4
+
+# Candidate rates scanned for a sign change when Newton fails: dense near zero, geometric above
+_BRACKET_GRID = np.concatenate([
+    np.linspace(IRR_LOWER_BOUND, -0.01, 99),
+    [0.0],
+    np.geomspace(1e-3, IRR_UPPER_BOUND, 140)
+])
+
+def discount_factors(rate: ArrayLike, periods: int) -> np.ndarray:
+    """(1 + rate) ** -t for t = 0..periods-1; one row per rate when rate is an array"""
+
+    rate = np.asarray(rate, dtype=float)
+    exponents = -np.arange(periods, dtype=float)
+    if rate.ndim == 0:
+        return (1 + rate) ** exponents
+    return (1 + rate[:, None]) ** exponents[None, :]
+
+def npv(rate: ArrayLike, flows: ArrayLike) -> Union[float, np.ndarray]:
+    """Net present value with the first period undiscounted
+
+    flows is one series or a 2-D array with one series per row; rate is a scalar or one rate per row.
+    """
+
+    flows = np.asarray(flows, dtype=float)
+    factors = discount_factors(rate, flows.shape[-1])
+
+    if flows.ndim == 1:
+        return float(flows @ factors) if factors.ndim == 1 else factors @ flows
+    if factors.ndim == 1:
+        return flows @ factors
+    return (flows * factors).sum(axis=1)
+
+def _npv_and_derivative(rates: np.ndarray, flows: np.ndarray):
+    periods = np.arange(flows.shape[1], dtype=float)
+    factors = (1 + rates[:, None]) ** -periods[None, :]
+    value = (flows * factors).sum(axis=1)
+    derivative = -(flows * periods[None, :] * factors / (1 + rates[:, None])).sum(axis=1)
+    return value, derivative
+
+def irr(flows: ArrayLike, guess: float = 0.01) -> Union[float, np.ndarray]:
+    """Per-period internal rate of return, NaN where the series has no sign change or no root in range
+
+    Newton's method runs on every series at once; series where it diverges, leaves the valid
+    range or stalls are solved by bisection on a bracketed root instead.
+    """
+
+    flows = np.asarray(flows, dtype=float)
+    single = flows.ndim == 1
+    flows = np.atleast_2d(flows)
+    count = flows.shape[0]
+
+    result = np.full(count, np.nan)
+    solvable = (flows > 0).any(axis=1) & (flows < 0).any(axis=1)
+    if not solvable.any():
+        return float(result[0]) if single else result
+
+    rows = np.nonzero(solvable)[0]
+    rates = np.full(len(rows), guess, dtype=float)
+    active = np.ones(len(rows), dtype=bool)
+    converged = np.zeros(len(rows), dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(NEWTON_MAX_ITERATIONS):
+            if not active.any():
+                break
+            value, derivative = _npv_and_derivative(rates[active], flows[rows[active]])
+            step = value / derivative
+            updated = rates[active] - step
+
+            valid = np.isfinite(updated) & (updated > IRR_LOWER_BOUND) & (derivative != 0)
+            done = valid & (np.abs(step) <= IRR_TOLERANCE * np.maximum(1.0, np.abs(updated)))
+
+            indices = np.nonzero(active)[0]
+            rates[indices[valid]] = updated[valid]
+            converged[indices[done]] = True
+            active[indices[done | ~valid]] = False
+
+    result[rows[converged]] = rates[converged]
+
+    fallback = rows[~converged]
+    if fallback.size:
+        result[fallback] = _bisect(flows[fallback])
+
+    return float(result[0]) if single else result
+
+def _bisect(flows: np.ndarray) -> np.ndarray:
+    """Bisection inside the sign change nearest a 0% rate, found by scanning a rate grid"""
+
+    count = flows.shape[0]
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        # A series can have an even number of roots, so the endpoints alone may never bracket one
+        values = flows @ discount_factors(_BRACKET_GRID, flows.shape[1]).T
+        signs = np.sign(values)
+        changes = (signs[:, :-1] != signs[:, 1:]) & np.isfinite(values[:, :-1]) & np.isfinite(values[:, 1:])
+        distance = np.where(changes, np.abs(_BRACKET_GRID[:-1] + _BRACKET_GRID[1:])[None, :], np.inf)
+        interval = distance.argmin(axis=1)
+        bracketed = changes.any(axis=1)
+
+        low = _BRACKET_GRID[interval]
+        high = _BRACKET_GRID[interval + 1]
+        low_value = values[np.arange(count), interval]
+
+        for _ in range(BISECTION_MAX_ITERATIONS):
+            middle = (low + high) / 2
+            middle_value = npv(middle, flows)
+            same_side = np.sign(middle_value) == np.sign(low_value)
+            low = np.where(same_side, middle, low)
+            low_value = np.where(same_side, middle_value, low_value)
+            high = np.where(same_side, high, middle)
+            if np.all(high - low <= IRR_TOLERANCE * np.maximum(1.0, np.abs(low))):
+                break
+
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+def annualize_rate(rate: ArrayLike, periods_per_year: int = 12) -> Union[float, np.ndarray]:
+    """Effective annual rate from a per-period rate"""
+
+    annual = (1 + np.asarray(rate, dtype=float)) ** periods_per_year - 1
+    return float(annual) if annual.ndim == 0 else annual
+
+def _benchmark(series_count: int = 10000, periods: int = 24, seed: int = 17) -> None:
+    """python -m services.finance_math: batched NPV/IRR timings (correctness is covered by tests/test_finance_math.py)"""
+
+    import time
+
+    rng = np.random.default_rng(seed)
+    flows = rng.uniform(-50000, 80000, (series_count, periods))
+    flows[:, 0] = -rng.uniform(100000, 500000, series_count)
+
+    start_time = time.perf_counter()
+    npv(0.10 / 12, flows)
+    npv_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    rates = irr(flows)
+    irr_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    for row in flows[:500]:
+        sum(cf / (1 + 0.10 / 12) ** month for month, cf in enumerate(row))
+    loop_ms = (time.perf_counter() - start_time) * 1000 * series_count / 500
+
+    print(f"{series_count} series x {periods} periods: npv {npv_ms:.1f} ms "
+          f"(python loop ~{loop_ms:.0f} ms), irr {irr_ms:.1f} ms, {np.isfinite(rates).sum()} solved")
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,424 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Expense & Invoice Ledger Export / Import
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import csv
+import io
+import json
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, BinaryIO
+from datetime import datetime, date
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.connection import add_missing_columns
+from models.financial import FinancialProject, ProjectExpense, ProjectInvoice
+
+EXPORT_BATCH_SIZE = 5000  # Rows fetched per server-side cursor round trip and per Parquet row group
+IMPORT_BATCH_SIZE = 1000  # Rows per upsert transaction
+MAX_REPORTED_ERRORS = 500
+
+# Field name -> value kind, in export column order (after id, project_id and project_code)
+EXPENSE_FIELDS = {
+    'external_reference': 'str',
+    'expense_date': 'datetime',
+    'description': 'str',
+    'category': 'str',
+    'subcategory': 'str',
+    'amount': 'float',
+    'billable': 'bool',
+    'reimbursable': 'bool',
+    'employee_name': 'str',
+    'task_code': 'str',
+    'billing_rate': 'float',
+    'status': 'str',
+    'receipt_url': 'str',
+    'notes': 'str',
+}
+
+INVOICE_FIELDS = {
+    'external_reference': 'str',
+    'invoice_number': 'str',
+    'invoice_date': 'datetime',
+    'period_start': 'datetime',
+    'period_end': 'datetime',
+    'labor_amount': 'float',
+    'materials_amount': 'float',
+    'travel_amount': 'float',
+    'other_costs': 'float',
+    'subtotal': 'float',
+    'tax_amount': 'float',
+    'total_amount': 'float',
+    'status': 'str',
+    'sent_date': 'datetime',
+    'due_date': 'datetime',
+    'paid_date': 'datetime',
+    'paid_amount': 'float',
+    'line_items': 'json',
+    'payment_terms': 'str',
+    'notes': 'str',
+}
+
+LEDGERS = {
+    'expenses': {'model': ProjectExpense, 'fields': EXPENSE_FIELDS, 'date_field': 'expense_date', 'owner_field': 'submitted_by'},
+    'invoices': {'model': ProjectInvoice, 'fields': INVOICE_FIELDS, 'date_field': 'invoice_date', 'owner_field': 'created_by'},
+}
+
+TRACKING_FIELDS = {'created_at': 'datetime', 'updated_at': 'datetime'}
+
+def ensure_financial_ledger(bind) -> None:
+    """Add external_reference and its index to expense and invoice tables created before it existed"""
+
+    for spec in LEDGERS.values():
+        add_missing_columns(bind, spec['model'].__table__)
+
+def _parse_plain_date(value: Any) -> Any:
+    # Ledger exports from accounting tools usually carry a date without a time of day
+    if isinstance(value, str) and len(value.strip()) == 10:
+        try:
+            return datetime.combine(date.fromisoformat(value.strip()), datetime.min.time())
+        except ValueError:
+            return value
+    return value
+
+class LedgerImportRow(BaseModel):
+    external_reference: str
+    project_id: Optional[int] = None
+    project_code: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_project(self) -> "LedgerImportRow":
+        if not self.external_reference.strip():
+            raise ValueError("external_reference is required")
+        if self.project_id is None and not self.project_code:
+            raise ValueError("project_id or project_code is required")
+        return self
+
+class ExpenseImportRow(LedgerImportRow):
+    expense_date: datetime
+    description: str
+    category: str
+    amount: float
+    subcategory: Optional[str] = None
+    billable: bool = True
+    reimbursable: bool = False
+    employee_name: Optional[str] = None
+    task_code: Optional[str] = None
+    billing_rate: Optional[float] = None
+    status: str = "pending"
+    receipt_url: Optional[str] = None
+    notes: Optional[str] = None
+
+    @field_validator("expense_date", mode="before")
+    @classmethod
+    def accept_plain_dates(cls, value: Any) -> Any:
+        return _parse_plain_date(value)
+
+class InvoiceImportRow(LedgerImportRow):
+    invoice_number: str
+    invoice_date: datetime
+    total_amount: float
+    period_start: Optional[datetime] = None
+    period_end: Optional[datetime] = None
+    labor_amount: float = 0.0
+    materials_amount: float = 0.0
+    travel_amount: float = 0.0
+    other_costs: float = 0.0
+    subtotal: Optional[float] = None
+    tax_amount: float = 0.0
+    status: str = "draft"
+    sent_date: Optional[datetime] = None
+    due_date: Optional[datetime] = None
+    paid_date: Optional[datetime] = None
+    paid_amount: Optional[float] = None
+    line_items: Optional[List[Any]] = None
+    payment_terms: str = "Net 30"
+    notes: Optional[str] = None
+
+    @field_validator("invoice_date", "period_start", "period_end", "sent_date", "due_date", "paid_date", mode="before")
+    @classmethod
+    def accept_plain_dates(cls, value: Any) -> Any:
+        return _parse_plain_date(value)
+
+    @field_validator("line_items", mode="before")
+    @classmethod
+    def parse_line_items(cls, value: Any) -> Any:
+        # CSV and Parquet exports carry line items as a JSON string
+        return json.loads(value) if isinstance(value, str) else value
+
+IMPORT_ROWS = {'expenses': ExpenseImportRow, 'invoices': InvoiceImportRow}
+
+def iter_parquet_records(stream: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, row dict) from a seekable Parquet file, one record batch at a time"""
+
+    import pyarrow.parquet as pq  # Only needed for Parquet, and slow to import
+
+    row_number = 0
+    for batch in pq.ParquetFile(stream).iter_batches(batch_size=EXPORT_BATCH_SIZE):
+        for record in batch.to_pylist():
+            row_number += 1
+            yield row_number, record
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are drained after each Parquet row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class LedgerExportService:
+    """Constant-memory CSV and Parquet export of a company's expenses or invoices"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def columns(self, ledger: str) -> Dict[str, str]:
+        return {'id': 'int', 'project_id': 'int', 'project_code': 'str', **LEDGERS[ledger]['fields'], **TRACKING_FIELDS}
+
+    def iter_batches(
+        self,
+        ledger: str,
+        company_id: int,
+        project_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[List[Tuple]]:
+        """Rows in export column order, fetched through a server-side cursor in EXPORT_BATCH_SIZE partitions"""
+
+        spec = LEDGERS[ledger]
+        model = spec['model']
+        date_column = getattr(model, spec['date_field'])
+
+        columns = [
+            getattr(model, name) if name != 'project_code' else FinancialProject.project_code
+            for name in self.columns(ledger)
+        ]
+        statement = select(*columns).join(
+            FinancialProject, FinancialProject.id == model.project_id
+        ).where(
+            FinancialProject.created_by == company_id
+        ).order_by(model.project_id, model.id)
+
+        if project_id is not None:
+            statement = statement.where(model.project_id == project_id)
+        if start_date:
+            statement = statement.where(date_column >= start_date)
+        if end_date:
+            statement = statement.where(date_column <= end_date)
+
+        result = self.db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    def stream_csv(self, ledger: str, company_id: int, **filters) -> Iterator[bytes]:
+        columns = self.columns(ledger)
+        kinds = list(columns.values())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(list(columns))
+        for partition in self.iter_batches(ledger, company_id, **filters):
+            for row in partition:
+                writer.writerow([self._csv_value(value, kind) for value, kind in zip(row, kinds)])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def stream_parquet(self, ledger: str, company_id: int, **filters) -> Iterator[bytes]:
+        """One row group per cursor partition; only the current partition is held in memory"""
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {'int': pa.int64(), 'str': pa.string(), 'float': pa.float64(), 'bool': pa.bool_(),
+                       'datetime': pa.timestamp('us'), 'json': pa.string()}
+        columns = self.columns(ledger)
+        schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns.items()])
+        json_columns = [index for index, kind in enumerate(columns.values()) if kind == 'json']
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        try:
+            for partition in self.iter_batches(ledger, company_id, **filters):
+                values = list(zip(*partition))
+                arrays = [
+                    [json.dumps(value) if value is not None else None for value in column] if index in json_columns else column
+                    for index, column in enumerate(values)
+                ]
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(arrays, schema)], schema=schema
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def _csv_value(self, value: Any, kind: str) -> Any:
+        if value is None:
+            return ""
+        if kind == 'datetime':
+            return value.isoformat()
+        if kind == 'json':
+            return json.dumps(value)
+        return value
+
+class LedgerImportService:
+    """Upsert expenses or invoices by external reference, one transaction per batch"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_records(self, ledger: str, company_id: int, records: Iterable[Tuple[int, Any]]) -> Dict[str, Any]:
+        spec = LEDGERS[ledger]
+        row_model = IMPORT_ROWS[ledger]
+
+        projects = self.db.query(FinancialProject.id, FinancialProject.project_code).filter(
+            FinancialProject.created_by == company_id
+        ).all()
+        project_ids = {project_id for project_id, _ in projects}
+        project_codes = {code: project_id for project_id, code in projects if code}
+
+        errors: List[Dict[str, Any]] = []
+        counts = {'processed': 0, 'inserted': 0, 'updated': 0, 'failed': 0}
+        pending: List[Tuple[int, LedgerImportRow]] = []
+
+        def record_error(line: int, message: str) -> None:
+            counts['failed'] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "error": message})
+
+        def flush() -> None:
+            self._upsert_batch(spec, company_id, pending, project_ids, project_codes, counts, record_error)
+            pending.clear()
+
+        for line, record in records:
+            counts['processed'] += 1
+
+            if isinstance(record, Exception):
+                record_error(line, f"Invalid JSON: {record}")
+                continue
+            if not isinstance(record, dict):
+                record_error(line, "Row must be an object")
+                continue
+
+            # Empty cells and nulls mean "not provided": defaults on insert, left unchanged on update
+            record = {key: value for key, value in record.items() if value is not None and value != ""}
+
+            try:
+                pending.append((line, row_model(**record)))
+            except ValidationError as e:
+                record_error(line, "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+
+            if len(pending) >= IMPORT_BATCH_SIZE:
+                flush()
+
+        if pending:
+            flush()
+
+        errors.sort(key=lambda error: error["line"])
+
+        return {
+            "status": "success",
+            "rows_processed": counts['processed'],
+            "rows_inserted": counts['inserted'],
+            "rows_updated": counts['updated'],
+            "rows_failed": counts['failed'],
+            "errors": errors,
+            "errors_truncated": counts['failed'] > len(errors)
+        }
+
+    def _upsert_batch(
+        self,
+        spec: Dict[str, Any],
+        company_id: int,
+        batch: List[Tuple[int, LedgerImportRow]],
+        project_ids: set,
+        project_codes: Dict[str, int],
+        counts: Dict[str, int],
+        record_error
+    ) -> None:
+        """Match the batch to existing rows with one query, then bulk insert and bulk update, and commit"""
+
+        model = spec['model']
+        fields = set(spec['fields'])
+
+        resolved: Dict[str, Tuple[int, LedgerImportRow, Dict[str, Any]]] = {}
+        for line, row in batch:
+            project_id = row.project_id if row.project_id is not None else project_codes.get(row.project_code)
+            if project_id not in project_ids:
+                record_error(line, f"Project {row.project_id if row.project_id is not None else row.project_code} not found")
+                continue
+
+            values = {key: value for key, value in row.model_dump(exclude_unset=True).items() if key in fields}
+            values['external_reference'] = row.external_reference.strip()
+            values['project_id'] = project_id
+
+            # A reference repeated within the batch folds into one write, later rows winning
+            previous = resolved.get(values['external_reference'])
+            if previous is not None:
+                values = {**previous[2], **values}
+            resolved[values['external_reference']] = (line, row, values)
+
+        if not resolved:
+            return
+
+        existing = dict(self.db.query(model.external_reference, model.id).join(
+            FinancialProject, FinancialProject.id == model.project_id
+        ).filter(
+            FinancialProject.created_by == company_id,
+            model.external_reference.in_(list(resolved))
+        ).all())
+
+        inserts = []
+        updates = []
+        for reference, (line, row, values) in resolved.items():
+            if reference in existing:
+                # Only the columns the file provided are overwritten
+                updates.append({'id': existing[reference], **values, 'updated_at': datetime.utcnow()})
+            else:
+                inserts.append({**row.model_dump(include=fields), **values, spec['owner_field']: company_id})
+
+        try:
+            if inserts:
+                self.db.execute(insert(model), inserts)
+            if updates:
+                self.db.execute(update(model), updates)
+            self.db.commit()
+        except IntegrityError as e:
+            # Earlier batches stay committed; report every row of the rejected batch
+            self.db.rollback()
+            for line, _, _ in resolved.values():
+                record_error(line, f"Batch rejected: {e.orig}")
+            return
+
+        counts['inserted'] += len(inserts)
+        counts['updated'] += len(updates)
@@ -0,0 +1,514 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - GSA Pricing Ingestion & Rate Index
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import math
+import os
+import re
+import sys
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, update, delete, select, tuple_, case
+from sqlalchemy.orm import Session
+
+from models.market_research import GSAPricing, GSAPricingCategory, GSAPricingToken
+from services.award_warehouse import iter_award_archive, _parse_date, _parse_amount
+from services.market_cache import invalidate_market_components
+
+LOAD_BATCH_SIZE = 2000
+LOOKUP_CHUNK = 500
+RATES_MAX_AGE = timedelta(hours=1)
+RATE_PERCENTILES = (10, 25, 50, 75, 90)
+MAX_TOKEN_MATCHES = 5000
+TOKEN_MATCH_THRESHOLD = 0.75  # Share of the best token score a row needs to count as a match
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "gsa_calc_rates_sample.csv")
+
+# GSAPricing field -> price list / CALC export headers, normalized to lower_snake_case
+COLUMN_ALIASES = {
+    'product_name': ('labor_category', 'product_name', 'item_name', 'product_description'),
+    'description': ('labor_category_description', 'description', 'product_long_description'),
+    'price': ('current_price', 'current_year_labor_price', 'contract_price', 'gsa_price', 'price'),
+    'list_price': ('list_price', 'commercial_price', 'commercial_list_price', 'msrp'),
+    'unit_of_measure': ('unit_of_issue', 'unit_of_measure', 'uom', 'price_unit'),
+    'schedule_number': ('schedule', 'schedule_number', 'schedule_title'),
+    'sin_number': ('sin', 'special_item_number', 'sin_number'),
+    'category': ('category', 'sin_description', 'service_category', 'category_name'),
+    'manufacturer': ('manufacturer', 'manufacturer_name'),
+    'contractor_name': ('vendor_name', 'contractor_name', 'contractor'),
+    'contract_number': ('idv_piid', 'contract_number', 'contract'),
+    'effective_date': ('contract_start', 'begin_date', 'effective_date'),
+    'expiration_date': ('contract_end', 'end_date', 'expiration_date'),
+    'naics_code': ('naics_code', 'naics'),
+    'psc_code': ('psc_code', 'psc', 'product_service_code'),
+}
+
+# Carried into raw_data for display; not used for matching
+EXTRA_COLUMNS = ('education_level', 'min_years_experience', 'business_size', 'security_clearance', 'worksite')
+
+# MAS SINs whose leading digits are not a NAICS code, including the pre-consolidation schedules
+SIN_CODES = {
+    '54151S': ('541512', None),
+    '54151HACS': ('541512', None),
+    '54151HEAL': ('541512', None),
+    '54151ECOM': ('541519', None),
+    '132-51': ('541512', None),
+    '132-45A': ('541512', None), '132-45B': ('541512', None), '132-45C': ('541512', None), '132-45D': ('541512', None),
+    '874-1': ('541611', 'R408'),
+    '874-4': ('611430', 'U008'),
+    '874-6': ('541611', 'R408'),
+    '874-7': ('541611', 'R408'),
+    '871-1': ('541330', 'R425'), '871-2': ('541330', 'R425'), '871-3': ('541330', 'R425'),
+    '871-4': ('541330', 'R425'), '871-5': ('541330', 'R425'), '871-6': ('541330', 'R425'),
+}
+
+# PSCs for NAICS-numbered SINs where one professional services PSC clearly applies
+NAICS_PSC = {
+    '541611': 'R408',
+    '541330': 'R425',
+    '611430': 'U008',
+    '541614': 'R706',
+}
+
+# Category text -> NAICS when a row has no usable SIN; longest phrase wins
+CATEGORY_SYNONYMS = {
+    'information technology professional services': '541512',
+    'it professional services': '541512',
+    'highly adaptive cybersecurity': '541512',
+    'cybersecurity': '541512',
+    'software development': '541511',
+    'custom computer programming': '541511',
+    'cloud computing': '518210',
+    'management consulting': '541611',
+    'management and advisory': '541611',
+    'professional engineering': '541330',
+    'engineering services': '541330',
+    'training': '611430',
+    'logistics': '541614',
+    'facilities maintenance': '561210',
+    'facilities management': '561210',
+    'marketing': '541810',
+    'advertising': '541810',
+    'financial management': '541211',
+    'audit': '541211',
+    'environmental': '541620',
+    'translation': '541930',
+    'research and development': '541715',
+}
+_CATEGORY_PHRASES = sorted(CATEGORY_SYNONYMS, key=len, reverse=True)
+
+UNITS = {'hour': 'hour', 'hr': 'hour', 'hourly': 'hour', 'per hour': 'hour', 'hours': 'hour',
+         'day': 'day', 'daily': 'day', 'week': 'week', 'month': 'month', 'year': 'year', 'annual': 'year',
+         'each': 'each', 'ea': 'each'}
+
+# Abbreviations in labor category titles, expanded so "Sr. Eng" finds "Senior Engineer"
+TOKEN_SYNONYMS = {
+    'sr': 'senior', 'jr': 'junior', 'mgr': 'manager', 'eng': 'engineer', 'engr': 'engineer',
+    'dev': 'developer', 'admin': 'administrator', 'adm': 'administrator', 'spec': 'specialist',
+    'tech': 'technician', 'asst': 'assistant', 'prog': 'programmer', 'sys': 'system', 'sw': 'software',
+    'mgmt': 'management', 'dba': 'database', 'qa': 'quality', 'pm': 'manager'
+}
+STOPWORDS = {'and', 'of', 'the', 'for', 'to', 'in', 'a', 'an', 'with', 'or', 'level'}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# (naics_code, psc_code, query, unit) -> {"computed_at", "result"}; cleared on every pricing load
+_cache: Dict[Tuple[Optional[str], Optional[str], Optional[str], str], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+def invalidate_gsa_rates() -> None:
+    with _lock:
+        _cache.clear()
+
+def ensure_gsa_pricing(bind) -> None:
+    for model in (GSAPricing, GSAPricingCategory, GSAPricingToken):
+        model.__table__.create(bind=bind, checkfirst=True)
+        for index in model.__table__.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Distinct index tokens: lowercase words, abbreviations expanded, plurals folded, stopwords dropped"""
+
+    tokens = []
+    for word in _TOKEN.findall((text or '').lower()):
+        word = TOKEN_SYNONYMS.get(word, word)
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        if word not in STOPWORDS and word not in tokens:
+            tokens.append(word)
+    return tokens
+
+def normalize_unit(unit: Optional[str]) -> str:
+    text = ' '.join((unit or '').lower().replace('.', ' ').split())
+    return UNITS.get(text, text or 'unknown')
+
+def normalize_category(sin_number: Optional[str], category: Optional[str], product_name: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """(NAICS, PSC) for a price list row from its SIN, falling back to category and product text"""
+
+    sin = (sin_number or '').strip().upper()
+    if sin in SIN_CODES:
+        return SIN_CODES[sin]
+
+    digits = re.match(r"^(\d{6})", sin)
+    if digits:
+        return digits.group(1), NAICS_PSC.get(digits.group(1))
+
+    text = ' '.join(f"{category or ''} {product_name or ''}".lower().split())
+    for phrase in _CATEGORY_PHRASES:
+        if phrase in text:
+            naics_code = CATEGORY_SYNONYMS[phrase]
+            return naics_code, NAICS_PSC.get(naics_code)
+    return None, None
+
+def _index_rows(pricing_id: int, row: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    naics_code, psc_code = normalize_category(row['sin_number'], row['category'], row['product_name'])
+    category = {
+        'pricing_id': pricing_id,
+        'naics_code': row.get('naics_code') or naics_code,
+        'psc_code': row.get('psc_code') or psc_code,
+        'unit': normalize_unit(row['unit_of_measure']),
+        'price': row['contract_price']
+    }
+    tokens = [{'token': token, 'pricing_id': pricing_id} for token in tokenize(row['product_name'])]
+    return category, tokens
+
+class GSAPricingLoader:
+    """Upsert GSA price lists and CALC labor rate exports into GSAPricing and keep the rate index in step"""
+
+    def __init__(self, db: Session, source: str = "GSA"):
+        self.db = db
+        self.source = source
+
+    def load_paths(self, paths: Iterable[str]) -> Dict[str, Any]:
+        def records():
+            for path in paths:
+                with open(path, "rb") as stream:
+                    yield from iter_award_archive(stream, os.path.basename(path))
+
+        return self.load(records())
+
+    def load(self, records: Iterable[Tuple[str, int, Dict[str, str]]]) -> Dict[str, Any]:
+        """Map and upsert rows keyed on (contract, SIN, product) in LOAD_BATCH_SIZE batches"""
+
+        stats = {'rows_read': 0, 'rows_skipped': 0, 'prices_inserted': 0, 'prices_updated': 0, 'unmapped_categories': 0, 'files': []}
+        batch: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        current_file = None
+        columns: Dict[str, List[str]] = {}
+
+        for name, _, row in records:
+            stats['rows_read'] += 1
+            if name != current_file or not columns:
+                current_file = name
+                columns = {field: [alias for alias in aliases if alias in row] for field, aliases in COLUMN_ALIASES.items()}
+                if name:
+                    stats['files'].append(name)
+
+            price = self._map_row(row, columns)
+            if price is None:
+                stats['rows_skipped'] += 1
+                continue
+
+            # A later row for the same key is the newer price
+            batch[(price['contract_number'], price['sin_number'] or '', price['product_name'])] = price
+            if len(batch) >= LOAD_BATCH_SIZE:
+                self._flush(batch, stats)
+                batch = {}
+
+        if batch:
+            self._flush(batch, stats)
+
+        if stats['prices_inserted'] or stats['prices_updated']:
+            invalidate_gsa_rates()
+            invalidate_market_components(('pricing',))
+
+        return stats
+
+    def _map_row(self, row: Dict[str, str], columns: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        values = {}
+        for field, aliases in columns.items():
+            value = None
+            for alias in aliases:
+                value = row[alias].strip()
+                if value:
+                    break
+            values[field] = value or None
+
+        price = _parse_amount(values['price'])
+        if not values['product_name'] or not values['contract_number'] or price is None:
+            return None
+
+        list_price = _parse_amount(values['list_price'])
+        discount = round((1 - price / list_price) * 100, 2) if list_price and list_price > price else None
+
+        return {
+            'schedule_number': values['schedule_number'],
+            'sin_number': values['sin_number'],
+            'product_name': values['product_name'],
+            'description': values['description'],
+            'manufacturer': values['manufacturer'],
+            'category': values['category'],
+            'contract_price': price,
+            'list_price': list_price,
+            'discount_percentage': discount,
+            # CALC exports are hourly labor rates and carry no unit column
+            'unit_of_measure': values['unit_of_measure'] or ('Hour' if 'labor_category' in row else None),
+            'contractor_name': values['contractor_name'],
+            'contract_number': values['contract_number'],
+            'effective_date': _parse_date(values['effective_date']),
+            'expiration_date': _parse_date(values['expiration_date']),
+            'source': self.source,
+            'raw_data': {key: row[key] for key in EXTRA_COLUMNS if row.get(key)} or None,
+            # Codes given explicitly by the file win over normalization; not GSAPricing columns
+            'naics_code': values['naics_code'],
+            'psc_code': values['psc_code']
+        }
+
+    def _flush(self, batch: Dict[Tuple[str, str, str], Dict[str, Any]], stats: Dict[str, Any]) -> None:
+        existing = self._lookup_ids(list(batch))
+        now = datetime.utcnow()
+
+        columns = [column.name for column in GSAPricing.__table__.columns if column.name not in ('id', 'created_at', 'updated_at')]
+        updates = [{'id': existing[key], **{c: row[c] for c in columns}, 'updated_at': now} for key, row in batch.items() if key in existing]
+        inserts = [{**{c: row[c] for c in columns}, 'created_at': now, 'updated_at': now} for key, row in batch.items() if key not in existing]
+
+        if updates:
+            self.db.execute(update(GSAPricing), updates)
+        if inserts:
+            self.db.execute(insert(GSAPricing), inserts)
+            existing.update(self._lookup_ids([key for key in batch if key not in existing]))
+
+        ids = [existing[key] for key in batch]
+        for first in range(0, len(ids), LOOKUP_CHUNK):
+            chunk = ids[first:first + LOOKUP_CHUNK]
+            self.db.execute(delete(GSAPricingCategory).where(GSAPricingCategory.pricing_id.in_(chunk)))
+            self.db.execute(delete(GSAPricingToken).where(GSAPricingToken.pricing_id.in_(chunk)))
+
+        categories, tokens = [], []
+        for key, row in batch.items():
+            category, row_tokens = _index_rows(existing[key], row)
+            if category['naics_code'] is None and category['psc_code'] is None:
+                stats['unmapped_categories'] += 1
+            categories.append(category)
+            tokens.extend(row_tokens)
+
+        self.db.execute(insert(GSAPricingCategory), categories)
+        if tokens:
+            self.db.execute(insert(GSAPricingToken), tokens)
+        self.db.commit()
+
+        stats['prices_updated'] += len(updates)
+        stats['prices_inserted'] += len(inserts)
+
+    def _lookup_ids(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], int]:
+        found: Dict[Tuple[str, str, str], int] = {}
+        key_columns = (GSAPricing.contract_number, func.coalesce(GSAPricing.sin_number, ''), GSAPricing.product_name)
+        for first in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[first:first + LOOKUP_CHUNK]
+            for pricing_id, *key in self.db.query(GSAPricing.id, *key_columns).filter(
+                tuple_(*key_columns).in_(chunk)
+            ).order_by(GSAPricing.id).all():
+                found.setdefault(tuple(key), pricing_id)
+        return found
+
+class GSAPricingIndexService:
+    """Rate distributions by exact NAICS/PSC key or by ranked token match on labor category names"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def rebuild_index(self) -> Dict[str, int]:
+        """Backfill the category and token tables from every GSAPricing row"""
+
+        self.db.execute(delete(GSAPricingCategory))
+        self.db.execute(delete(GSAPricingToken))
+
+        counts = {'prices': 0, 'tokens': 0, 'unmapped_categories': 0}
+        result = self.db.execute(
+            select(GSAPricing.id, GSAPricing.sin_number, GSAPricing.category, GSAPricing.product_name,
+                   GSAPricing.unit_of_measure, GSAPricing.contract_price).execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        categories, tokens = [], []
+        for pricing_id, sin_number, category_text, product_name, unit_of_measure, contract_price in result:
+            category, row_tokens = _index_rows(pricing_id, {
+                'sin_number': sin_number, 'category': category_text, 'product_name': product_name,
+                'unit_of_measure': unit_of_measure, 'contract_price': contract_price
+            })
+            counts['prices'] += 1
+            counts['tokens'] += len(row_tokens)
+            counts['unmapped_categories'] += category['naics_code'] is None and category['psc_code'] is None
+            categories.append(category)
+            tokens.extend(row_tokens)
+            if len(categories) >= LOAD_BATCH_SIZE:
+                self._insert_index(categories, tokens)
+                categories, tokens = [], []
+
+        self._insert_index(categories, tokens)
+        self.db.commit()
+        invalidate_gsa_rates()
+        invalidate_market_components(('pricing',))
+        return counts
+
+    def _insert_index(self, categories: List[Dict[str, Any]], tokens: List[Dict[str, Any]]) -> None:
+        if categories:
+            self.db.execute(insert(GSAPricingCategory), categories)
+        if tokens:
+            self.db.execute(insert(GSAPricingToken), tokens)
+
+    def get_rates(
+        self,
+        naics_code: Optional[str] = None,
+        psc_code: Optional[str] = None,
+        query: Optional[str] = None,
+        unit: str = "hour",
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Price distribution and top labor categories; query ranks by tokens within any NAICS/PSC given"""
+
+        if not naics_code and not psc_code and not query:
+            raise ValueError("A NAICS code, PSC code or query is required")
+
+        unit = normalize_unit(unit)
+        key = (naics_code, psc_code, ' '.join(tokenize(query)) or None, unit)
+        with _lock:
+            cached = _cache.get(key)
+        if cached and datetime.utcnow() - cached["computed_at"] <= RATES_MAX_AGE:
+            return {**cached["result"], "labor_categories": cached["result"]["labor_categories"][:limit]}
+
+        conditions = [GSAPricingCategory.unit == unit]
+        if naics_code:
+            conditions.append(GSAPricingCategory.naics_code == naics_code)
+        if psc_code:
+            conditions.append(GSAPricingCategory.psc_code == psc_code)
+
+        if query:
+            match = "tokens"
+            matched_ids = self._ranked_matches(tokenize(query), conditions)
+            conditions = [GSAPricingCategory.pricing_id.in_(select(matched_ids.c.pricing_id))] if matched_ids is not None else None
+        else:
+            match = "naics" if naics_code else "psc"
+
+        result = self._distribution(conditions, match) if conditions is not None else self._empty(match)
+        result["unit"] = unit
+        with _lock:
+            _cache[key] = {"computed_at": datetime.utcnow(), "result": result}
+        return {**result, "labor_categories": result["labor_categories"][:limit]}
+
+    def _ranked_matches(self, tokens: List[str], conditions: List[Any]):
+        """Subquery of pricing ids scoring within TOKEN_MATCH_THRESHOLD of the best IDF-weighted token match"""
+
+        if not tokens:
+            return None
+
+        indexed = self.db.query(func.count(GSAPricingCategory.pricing_id)).scalar() or 0
+        frequencies = dict(self.db.query(GSAPricingToken.token, func.count()).filter(
+            GSAPricingToken.token.in_(tokens)
+        ).group_by(GSAPricingToken.token).all())
+        if not frequencies:
+            return None
+
+        # Rare words ("cybersecurity") outweigh common ones ("senior", "ii")
+        weights = {token: math.log(1 + indexed / count) for token, count in frequencies.items()}
+        score = func.sum(case(*[(GSAPricingToken.token == token, weight) for token, weight in weights.items()], else_=0.0))
+
+        ranked = self.db.query(GSAPricingToken.pricing_id, score.label("score")).join(
+            GSAPricingCategory, GSAPricingCategory.pricing_id == GSAPricingToken.pricing_id
+        ).filter(
+            GSAPricingToken.token.in_(list(weights)), *conditions
+        ).group_by(GSAPricingToken.pricing_id).order_by(score.desc()).limit(MAX_TOKEN_MATCHES).subquery()
+
+        best = self.db.query(func.max(ranked.c.score)).scalar()
+        if not best:
+            return None
+        return self.db.query(ranked.c.pricing_id).filter(ranked.c.score >= best * TOKEN_MATCH_THRESHOLD).subquery()
+
+    def _distribution(self, conditions: List[Any], match: str) -> Dict[str, Any]:
+        prices = np.fromiter(
+            (row[0] for row in self.db.execute(select(GSAPricingCategory.price).where(*conditions, GSAPricingCategory.price.isnot(None)))),
+            dtype=float
+        )
+        if not prices.size:
+            return self._empty(match)
+
+        count = func.count(GSAPricing.id)
+        labor_categories = self.db.query(
+            GSAPricing.product_name, count, func.avg(GSAPricing.contract_price), func.min(GSAPricing.contract_price),
+            func.max(GSAPricing.contract_price), func.avg(GSAPricing.discount_percentage), func.max(GSAPricing.unit_of_measure)
+        ).join(
+            GSAPricingCategory, GSAPricingCategory.pricing_id == GSAPricing.id
+        ).filter(*conditions).group_by(GSAPricing.product_name).order_by(count.desc(), GSAPricing.product_name).limit(100).all()
+
+        return {
+            "match": match,
+            "data_points": int(prices.size),
+            "rate_distribution": {
+                "average": float(prices.mean()),
+                "min": float(prices.min()),
+                "max": float(prices.max()),
+                **{f"percentile_{p}": value for p, value in zip(RATE_PERCENTILES, np.percentile(prices, RATE_PERCENTILES).tolist())}
+            },
+            "labor_categories": [
+                {
+                    "labor_category": name,
+                    "count": rows,
+                    "average_rate": average,
+                    "min_rate": low,
+                    "max_rate": high,
+                    "discount_percentage": discount,
+                    "unit_of_measure": unit_of_measure
+                }
+                for name, rows, average, low, high, discount, unit_of_measure in labor_categories
+            ]
+        }
+
+    @staticmethod
+    def _empty(match: str) -> Dict[str, Any]:
+        return {"match": match, "data_points": 0, "rate_distribution": {}, "labor_categories": []}
+
+def _benchmark() -> None:
+    """python -m services.gsa_pricing: load and index timings for the sample CALC export, then one uncached query of each kind"""
+
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine("sqlite://")
+    ensure_gsa_pricing(engine)
+    db = sessionmaker(bind=engine)()
+
+    start_time = time.perf_counter()
+    loaded = GSAPricingLoader(db).load_paths([FIXTURE_PATH])
+    load_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    service = GSAPricingIndexService(db)
+    service.rebuild_index()
+    rebuild_ms = (time.perf_counter() - start_time) * 1000
+    print(f"load {loaded['prices_inserted']} prices {load_ms:.1f} ms, rebuild index {rebuild_ms:.1f} ms")
+
+    for label, kwargs in (
+        ("naics 541512", {"naics_code": "541512"}),
+        ("psc R408", {"psc_code": "R408"}),
+        ("'sr. software eng'", {"query": "sr. software eng"}),
+        ("'cybersecurity analyst' in 541512", {"query": "cybersecurity analyst", "naics_code": "541512"}),
+    ):
+        start_time = time.perf_counter()
+        rates = service.get_rates(**kwargs)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        print(f"{label}: {rates['data_points']} rates ({elapsed:.1f} ms)")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from database.connection import SessionLocal
+
+        session = SessionLocal()
+        try:
+            ensure_gsa_pricing(session.get_bind())
+            print(GSAPricingLoader(session).load_paths(sys.argv[1:]))
+        finally:
+            session.close()
+    else:
+        _benchmark()
@@ -0,0 +1,187 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Batch Market Analysis Jobs
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import asyncio
+import threading
+import uuid
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from models.market_research import MarketAnalysis
+from models.opportunity import Opportunity
+from services.market_intelligence import MarketIntelligenceService
+
+MAX_BATCH_OPPORTUNITIES = 500
+MAX_CONCURRENT_SYNTHESES = 5  # Concurrent LLM calls per job; matches AIService.batch_analyze
+PERSIST_BATCH_SIZE = 50
+JOB_RETENTION = timedelta(hours=24)
+MAX_REPORTED_ERRORS = 50
+
+# job_id -> progress record; finished jobs are pruned after JOB_RETENTION
+_jobs: Dict[str, Dict[str, Any]] = {}
+_tasks: Dict[str, "asyncio.Task"] = {}
+_lock = threading.Lock()
+
+def get_batch_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        job = _jobs.get(job_id)
+        return {**job, "errors": list(job["errors"])} if job else None
+
+def _update_job(job_id: str, **changes: Any) -> None:
+    with _lock:
+        _jobs[job_id].update(changes)
+
+def _record_result(job_id: str, opportunity_id: int, error: Optional[str] = None, insights_reused: bool = False) -> None:
+    with _lock:
+        job = _jobs[job_id]
+        if error is None:
+            job["completed"] += 1
+            if insights_reused:
+                job["insights_reused"] += 1
+        else:
+            job["failed"] += 1
+            if len(job["errors"]) < MAX_REPORTED_ERRORS:
+                job["errors"].append({"opportunity_id": opportunity_id, "error": error})
+
+def _prune_jobs(now: datetime) -> None:
+    for job_id in [job_id for job_id, job in _jobs.items() if job["finished_at"] and now - job["finished_at"] > JOB_RETENTION]:
+        del _jobs[job_id]
+
+def start_market_analysis_batch(bind, opportunity_ids: List[int], user_id: int, reuse_insights: bool = True) -> Dict[str, Any]:
+    """Register a batch job and run it on the current event loop; returns the initial progress record"""
+
+    opportunity_ids = list(dict.fromkeys(opportunity_ids))
+    if not opportunity_ids:
+        raise ValueError("No opportunities given")
+    if len(opportunity_ids) > MAX_BATCH_OPPORTUNITIES:
+        raise ValueError(f"A batch can analyze at most {MAX_BATCH_OPPORTUNITIES} opportunities")
+
+    loop = asyncio.get_running_loop()
+    now = datetime.utcnow()
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _prune_jobs(now)
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "status": "queued",
+            "total": len(opportunity_ids),
+            "completed": 0,
+            "failed": 0,
+            "groups": 0,
+            "groups_loaded": 0,
+            "insights_reused": 0,
+            "persisted": 0,
+            "errors": [],
+            "error": None,
+            "created_at": now,
+            "finished_at": None
+        }
+        _tasks[job_id] = loop.create_task(_run_job(bind, job_id, opportunity_ids, reuse_insights))
+
+    return get_batch_job(job_id)
+
+async def _run_job(bind, job_id: str, opportunity_ids: List[int], reuse_insights: bool) -> None:
+    # Results are committed while other syntheses still read their opportunities
+    db = Session(bind=bind, expire_on_commit=False)
+    try:
+        await MarketAnalysisBatchService(db).run(job_id, opportunity_ids, reuse_insights)
+        _update_job(job_id, status="completed", finished_at=datetime.utcnow())
+    except Exception as e:
+        print(f"Market analysis batch {job_id} failed: {e}")
+        _update_job(job_id, status="failed", finished_at=datetime.utcnow(), error=str(e))
+    finally:
+        db.close()
+        with _lock:
+            _tasks.pop(job_id, None)
+
+class MarketAnalysisBatchService:
+    """Market analysis for many opportunities at once
+
+    Opportunities are grouped by (NAICS, agency), the key the market components are cached under,
+    so awards, competitors, pricing and teaming are loaded once per group. The per-opportunity
+    synthesis and its LLM call then fan out under a semaphore, and results are written to
+    MarketAnalysis in bulk as they complete.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def run(self, job_id: str, opportunity_ids: List[int], reuse_insights: bool = True) -> None:
+        opportunities = self.db.query(Opportunity).filter(Opportunity.id.in_(opportunity_ids)).all()
+        for missing_id in set(opportunity_ids) - {opportunity.id for opportunity in opportunities}:
+            _record_result(job_id, missing_id, error="Opportunity not found")
+
+        existing = {
+            analysis.opportunity_id: (analysis.id, analysis.ai_analysis)
+            for analysis in self.db.query(MarketAnalysis.id, MarketAnalysis.opportunity_id, MarketAnalysis.ai_analysis).filter(
+                MarketAnalysis.opportunity_id.in_([opportunity.id for opportunity in opportunities])
+            )
+        }
+
+        groups: Dict[Tuple[Optional[str], Optional[str]], List[Opportunity]] = {}
+        for opportunity in opportunities:
+            groups.setdefault((opportunity.naics_code, opportunity.agency), []).append(opportunity)
+        _update_job(job_id, status="running", groups=len(groups))
+
+        service = MarketIntelligenceService(self.db)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SYNTHESES)
+        pending: List[Dict[str, Any]] = []
+
+        async def synthesize(opportunity: Opportunity, components: Dict[str, Any]) -> None:
+            stored = existing.get(opportunity.id)
+            ai_insights = stored[1] if reuse_insights and stored and service._insights_fresh(stored[1]) else None
+            try:
+                async with semaphore:
+                    analysis = await service._synthesize_market_analysis(opportunity, components, ai_insights)
+            except Exception as e:
+                _record_result(job_id, opportunity.id, error=str(e))
+                return
+
+            pending.append({"opportunity_id": opportunity.id, "analysis": analysis})
+            _record_result(job_id, opportunity.id, insights_reused=ai_insights is not None)
+            if len(pending) >= PERSIST_BATCH_SIZE:
+                self._persist(job_id, pending, existing)
+
+        tasks = []
+        for group in groups.values():
+            # Components are shared by the whole group; later groups load while earlier syntheses run
+            components = await service._gather_market_components(group[0])
+            with _lock:
+                _jobs[job_id]["groups_loaded"] += 1
+            tasks += [asyncio.create_task(synthesize(opportunity, components)) for opportunity in group]
+
+        await asyncio.gather(*tasks)
+        self._persist(job_id, pending, existing)
+
+    def _persist(self, job_id: str, pending: List[Dict[str, Any]], existing: Dict[int, Tuple[int, Any]]) -> None:
+        """Write finished analyses with one bulk insert and one bulk update, then commit"""
+
+        if not pending:
+            return
+
+        now = datetime.utcnow()
+        inserts = []
+        updates = []
+        for result in pending:
+            stored = existing.get(result["opportunity_id"])
+            if stored:
+                updates.append({"id": stored[0], **result["analysis"], "updated_at": now})
+            else:
+                inserts.append({"opportunity_id": result["opportunity_id"], **result["analysis"], "created_at": now, "updated_at": now})
+
+        if updates:
+            self.db.execute(update(MarketAnalysis), updates)
+        if inserts:
+            self.db.execute(insert(MarketAnalysis), inserts)
+        self.db.commit()
+
+        with _lock:
+            _jobs[job_id]["persisted"] += len(pending)
+        pending.clear()
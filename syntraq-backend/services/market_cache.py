@@ -0,0 +1,89 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Market Analysis Freshness Tiers
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable, Iterable
+from datetime import datetime, timedelta
+
+# Tier 1: market data shared by every opportunity with the same key. Awards are keyed by
+# (NAICS, agency); competitors, pricing and teaming do not depend on the agency.
+COMPONENT_TTLS = {
+    'awards': timedelta(hours=24),
+    'competitors': timedelta(hours=6),
+    'pricing': timedelta(hours=12),
+    'teaming': timedelta(hours=6),
+}
+AGENCY_SCOPED_COMPONENTS = {'awards'}
+
+# Tier 2: the per-opportunity synthesis (scores, levels, averages) is cheap and re-derived from
+# tier 1 once the stored analysis is older than this
+SYNTHESIS_MAX_AGE = timedelta(hours=1)
+
+# Tier 3: LLM insights are only regenerated once they are this old
+INSIGHTS_MAX_AGE = timedelta(days=7)
+
+# (component, naics_code, agency) -> {"computed_at", "value"}
+_components: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+# opportunity_id -> in-flight background refresh
+_refresh_tasks: Dict[int, "asyncio.Task"] = {}
+
+_lock = threading.Lock()
+
+def _component_key(component: str, naics_code: Optional[str], agency: Optional[str]) -> Tuple[str, str, str]:
+    return (component, naics_code or '', (agency or '') if component in AGENCY_SCOPED_COMPONENTS else '')
+
+def get_market_component(component: str, naics_code: Optional[str], agency: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Cached component entry if it is within its TTL"""
+
+    with _lock:
+        entry = _components.get(_component_key(component, naics_code, agency))
+    if entry is None or datetime.utcnow() - entry["computed_at"] > COMPONENT_TTLS[component]:
+        return None
+    return entry
+
+def store_market_component(component: str, naics_code: Optional[str], agency: Optional[str], value: Any) -> None:
+    with _lock:
+        _components[_component_key(component, naics_code, agency)] = {"computed_at": datetime.utcnow(), "value": value}
+
+def invalidate_market_components(components: Optional[Iterable[str]] = None) -> None:
+    """Drop cached components of the given kinds (all kinds when None) across every key"""
+
+    kinds = set(components) if components is not None else set(COMPONENT_TTLS)
+    with _lock:
+        for key in [key for key in _components if key[0] in kinds]:
+            del _components[key]
+
+def analysis_refreshing(opportunity_id: int) -> bool:
+    with _lock:
+        return opportunity_id in _refresh_tasks
+
+def schedule_analysis_refresh(opportunity_id: int, refresh: Callable[[], Awaitable[Any]]) -> bool:
+    """Start a background refresh of one opportunity's analysis unless one is already running"""
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    with _lock:
+        if opportunity_id in _refresh_tasks:
+            return False
+        _refresh_tasks[opportunity_id] = loop.create_task(_run_refresh(opportunity_id, refresh))
+
+    return True
+
+async def _run_refresh(opportunity_id: int, refresh: Callable[[], Awaitable[Any]]) -> None:
+    try:
+        await refresh()
+    except Exception as e:
+        # The stored analysis keeps being served; the next request after SYNTHESIS_MAX_AGE retries
+        print(f"Market analysis refresh failed for opportunity {opportunity_id}: {e}")
+    finally:
+        with _lock:
+            _refresh_tasks.pop(opportunity_id, None)
@@ -1,4 +1,3 @@
-import httpx
 import os
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
@@ -6,9 +5,23 @@ from sqlalchemy.orm import Session
 import asyncio
 import json
 
-from models.market_research import CompetitorProfile, ContractAward, MarketAnalysis, GSAPricing
+from models.market_research import CompetitorProfile, ContractAward, MarketAnalysis
 from models.opportunity import Opportunity
 from services.ai_service import AIService
+from services.ai_usage import record_usage
+from services.teaming_graph import TeamingGraphService
+from services.competitor_scoring import CompetitorFeatureMatrix, CompetitorScoringService
+from services.gsa_pricing import GSAPricingIndexService
+from services.pricing_stats import PricingStatsService
+from services.award_warehouse import map_award_record
+from services.federal_api import ResponseStore, fetch_json
+from services.market_cache import (
+    SYNTHESIS_MAX_AGE, INSIGHTS_MAX_AGE, get_market_component, store_market_component,
+    schedule_analysis_refresh, analysis_refreshing
+)
+
+FPDS_PAGE_SIZE = 100
+MAX_FPDS_PAGES = 5
 
 class MarketIntelligenceService:
     """Service for competitive intelligence and market research"""
@@ -16,7 +29,6 @@ class MarketIntelligenceService:
     def __init__(self, db: Session):
         self.db = db
         self.ai_service = AIService()
-        self.client = httpx.AsyncClient(timeout=30.0)
         
         # API configurations
         self.fpds_base_url = "https://api.sam.gov/prod/federalcontractawards/v1/search"
@@ -30,72 +42,135 @@ class MarketIntelligenceService:
         if not opportunity:
             raise ValueError("Opportunity not found")
         
-        # Check if analysis already exists and is recent
         existing_analysis = self.db.query(MarketAnalysis).filter(
             MarketAnalysis.opportunity_id == opportunity_id
         ).first()
         
-        if existing_analysis and (datetime.utcnow() - existing_analysis.created_at).days < 7:
+        # First analysis for the opportunity: nothing to serve yet, so compute inline
+        if not existing_analysis:
+            analysis_data = await self._perform_market_analysis(opportunity)
+            self._save_analysis(opportunity_id, None, analysis_data)
+            return {**analysis_data, 'analysis_date': datetime.utcnow().isoformat(), 'stale': False, 'refreshing': False}
+        
+        last_refreshed = existing_analysis.updated_at or existing_analysis.created_at
+        if datetime.utcnow() - last_refreshed <= SYNTHESIS_MAX_AGE:
             return self._format_market_analysis(existing_analysis)
         
-        # Perform fresh analysis
-        analysis_data = await self._perform_market_analysis(opportunity)
+        # Stale: answer with the stored analysis and refresh it in the background
+        bind = self.db.get_bind()
+        schedule_analysis_refresh(opportunity_id, lambda: self._refresh_in_background(bind, opportunity_id))
+        return self._format_market_analysis(existing_analysis, stale=True, refreshing=analysis_refreshing(opportunity_id))
+    
+    async def _refresh_in_background(self, bind, opportunity_id: int) -> None:
+        """Re-derive a stored analysis on its own session; the request's session is closed by now"""
         
-        # Save or update analysis
+        db = Session(bind=bind)
+        service = MarketIntelligenceService(db)
+        try:
+            opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
+            existing_analysis = db.query(MarketAnalysis).filter(MarketAnalysis.opportunity_id == opportunity_id).first()
+            if not opportunity or not existing_analysis:
+                return
+            
+            # LLM insights are the expensive tier and outlive the synthesis built around them
+            ai_insights = existing_analysis.ai_analysis if self._insights_fresh(existing_analysis.ai_analysis) else None
+            analysis_data = await service._perform_market_analysis(opportunity, ai_insights)
+            service._save_analysis(opportunity_id, existing_analysis, analysis_data)
+        finally:
+            db.close()
+    
+    def _insights_fresh(self, ai_analysis: Optional[Dict[str, Any]]) -> bool:
+        generated_at = (ai_analysis or {}).get('generated_at')
+        if not generated_at:
+            return False
+        return datetime.utcnow() - datetime.fromisoformat(generated_at) <= INSIGHTS_MAX_AGE
+    
+    def _save_analysis(self, opportunity_id: int, existing_analysis: Optional[MarketAnalysis], analysis_data: Dict[str, Any]) -> None:
         if existing_analysis:
             for key, value in analysis_data.items():
                 if hasattr(existing_analysis, key):
                     setattr(existing_analysis, key, value)
             existing_analysis.updated_at = datetime.utcnow()
         else:
-            analysis_data['opportunity_id'] = opportunity_id
-            analysis = MarketAnalysis(**analysis_data)
+            analysis = MarketAnalysis(opportunity_id=opportunity_id, **analysis_data)
             self.db.add(analysis)
         
         self.db.commit()
-        
-        return analysis_data
     
-    async def _perform_market_analysis(self, opportunity: Opportunity) -> Dict[str, Any]:
-        """Perform comprehensive market analysis"""
+    async def _gather_market_components(self, opportunity: Opportunity) -> Dict[str, Any]:
+        """Awards, competitor profiles, pricing and teaming for the opportunity's NAICS/agency, shared through the component cache"""
+        
+        loaders = {
+            'awards': self._get_historical_awards,
+            'competitors': self._get_competitor_matrix,
+            'pricing': self._get_pricing_benchmarks,
+            'teaming': self._get_teaming_intelligence
+        }
+        
+        components = {}
+        missing = []
+        for component in loaders:
+            entry = get_market_component(component, opportunity.naics_code, opportunity.agency)
+            if entry is not None:
+                components[component] = entry["value"]
+            else:
+                missing.append(component)
         
         # Gather data concurrently
-        tasks = [
-            self._get_historical_awards(opportunity),
-            self._get_competitor_analysis(opportunity),
-            self._get_pricing_benchmarks(opportunity),
-            self._get_teaming_intelligence(opportunity)
-        ]
+        results = await asyncio.gather(*[loaders[component](opportunity) for component in missing], return_exceptions=True)
         
-        historical_awards, competitors, pricing, teaming = await asyncio.gather(*tasks, return_exceptions=True)
+        for component, result in zip(missing, results):
+            # Failures are not cached, so the next analysis retries them
+            if isinstance(result, Exception):
+                components[component] = []
+            else:
+                components[component] = result
+                store_market_component(component, opportunity.naics_code, opportunity.agency, result)
         
-        # Handle exceptions
-        if isinstance(historical_awards, Exception):
-            historical_awards = []
-        if isinstance(competitors, Exception):
-            competitors = []
-        if isinstance(pricing, Exception):
-            pricing = []
-        if isinstance(teaming, Exception):
-            teaming = []
+        return components
+    
+    async def _perform_market_analysis(self, opportunity: Opportunity, ai_insights: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Perform comprehensive market analysis; pass ai_insights to reuse earlier LLM output"""
+        
+        components = await self._gather_market_components(opportunity)
+        return await self._synthesize_market_analysis(opportunity, components, ai_insights)
+    
+    async def _synthesize_market_analysis(
+        self,
+        opportunity: Opportunity,
+        components: Dict[str, Any],
+        ai_insights: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Per-opportunity scoring, assessments and LLM insights over already gathered components"""
+        
+        historical_awards = components['awards']
+        # A failed competitor load falls back to [] like the other components
+        matrix = components['competitors'] or CompetitorFeatureMatrix([])
+        competitors = matrix.rank(opportunity.set_aside, opportunity.place_of_performance)
+        pricing = components['pricing']
+        teaming = components['teaming']
         
         # AI analysis
-        ai_insights = await self._generate_ai_market_insights(
-            opportunity, historical_awards, competitors, pricing, teaming
-        )
+        if ai_insights is None:
+            ai_insights = await self._generate_ai_market_insights(
+                opportunity, historical_awards, competitors, pricing, teaming, competitor_count=len(matrix)
+            )
+        else:
+            # Reused insights stand in for an LLM call; the ledger counts them as cache hits
+            record_usage(f"{type(self).__name__}._generate_ai_market_insights", "gpt-4o-mini", 0.0, cache_hit=True)
         
         # Compile analysis
         analysis = {
-            'total_competitors': len(competitors),
-            'small_business_competitors': len([c for c in competitors if c.get('size_standard') == 'small']),
-            'large_business_competitors': len([c for c in competitors if c.get('size_standard') == 'large']),
-            'competition_level': self._assess_competition_level(len(competitors)),
-            'barrier_to_entry': self._assess_barriers(opportunity, competitors),
+            'total_competitors': len(matrix),
+            'small_business_competitors': matrix.small_count,
+            'large_business_competitors': matrix.large_count,
+            'competition_level': self._assess_competition_level(len(matrix)),
+            'barrier_to_entry': self._assess_barriers(opportunity, matrix),
             'pricing_pressure': self._assess_pricing_pressure(pricing),
             'similar_contracts_count': len(historical_awards),
             'average_award_value': self._calculate_average_value(historical_awards),
             'typical_contract_length': self._calculate_typical_length(historical_awards),
-            'key_competitors': competitors[:10],  # Top 10
+            'key_competitors': competitors,
             'pricing_benchmarks': pricing,
             'ai_analysis': ai_insights,
             'confidence_score': ai_insights.get('confidence_score', 75.0)
@@ -106,13 +181,16 @@ class MarketIntelligenceService:
     async def _get_historical_awards(self, opportunity: Opportunity) -> List[Dict[str, Any]]:
         """Get historical contract awards for similar opportunities"""
         
+        # Awards loaded from FPDS/USAspending archives answer from the local indexes
+        local_awards = self._get_local_awards(opportunity)
+        if local_awards:
+            return local_awards
+        
         try:
             # Search FPDS for similar contracts
             params = {
                 'api_key': os.getenv('SAM_GOV_API_KEY'),
-                'naicsCode': opportunity.naics_code,
-                'limit': 100,
-                'offset': 0
+                'naicsCode': opportunity.naics_code
             }
             
             if opportunity.agency:
@@ -122,75 +200,130 @@ class MarketIntelligenceService:
             if not os.getenv('SAM_GOV_API_KEY'):
                 return self._get_mock_historical_awards(opportunity)
             
-            response = await self.client.get(self.fpds_base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            awards = data.get('results', [])
+            awards = await self._fetch_fpds_awards(params)
             
-            return [self._transform_fpds_award(award) for award in awards]
+            return [transformed for transformed in map(self._transform_fpds_award, awards) if transformed]
             
         except Exception as e:
             print(f"Error fetching historical awards: {e}")
             return self._get_mock_historical_awards(opportunity)
     
-    async def _get_competitor_analysis(self, opportunity: Opportunity) -> List[Dict[str, Any]]:
-        """Analyze potential competitors for this opportunity"""
-        
-        # Get competitors from database who work in this NAICS
-        db_competitors = self.db.query(CompetitorProfile).filter(
-            CompetitorProfile.naics_codes.contains([opportunity.naics_code]),
-            CompetitorProfile.is_active == True
-        ).limit(50).all()
+    async def _fetch_fpds_awards(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Up to MAX_FPDS_PAGES pages of FPDS results; pages after the first are fetched concurrently"""
+        
+        store = ResponseStore()
+        first_page = await fetch_json(self.fpds_base_url, {**params, 'limit': FPDS_PAGE_SIZE, 'offset': 0}, store)
+        awards = list(first_page.get('results', []))
+        
+        total = first_page.get('totalRecords')
+        if total is None:
+            # No count given: a full page may have more behind it
+            total = FPDS_PAGE_SIZE * MAX_FPDS_PAGES if len(awards) == FPDS_PAGE_SIZE else len(awards)
+        pages = min(MAX_FPDS_PAGES, -(-int(total) // FPDS_PAGE_SIZE))
+        
+        # The shared client caps in-flight requests per host, so this does not burst past the API's limits
+        later_pages = await asyncio.gather(*[
+            fetch_json(self.fpds_base_url, {**params, 'limit': FPDS_PAGE_SIZE, 'offset': page * FPDS_PAGE_SIZE}, store)
+            for page in range(1, pages)
+        ], return_exceptions=True)
+        
+        for page in later_pages:
+            if isinstance(page, Exception):
+                print(f"Error fetching FPDS page: {page}")
+                continue
+            awards.extend(page.get('results', []))
+        
+        return awards
+    
+    def _transform_fpds_award(self, award: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """FPDS API award in the shape of a warehouse award"""
         
-        competitors = []
+        mapped = map_award_record(award)
+        if not mapped:
+            return None
         
-        for comp in db_competitors:
-            # Calculate competitor strength
-            strength_score = self._calculate_competitor_strength(comp, opportunity)
-            
-            competitors.append({
-                'company_name': comp.company_name,
-                'size_standard': comp.size_standard,
-                'certifications': comp.certifications or [],
-                'capabilities': comp.capabilities or [],
-                'past_performance_rating': comp.past_performance_rating,
-                'contract_vehicles': comp.contract_vehicles or [],
-                'strength_score': strength_score,
-                'locations': comp.locations or [],
-                'annual_revenue': comp.annual_revenue
-            })
+        return {
+            'contract_number': mapped['contract_number'],
+            'title': mapped['title'],
+            'contractor': mapped['contractor']['company_name'],
+            'total_value': mapped['total_value'],
+            'award_date': mapped['award_date'].isoformat() if mapped['award_date'] else None,
+            'period_of_performance': mapped['period_of_performance'],
+            'agency': mapped['agency'],
+            'naics_code': mapped['naics_code'],
+            'set_aside': mapped['set_aside']
+        }
+    
+    def _get_local_awards(self, opportunity: Opportunity, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent warehouse awards in the opportunity's NAICS, for its agency when that has any"""
         
-        # Sort by strength score
-        competitors.sort(key=lambda x: x.get('strength_score', 0), reverse=True)
+        if not opportunity.naics_code:
+            return []
         
-        return competitors
+        query = self.db.query(ContractAward, CompetitorProfile.company_name).outerjoin(
+            CompetitorProfile, CompetitorProfile.id == ContractAward.contractor_id
+        ).filter(ContractAward.naics_code == opportunity.naics_code)
+        
+        rows = []
+        if opportunity.agency:
+            rows = query.filter(ContractAward.agency == opportunity.agency).order_by(
+                ContractAward.award_date.desc()
+            ).limit(limit).all()
+        if not rows:
+            rows = query.order_by(ContractAward.award_date.desc()).limit(limit).all()
+        
+        return [
+            {
+                'contract_number': award.contract_number,
+                'title': award.title,
+                'contractor': company_name or 'Unknown',
+                'total_value': award.total_value,
+                'award_date': award.award_date.isoformat() if award.award_date else None,
+                'period_of_performance': award.period_of_performance,
+                'agency': award.agency,
+                'naics_code': award.naics_code,
+                'set_aside': award.set_aside
+            }
+            for award, company_name in rows
+        ]
+    
+    async def _get_competitor_matrix(self, opportunity: Opportunity) -> CompetitorFeatureMatrix:
+        """Feature matrix of every competitor in the opportunity's NAICS, scored per opportunity"""
+        return CompetitorScoringService(self.db).load_matrix(opportunity.naics_code)
     
     async def _get_pricing_benchmarks(self, opportunity: Opportunity) -> List[Dict[str, Any]]:
         """Get pricing benchmarks from GSA and historical data"""
         
         try:
-            # Get GSA pricing for similar services
-            gsa_pricing = self.db.query(GSAPricing).filter(
-                GSAPricing.category.ilike(f"%{opportunity.naics_description}%")
-            ).limit(20).all()
+            # GSA labor rates indexed under the NAICS, else ranked by the NAICS description
+            rates_index = GSAPricingIndexService(self.db)
+            rates = rates_index.get_rates(naics_code=opportunity.naics_code) if opportunity.naics_code else None
+            if not (rates and rates['data_points']) and opportunity.naics_description:
+                rates = rates_index.get_rates(query=opportunity.naics_description)
             
             benchmarks = []
             
-            for pricing in gsa_pricing:
+            for labor_category in (rates or {}).get('labor_categories', []):
                 benchmarks.append({
                     'source': 'GSA',
-                    'product_name': pricing.product_name,
-                    'contractor': pricing.contractor_name,
-                    'price': pricing.contract_price,
-                    'unit_of_measure': pricing.unit_of_measure,
-                    'discount_percentage': pricing.discount_percentage,
-                    'effective_date': pricing.effective_date.isoformat() if pricing.effective_date else None
+                    'product_name': labor_category['labor_category'],
+                    'price': labor_category['average_rate'],
+                    'price_range': [labor_category['min_rate'], labor_category['max_rate']],
+                    'unit_of_measure': labor_category['unit_of_measure'],
+                    'discount_percentage': labor_category['discount_percentage'],
+                    'data_points': labor_category['count']
                 })
             
             # Add historical award pricing
-            historical_pricing = await self._get_historical_pricing(opportunity)
-            benchmarks.extend(historical_pricing)
+            recent_awards = PricingStatsService(self.db).get_pricing_intelligence(opportunity.naics_code).get('recent_awards', [])
+            for award in recent_awards:
+                benchmarks.append({
+                    'source': 'FPDS',
+                    'contractor': award['contractor'],
+                    'price': award['value'],
+                    'unit_of_measure': 'contract',
+                    'effective_date': award['award_date']
+                })
             
             return benchmarks
             
@@ -201,33 +334,25 @@ class MarketIntelligenceService:
     async def _get_teaming_intelligence(self, opportunity: Opportunity) -> Dict[str, Any]:
         """Analyze teaming patterns and opportunities"""
         
-        # Get teaming relationships from database
-        teaming_data = self.db.query(TeamingRelationship).join(
-            CompetitorProfile
-        ).filter(
-            CompetitorProfile.naics_codes.contains([opportunity.naics_code])
-        ).limit(100).all()
-        
-        # Analyze patterns
-        prime_sub_patterns = {}
-        frequent_partners = {}
+        graph = TeamingGraphService(self.db).get_graph()
+        central = graph.centrality(opportunity.naics_code)
         
-        for team in teaming_data:
-            prime = team.prime_contractor
-            partner = team.partner.company_name
-            
-            if prime not in prime_sub_patterns:
-                prime_sub_patterns[prime] = []
-            prime_sub_patterns[prime].append(partner)
-            
-            if partner not in frequent_partners:
-                frequent_partners[partner] = 0
-            frequent_partners[partner] += 1
+        # Well-connected companies in the NAICS that already hold awards at the buying agency
+        teaming_opportunities = []
+        for company in central:
+            agency_award_value = graph.agency_award_value(company['company'], opportunity.agency)
+            if agency_award_value > 0:
+                teaming_opportunities.append({**company, 'agency_award_value': agency_award_value})
+            if len(teaming_opportunities) == 5:
+                break
         
         return {
-            'teaming_opportunities': self._identify_teaming_opportunities(opportunity, frequent_partners),
-            'prime_sub_patterns': dict(list(prime_sub_patterns.items())[:10]),
-            'frequent_partners': dict(sorted(frequent_partners.items(), key=lambda x: x[1], reverse=True)[:20])
+            'teaming_opportunities': teaming_opportunities,
+            'prime_sub_patterns': {
+                company['company']: [partner['company'] for partner in graph.top_partners(company['company'], opportunity.naics_code, limit=5)]
+                for company in central[:10]
+            },
+            'frequent_partners': {company['company']: company['teamings'] for company in central[:20]}
         }
     
     async def _generate_ai_market_insights(
@@ -236,9 +361,10 @@ class MarketIntelligenceService:
         historical_awards: List[Dict],
         competitors: List[Dict],
         pricing: List[Dict],
-        teaming: Dict
+        teaming: Dict,
+        competitor_count: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Generate AI-powered market insights"""
+        """Generate AI-powered market insights; competitors is the ranked top, competitor_count the full field"""
         
         # Compile context for AI
         context = {
@@ -251,7 +377,7 @@ class MarketIntelligenceService:
             },
             'market_data': {
                 'historical_awards_count': len(historical_awards),
-                'competitor_count': len(competitors),
+                'competitor_count': competitor_count if competitor_count is not None else len(competitors),
                 'top_competitors': competitors[:5],
                 'pricing_samples': pricing[:10],
                 'teaming_patterns': teaming
@@ -272,7 +398,9 @@ class MarketIntelligenceService:
             )
             
             ai_response = response.choices[0].message.content
-            return self._parse_market_ai_response(ai_response)
+            insights = self._parse_market_ai_response(ai_response)
+            insights['generated_at'] = datetime.utcnow().isoformat()
+            return insights
             
         except Exception as e:
             print(f"AI market analysis failed: {e}")
@@ -283,37 +411,6 @@ class MarketIntelligenceService:
                 'confidence_score': 30.0
             }
     
-    def _calculate_competitor_strength(self, competitor: CompetitorProfile, opportunity: Opportunity) -> float:
-        """Calculate competitor strength score (0-100)"""
-        
-        score = 50.0  # Base score
-        
-        # Past performance bonus
-        if competitor.past_performance_rating:
-            score += (competitor.past_performance_rating - 3) * 10  # 3 is average
-        
-        # Certification match
-        if opportunity.set_aside and competitor.certifications:
-            if opportunity.set_aside in competitor.certifications:
-                score += 20
-        
-        # Contract vehicles
-        if competitor.contract_vehicles:
-            score += len(competitor.contract_vehicles) * 5  # Max 25 points
-        
-        # Size advantage
-        if opportunity.set_aside and competitor.size_standard == 'small':
-            score += 15
-        
-        # Revenue scale (rough proxy for capability)
-        if competitor.annual_revenue:
-            if competitor.annual_revenue > 50000000:  # $50M+
-                score += 10
-            elif competitor.annual_revenue > 10000000:  # $10M+
-                score += 5
-        
-        return min(score, 100.0)
-    
     def _assess_competition_level(self, competitor_count: int) -> str:
         """Assess competition level based on competitor count"""
         if competitor_count < 5:
@@ -325,7 +422,7 @@ class MarketIntelligenceService:
         else:
             return "intense"
     
-    def _assess_barriers(self, opportunity: Opportunity, competitors: List[Dict]) -> str:
+    def _assess_barriers(self, opportunity: Opportunity, competitors: CompetitorFeatureMatrix) -> str:
         """Assess barriers to entry"""
         barriers = 0
         
@@ -338,8 +435,7 @@ class MarketIntelligenceService:
             barriers += 1
         
         # Large competitors dominate
-        large_competitors = len([c for c in competitors if c.get('size_standard') == 'large'])
-        if large_competitors > len(competitors) * 0.7:
+        if competitors.large_count > len(competitors) * 0.7:
             barriers += 1
         
         if barriers >= 3:
@@ -453,18 +549,18 @@ Provide strategic market intelligence focusing on competition, pricing, and stra
                 'confidence_score': 30.0
             }
     
-    def _format_market_analysis(self, analysis: MarketAnalysis) -> Dict[str, Any]:
+    def _format_market_analysis(self, analysis: MarketAnalysis, stale: bool = False, refreshing: bool = False) -> Dict[str, Any]:
         """Format market analysis for API response"""
         return {
             'competition_level': analysis.competition_level,
             'total_competitors': analysis.total_competitors,
+            'barrier_to_entry': analysis.barrier_to_entry,
+            'pricing_pressure': analysis.pricing_pressure,
             'key_competitors': analysis.key_competitors or [],
             'pricing_benchmarks': analysis.pricing_benchmarks or [],
-            'ai_insights': analysis.ai_analysis or {},
+            'ai_analysis': analysis.ai_analysis or {},
             'confidence_score': analysis.confidence_score,
-            'analysis_date': analysis.created_at.isoformat()
-        }
-    
-    async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
\ No newline at end of file
+            'analysis_date': (analysis.updated_at or analysis.created_at).isoformat(),
+            'stale': stale,
+            'refreshing': refreshing
+        }
\ No newline at end of file
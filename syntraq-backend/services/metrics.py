@@ -0,0 +1,124 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Prometheus Metrics & Request Instrumentation
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import time
+from fastapi import Request, Response
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.request_context import (
+    RequestContext, get_request_context, bind_request_context,
+    reset_request_context, resolve_route_template
+)
+from services.query_budget import check_query_budget
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUESTS_TOTAL = Counter(
+    "syntraq_http_requests_total",
+    "HTTP requests served",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "syntraq_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "syntraq_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=TIME_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "syntraq_db_queries_per_request",
+    "Database statements executed per HTTP request",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "syntraq_db_time_per_request_seconds",
+    "Time spent executing database statements per HTTP request",
+    ["method", "route"],
+    buckets=TIME_BUCKETS
+)
+OPENAI_TIME_PER_REQUEST = Histogram(
+    "syntraq_openai_time_per_request_seconds",
+    "Time spent waiting on OpenAI chat completions per HTTP request",
+    ["method", "route"],
+    buckets=TIME_BUCKETS
+)
+OPENAI_CALLS_TOTAL = Counter(
+    "syntraq_openai_calls_total",
+    "OpenAI chat completions issued while serving HTTP requests",
+    ["method", "route"]
+)
+
+async def instrument_request(request: Request, call_next) -> Response:
+    """HTTP middleware: bind the request context and record per-route metrics"""
+
+    context = RequestContext(resolve_route_template(request), request.method)
+    token = bind_request_context(context)
+    labels = (context.method, context.route)
+
+    in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(*labels)
+    in_progress.inc()
+    start_time = time.perf_counter()
+    status_code = 500
+
+    try:
+        response = await call_next(request)
+        check_query_budget(context)
+        status_code = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        reset_request_context(token)
+
+        HTTP_REQUESTS_TOTAL.labels(*labels, str(status_code)).inc()
+        HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start_time)
+        DB_QUERIES_PER_REQUEST.labels(*labels).observe(context.db_query_count)
+        DB_TIME_PER_REQUEST.labels(*labels).observe(context.db_time)
+        OPENAI_TIME_PER_REQUEST.labels(*labels).observe(context.openai_time)
+        if context.openai_calls:
+            OPENAI_CALLS_TOTAL.labels(*labels).inc(context.openai_calls)
+
+def record_openai_call(latency_seconds: float) -> None:
+    """Attribute an OpenAI call to the request being served, if any"""
+
+    context = get_request_context()
+    if context is not None:
+        context.openai_calls += 1
+        context.openai_time += latency_seconds
+
+def install_query_instrumentation(engine: Engine) -> None:
+    """Attach cursor-level timing hooks that attribute DB work to the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("syntraq_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["syntraq_query_start"].pop()
+        request_context = get_request_context()
+        if request_context is not None:
+            request_context.db_query_count += 1
+            request_context.db_time += time.perf_counter() - started
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # after_cursor_execute does not fire for failed statements
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("syntraq_query_start"):
+            conn.info["syntraq_query_start"].pop()
+
+def metrics_response() -> Response:
+    """Render all registered metrics in Prometheus text exposition format"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,125 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Portfolio Reporting
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session, aliased
+
+from models.financial import FinancialProject, ProjectBudget, ProjectStatus
+
+BID_OUTCOME_STATUSES = (ProjectStatus.AWARDED, ProjectStatus.COMPLETED, ProjectStatus.CANCELLED)
+WON_STATUSES = (ProjectStatus.AWARDED, ProjectStatus.COMPLETED)
+
+class PortfolioReportingService:
+    """Portfolio metrics over projects joined to their latest budget in a single statement"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_portfolio_analysis(
+        self,
+        company_id: int,
+        months_back: int = 12,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Portfolio summary, per-project breakdown and margins for projects created in the window"""
+
+        end_date = end_date or datetime.now()
+        start_date = end_date - timedelta(days=30 * months_back)
+
+        rows = self._load_projects(company_id, start_date, end_date)
+
+        total_value = 0.0
+        active_count = 0
+        completed_count = 0
+        total_bids = 0
+        wins = 0
+        margins: Dict[int, float] = {}
+        margin_analysis: List[Dict[str, Any]] = []
+
+        for row in rows:
+            total_value += row.contract_value or row.estimated_value or 0
+            active_count += row.status == ProjectStatus.ACTIVE
+            completed_count += row.status == ProjectStatus.COMPLETED
+            total_bids += row.status in BID_OUTCOME_STATUSES
+            wins += row.status in WON_STATUSES
+
+            if row.budget_id is not None:
+                total_price = row.total_price or 0
+                margin = ((total_price - (row.total_cost or 0)) / total_price * 100) if total_price > 0 else 0
+                margins[row.id] = margin
+                margin_analysis.append({
+                    'project_id': row.id,
+                    'project_name': row.project_name,
+                    'margin': margin,
+                    'total_value': row.total_price
+                })
+
+        return {
+            "period_months": months_back,
+            "portfolio_summary": {
+                "total_projects": len(rows),
+                "total_value": total_value,
+                "active_projects": active_count,
+                "completed_projects": completed_count,
+                "win_rate": (wins / total_bids * 100) if total_bids > 0 else 0,
+                "average_margin": sum(margins.values()) / len(margins) if margins else 0
+            },
+            "project_breakdown": [
+                {
+                    "project_id": row.id,
+                    "project_name": row.project_name,
+                    "status": row.status.value if row.status else None,
+                    "value": row.contract_value or row.estimated_value,
+                    "margin": margins.get(row.id),
+                    "created_date": row.created_at.isoformat() if row.created_at else None
+                }
+                for row in rows
+            ],
+            "margin_analysis": margin_analysis
+        }
+
+    def _load_projects(self, company_id: int, start_date: datetime, end_date: datetime) -> List[Any]:
+        """Projects in the window, each outer-joined to its most recent budget version"""
+
+        # Rank only this company's budgets rather than every budget in the table
+        budget_project = aliased(FinancialProject)
+        latest_budget = self.db.query(
+            ProjectBudget.id.label("budget_id"),
+            ProjectBudget.project_id.label("project_id"),
+            ProjectBudget.total_price.label("total_price"),
+            ProjectBudget.total_cost.label("total_cost"),
+            func.row_number().over(
+                partition_by=ProjectBudget.project_id,
+                order_by=(ProjectBudget.created_at.desc(), ProjectBudget.id.desc())
+            ).label("budget_rank")
+        ).join(
+            budget_project, budget_project.id == ProjectBudget.project_id
+        ).filter(
+            budget_project.created_by == company_id,
+            budget_project.created_at >= start_date
+        ).subquery()
+
+        return self.db.query(
+            FinancialProject.id,
+            FinancialProject.project_name,
+            FinancialProject.status,
+            FinancialProject.contract_value,
+            FinancialProject.estimated_value,
+            FinancialProject.created_at,
+            latest_budget.c.budget_id,
+            latest_budget.c.total_price,
+            latest_budget.c.total_cost
+        ).outerjoin(
+            latest_budget,
+            and_(latest_budget.c.project_id == FinancialProject.id, latest_budget.c.budget_rank == 1)
+        ).filter(
+            FinancialProject.created_by == company_id,
+            FinancialProject.created_at >= start_date,
+            FinancialProject.created_at <= end_date
+        ).order_by(FinancialProject.created_at, FinancialProject.id).all()
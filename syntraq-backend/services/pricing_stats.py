@@ -0,0 +1,265 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Award Pricing Statistics
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import math
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, and_, select
+from sqlalchemy.orm import Session
+
+from models.market_research import CompetitorProfile, ContractAward
+
+PRICING_WINDOW = timedelta(days=365 * 3)
+PRICING_STATS_MAX_AGE = timedelta(hours=1)  # The three-year window moves, so cached stats also expire
+PERCENTILES = (10, 25, 50, 75, 90)
+RECENT_AWARDS = 10
+NUMPY_FETCH_SIZE = 10000
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+SIZE_BUCKETS = (
+    ("Micro Purchase", 0, 100000),
+    ("Small Business", 100000, 500000),
+    ("Medium Contract", 500000, 5000000),
+    ("Large Contract", 5000000, None),
+)
+
+# (naics_code, psc_code) -> {"computed_at", "result"}; cleared whenever the award warehouse loads
+_cache: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+def invalidate_pricing_stats() -> None:
+    with _lock:
+        _cache.clear()
+
+def _supports_window_functions(dialect) -> bool:
+    if dialect.name == "sqlite":
+        return dialect.dbapi.sqlite_version_info >= (3, 25, 0)
+    if dialect.name in ("mysql", "mariadb"):
+        return (dialect.server_version_info or (0,)) >= ((10, 2) if dialect.is_mariadb else (8, 0))
+    return dialect.name in ("postgresql", "mssql", "oracle")
+
+class PricingStatsService:
+    """Count, mean, standard deviation, percentiles and size buckets over every matching award
+
+    PostgreSQL computes everything in one aggregate query (percentile_cont). Other databases with
+    window functions aggregate in SQL and read the percentile rows by rank; anything else streams
+    the award values into NumPy.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_pricing_intelligence(self, naics_code: Optional[str] = None, psc_code: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        key = (naics_code, psc_code)
+        if use_cache:
+            with _lock:
+                cached = _cache.get(key)
+            if cached and datetime.utcnow() - cached["computed_at"] <= PRICING_STATS_MAX_AGE:
+                return cached["result"]
+
+        result = self._compute(naics_code, psc_code)
+
+        with _lock:
+            _cache[key] = {"computed_at": datetime.utcnow(), "result": result}
+        return result
+
+    def _compute(self, naics_code: Optional[str], psc_code: Optional[str]) -> Dict[str, Any]:
+        conditions = [ContractAward.total_value > 0, ContractAward.award_date >= datetime.now() - PRICING_WINDOW]
+        if naics_code:
+            conditions.append(ContractAward.naics_code == naics_code)
+        if psc_code:
+            conditions.append(ContractAward.psc_code == psc_code)
+
+        dialect = self.db.get_bind().dialect
+        if dialect.name == "postgresql":
+            method = "sql"
+            stats, buckets = self._aggregate_postgresql(conditions)
+        elif _supports_window_functions(dialect):
+            method = "window"
+            stats, buckets = self._aggregate_window(conditions)
+        else:
+            method = "numpy"
+            stats, buckets = self._aggregate_numpy(conditions)
+
+        if not stats["count"]:
+            return {
+                "data_points": 0,
+                "pricing_statistics": {},
+                "market_benchmarks": []
+            }
+
+        return {
+            "data_points": stats["count"],
+            "pricing_statistics": {
+                "average": stats["mean"],
+                "median": stats["percentiles"][50],
+                "min": stats["min"],
+                "max": stats["max"],
+                **{f"percentile_{p}": stats["percentiles"][p] for p in PERCENTILES if p != 50},
+                "std_deviation": stats["std"]
+            },
+            "market_benchmarks": [
+                {
+                    "category": label,
+                    "count": count,
+                    "average_value": total / count,
+                    "value_range": f"${low:,.0f} - ${high:,.0f}" if high is not None else f"${low:,.0f}+"
+                }
+                for (label, low, high), (count, total) in zip(SIZE_BUCKETS, buckets)
+                if count
+            ],
+            "recent_awards": self._recent_awards(conditions),
+            "computation": method
+        }
+
+    def _bucket_columns(self) -> List[Any]:
+        value = ContractAward.total_value
+        columns = []
+        for _, low, high in SIZE_BUCKETS:
+            in_bucket = value >= low if high is None else and_(value >= low, value < high)
+            columns += [func.count(case((in_bucket, 1))), func.coalesce(func.sum(case((in_bucket, value))), 0.0)]
+        return columns
+
+    def _aggregate_postgresql(self, conditions: List[Any]) -> Tuple[Dict[str, Any], List[Tuple[int, float]]]:
+        value = ContractAward.total_value
+        row = self.db.query(
+            func.count(value), func.avg(value), func.stddev_pop(value), func.min(value), func.max(value),
+            *[func.percentile_cont(p / 100).within_group(value.asc()) for p in PERCENTILES],
+            *self._bucket_columns()
+        ).filter(*conditions).one()
+
+        count = row[0]
+        offset = 5 + len(PERCENTILES)
+        stats = {
+            "count": count,
+            "mean": float(row[1] or 0.0),
+            "std": float(row[2] or 0.0),
+            "min": row[3],
+            "max": row[4],
+            "percentiles": {p: float(v) if v is not None else None for p, v in zip(PERCENTILES, row[5:offset])}
+        }
+        buckets = [(row[i], float(row[i + 1])) for i in range(offset, len(row), 2)]
+        return stats, buckets
+
+    def _aggregate_window(self, conditions: List[Any]) -> Tuple[Dict[str, Any], List[Tuple[int, float]]]:
+        value = ContractAward.total_value
+        row = self.db.query(
+            func.count(value), func.avg(value), func.min(value), func.max(value), *self._bucket_columns()
+        ).filter(*conditions).one()
+
+        count = row[0]
+        buckets = [(row[i], float(row[i + 1])) for i in range(4, len(row), 2)]
+        stats = {"count": count, "mean": float(row[1] or 0.0), "std": 0.0, "min": row[2], "max": row[3], "percentiles": {}}
+        if not count:
+            return stats, buckets
+
+        # Second pass around the mean; E[x^2] - E[x]^2 loses precision at contract-value magnitudes
+        variance = self.db.query(func.avg((value - stats["mean"]) * (value - stats["mean"]))).filter(*conditions).scalar()
+        stats["std"] = math.sqrt(max(float(variance or 0.0), 0.0))
+
+        # Linear interpolation between closest ranks, matching percentile_cont and numpy.percentile
+        positions = {p: p / 100 * (count - 1) for p in PERCENTILES}
+        wanted = {math.floor(k) + 1 for k in positions.values()} | {math.ceil(k) + 1 for k in positions.values()}
+
+        ranked = self.db.query(
+            value.label("value"),
+            func.row_number().over(order_by=value).label("position")
+        ).filter(*conditions).subquery()
+        values_at = dict(self.db.query(ranked.c.position, ranked.c.value).filter(ranked.c.position.in_(wanted)).all())
+
+        for p, k in positions.items():
+            lower = values_at[math.floor(k) + 1]
+            upper = values_at[math.ceil(k) + 1]
+            stats["percentiles"][p] = lower + (upper - lower) * (k - math.floor(k))
+
+        return stats, buckets
+
+    def _aggregate_numpy(self, conditions: List[Any]) -> Tuple[Dict[str, Any], List[Tuple[int, float]]]:
+        result = self.db.execute(
+            select(ContractAward.total_value).where(*conditions).execution_options(yield_per=NUMPY_FETCH_SIZE)
+        )
+        values = np.fromiter((row[0] for row in result), dtype=float)
+        return self._numpy_stats(values)
+
+    @staticmethod
+    def _numpy_stats(values: np.ndarray) -> Tuple[Dict[str, Any], List[Tuple[int, float]]]:
+        if not values.size:
+            return {"count": 0}, []
+
+        stats = {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+        }
+
+        edges = [low for _, low, _ in SIZE_BUCKETS[1:]]
+        bucket = np.digitize(values, edges)
+        counts = np.bincount(bucket, minlength=len(SIZE_BUCKETS))
+        totals = np.bincount(bucket, weights=values, minlength=len(SIZE_BUCKETS))
+        return stats, [(int(c), float(t)) for c, t in zip(counts, totals)]
+
+    def _recent_awards(self, conditions: List[Any]) -> List[Dict[str, Any]]:
+        rows = self.db.query(ContractAward, CompetitorProfile.company_name).outerjoin(
+            CompetitorProfile, CompetitorProfile.id == ContractAward.contractor_id
+        ).filter(*conditions).order_by(ContractAward.award_date.desc()).limit(RECENT_AWARDS).all()
+
+        return [
+            {
+                "contractor": company_name or "Unknown",
+                "value": award.total_value,
+                "award_date": award.award_date.isoformat(),
+                "agency": award.agency
+            }
+            for award, company_name in rows
+        ]
+
+def _benchmark(awards: int = 50000, seed: int = 3) -> None:
+    """python -m services.pricing_stats: time the window and NumPy paths on sqlite"""
+
+    import time
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from services.award_warehouse import ensure_award_warehouse
+
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    db = sessionmaker(bind=engine)()
+
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(13, 1.6, awards)
+    now = datetime.now()
+    db.execute(insert(ContractAward), [
+        {
+            "contract_number": f"BENCH-{i}",
+            "naics_code": "541512" if i % 3 else "541511",
+            "total_value": float(v),
+            "award_date": now - timedelta(days=int(i % 1000))
+        }
+        for i, v in enumerate(values)
+    ])
+    db.commit()
+
+    service = PricingStatsService(db)
+    conditions = [ContractAward.total_value > 0, ContractAward.naics_code == "541512"]
+
+    start_time = time.perf_counter()
+    window_stats, _ = service._aggregate_window(conditions)
+    window_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    service._aggregate_numpy(conditions)
+    numpy_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"{window_stats['count']} awards: window path {window_ms:.0f} ms, numpy path {numpy_ms:.0f} ms")
+
+if __name__ == "__main__":
+    _benchmark()
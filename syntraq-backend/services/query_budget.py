@@ -0,0 +1,120 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - N+1 Query Detector & Per-Request Query Budget
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from dotenv import load_dotenv
+
+from services.request_context import RequestContext, get_request_context
+
+load_dotenv()
+
+# off: no tracking (production), log: print offending requests, raise: fail the request (CI)
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
+DEFAULT_QUERY_BUDGET = int(os.getenv("QUERY_BUDGET_DEFAULT", "25"))
+REPEATED_STATEMENT_LIMIT = int(os.getenv("QUERY_BUDGET_REPEAT_LIMIT", "5"))
+
+# Per-route overrides keyed by "METHOD /route/template"
+ROUTE_QUERY_BUDGETS: Dict[str, int] = {
+    # Plan creation writes the plan and one allocation row per assigned resource
+    "POST /api/resources/delivery-plans": 60,
+    # Set-based reports: one grouped query each; the rest leaves room for the current user
+    # lookup, which the tests override and so never count
+    "GET /api/resources/resource-utilization": 5,
+    "GET /api/financial/reporting/portfolio-analysis": 5,
+    # Contacts are joined into the page query
+    "GET /api/communications/communications": 5,
+    # Market research reads come from a few set-based queries even with every cache cold
+    "GET /api/market-research/competitors": 5,
+    "GET /api/market-research/pricing-intelligence": 8,
+    "GET /api/market-research/gsa-rates": 8,
+    "GET /api/market-research/market-trends": 5,
+    # A cold teaming graph loads its snapshot and folds in rows changed since it was saved
+    "GET /api/market-research/teaming/partners": 12,
+    "GET /api/market-research/teaming/paths": 12,
+    "GET /api/market-research/teaming/centrality": 12,
+    # Ledger files stream from one query and import in one lookup and one write per batch
+    "GET /api/financial/ledger/{ledger}/export": 5,
+    "POST /api/financial/ledger/{ledger}/import": 10,
+    # Imports and rebuilds write in batches, so their cost follows the batch count, not the rows
+    "POST /api/admin/award-warehouse/import": 15,
+    "POST /api/admin/award-warehouse/rebuild-cube": 5,
+    "POST /api/admin/competitor-index/rebuild": 10,
+    "POST /api/admin/gsa-pricing/import": 15,
+    "POST /api/admin/gsa-pricing/rebuild-index": 10,
+    "POST /api/admin/teaming-graph/rebuild": 12,
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+class QueryBudgetExceeded(Exception):
+    """Raised in raise mode when a request exceeds its query budget or shows an N+1 pattern"""
+
+def normalize_statement(statement: str) -> str:
+    """Collapse literals and parameter lists so repeated per-row statements group together"""
+
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PARAM_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+def install_query_budget(engine: Engine) -> None:
+    """Record normalized statements per request when the budget mode is enabled"""
+
+    if QUERY_BUDGET_MODE not in ("log", "raise"):
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        request_context = get_request_context()
+        if request_context is None:
+            return
+        if request_context.statement_counts is None:
+            request_context.statement_counts = Counter()
+        request_context.statement_counts[normalize_statement(statement)] += 1
+
+def get_route_budget(method: str, route: str) -> int:
+    return ROUTE_QUERY_BUDGETS.get(f"{method} {route}", DEFAULT_QUERY_BUDGET)
+
+def find_budget_violations(context: RequestContext) -> Tuple[int, int, List[Tuple[str, int]]]:
+    """Return (total statements, budget, repeated statements over the repeat limit)"""
+
+    counts = context.statement_counts or Counter()
+    # Only repeated reads indicate N+1 loading; batched writes legitimately repeat an INSERT
+    repeated = [
+        (statement, count) for statement, count in counts.most_common()
+        if count > REPEATED_STATEMENT_LIMIT and statement.upper().startswith("SELECT")
+    ]
+    return sum(counts.values()), get_route_budget(context.method, context.route), repeated
+
+def check_query_budget(context: RequestContext) -> None:
+    """Log or raise when the finished request went over budget or repeated a statement per row"""
+
+    if QUERY_BUDGET_MODE not in ("log", "raise") or context.statement_counts is None:
+        return
+
+    total, budget, repeated = find_budget_violations(context)
+    if total <= budget and not repeated:
+        return
+
+    lines = [f"{context.method} {context.route} executed {total} statements (budget {budget})"]
+    for statement, count in repeated:
+        lines.append(f"  {count}x {statement[:200]}")
+    message = "\n".join(lines)
+
+    if QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+
+    print(f"⚠️ Query budget exceeded: {message}")
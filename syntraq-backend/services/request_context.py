@@ -0,0 +1,52 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Request Context
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from contextvars import ContextVar, Token
+from typing import Optional
+from starlette.requests import Request
+from starlette.routing import Match
+
+UNMATCHED_ROUTE = "unmatched"
+
+class RequestContext:
+    """Per-request state shared between the HTTP middleware and instrumentation hooks"""
+
+    def __init__(self, route: str, method: str):
+        self.route = route
+        self.method = method
+
+        # Work attributed to this request by the SQLAlchemy and OpenAI hooks
+        self.db_query_count = 0
+        self.db_time = 0.0
+        self.openai_calls = 0
+        self.openai_time = 0.0
+
+        # Normalized statement -> count, populated only when the query budget is enabled
+        self.statement_counts = None
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("syntraq_request_context", default=None)
+
+def get_request_context() -> Optional[RequestContext]:
+    """Return the context of the request being served, if any"""
+    return _current_request.get()
+
+def bind_request_context(context: RequestContext) -> Token:
+    return _current_request.set(context)
+
+def reset_request_context(token: Token) -> None:
+    _current_request.reset(token)
+
+def resolve_route_template(request: Request) -> str:
+    """Resolve the route template (e.g. /api/financial/projects/{project_id}) for a request"""
+
+    # Match against the router up front so labels stay low-cardinality
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+
+    return UNMATCHED_ROUTE
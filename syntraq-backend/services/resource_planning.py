@@ -1,16 +1,19 @@
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import json
 from collections import defaultdict
 
 from models.resources import (
     Employee, ExternalResource, DeliveryPlan, ResourceAllocation,
     TimeEntry, DeliveryStatusUpdate, ResourceCapacityPlan,
-    SkillLevel, ResourceType, AllocationStatus
+    SkillLevel, ResourceType
 )
 from models.financial import FinancialProject
 from services.ai_service import AIService
+from services.availability import AvailabilityEngine, PLANNING_STATUSES
+from services.assignment_solver import AssignmentSolver
+from services.skills_index import SkillIndexService, normalize_skill
 
 class ResourcePlanningService:
     """AI-powered resource planning and delivery management"""
@@ -50,7 +53,7 @@ class ResourcePlanningService:
             milestones=optimized_plan['milestones'],
             total_effort_hours=optimized_plan['total_effort_hours'],
             peak_team_size=optimized_plan['peak_team_size'],
-            required_skills=optimized_plan['required_skills'],
+            required_skills=optimized_plan.get('required_skills', []),
             risks=optimized_plan.get('risks', []),
             assumptions=optimized_plan.get('assumptions', []),
             delivery_methodology=optimized_plan.get('methodology', 'Agile'),
@@ -137,7 +140,13 @@ class ResourcePlanningService:
             # Return plan with basic optimizations
             return self._apply_basic_optimizations(plan_data, available_resources)
     
-    async def _get_available_resources(self, user_id: int, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    async def _get_available_resources(
+        self,
+        user_id: int,
+        start_date: str,
+        end_date: str,
+        exclude_delivery_plan_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """Get available internal and external resources"""
         
         start_dt = datetime.fromisoformat(start_date) if start_date else datetime.now()
@@ -157,12 +166,17 @@ class ResourcePlanningService:
             ExternalResource.is_vetted == True
         ).all()
         
+        # Committed allocations for the whole company are loaded once and swept per resource
+        availability = AvailabilityEngine(self.db)
+        employee_utilization = availability.get_employee_utilization(user_id, start_dt, end_dt, exclude_delivery_plan_id)
+        external_utilization = availability.get_external_utilization(user_id, start_dt, end_dt, exclude_delivery_plan_id)
+        
         available_resources = []
         
         # Process internal employees
         for emp in employees:
             # Calculate availability
-            current_allocations = self._calculate_current_utilization(emp.id, start_dt, end_dt)
+            current_allocations = employee_utilization.get(emp.id, 0.0)
             available_capacity = emp.max_utilization_percentage - current_allocations
             
             if available_capacity > 10:  # At least 10% available
@@ -182,7 +196,7 @@ class ResourcePlanningService:
         
         # Process external resources
         for ext in external_resources:
-            if self._is_external_resource_available(ext, start_dt, end_dt):
+            if self._is_external_resource_available(ext, start_dt, end_dt, external_utilization.get(ext.id, 0.0)):
                 available_resources.append({
                     'id': ext.id,
                     'type': 'external',
@@ -242,7 +256,7 @@ class ResourcePlanningService:
         return allocations
     
     async def optimize_resource_allocation(self, delivery_plan_id: int, user_id: int) -> Dict[str, Any]:
-        """Optimize existing resource allocation using AI"""
+        """Re-solve the plan's role assignments for minimum cost; AI only narrates the result"""
         
         delivery_plan = self.db.query(DeliveryPlan).filter(
             DeliveryPlan.id == delivery_plan_id,
@@ -252,25 +266,72 @@ class ResourcePlanningService:
         if not delivery_plan:
             raise ValueError("Delivery plan not found")
         
-        # Get current allocations
-        current_allocations = self.db.query(ResourceAllocation).filter(
-            ResourceAllocation.delivery_plan_id == delivery_plan_id
+        # Get current allocations with their assignees in one query
+        current_allocations = self.db.query(ResourceAllocation).options(
+            joinedload(ResourceAllocation.employee),
+            joinedload(ResourceAllocation.external_resource)
+        ).filter(
+            ResourceAllocation.delivery_plan_id == delivery_plan_id,
+            ResourceAllocation.status.in_(PLANNING_STATUSES)
         ).all()
         
-        # Get available resources
+        # Get available resources, not counting capacity this plan already holds
         available_resources = await self._get_available_resources(
             user_id, 
             delivery_plan.project_start_date.isoformat(), 
-            delivery_plan.project_end_date.isoformat()
+            delivery_plan.project_end_date.isoformat(),
+            exclude_delivery_plan_id=delivery_plan_id
         )
         
-        # Analyze current performance
-        performance_data = await self._analyze_current_performance(delivery_plan_id)
+        # Each current allocation is a role; replacements must hold at least the incumbent's clearance
+        roles = []
+        for alloc in current_allocations:
+            incumbent = alloc.employee or alloc.external_resource
+            roles.append({
+                'role': alloc.role_title,
+                'required_skills': alloc.required_skills or [],
+                'allocation_percentage': alloc.allocation_percentage,
+                'estimated_hours': alloc.estimated_hours,
+                'security_clearance': incumbent.security_clearance if incumbent else None
+            })
+        
+        solution = AssignmentSolver().solve(roles, available_resources)
         
-        # AI optimization
-        optimization_suggestions = await self._ai_optimize_allocations(
-            current_allocations, available_resources, performance_data, delivery_plan
+        current_cost = sum((alloc.estimated_hours or 0) * (alloc.hourly_rate or 0) for alloc in current_allocations)
+        solved_roles = {a['role_index'] for a in solution['assignments']}
+        # Roles the solver could not fill keep their incumbent, so savings compare like for like
+        retained_cost = sum(
+            (alloc.estimated_hours or 0) * (alloc.hourly_rate or 0)
+            for index, alloc in enumerate(current_allocations) if index not in solved_roles
         )
+        cost_savings = current_cost - (solution['total_cost'] + retained_cost)
+        
+        changes = []
+        for assignment in solution['assignments']:
+            alloc = current_allocations[assignment['role_index']]
+            current_id = alloc.employee_id if assignment['type'] == 'internal' else alloc.external_resource_id
+            if current_id != assignment['resource_id']:
+                changes.append({
+                    'allocation_id': alloc.id,
+                    'role': alloc.role_title,
+                    'current_resource_id': alloc.employee_id or alloc.external_resource_id,
+                    'proposed_resource_id': assignment['resource_id'],
+                    'proposed_resource_type': assignment['type'],
+                    'proposed_name': assignment['name'],
+                    'current_cost': round((alloc.estimated_hours or 0) * (alloc.hourly_rate or 0), 2),
+                    'proposed_cost': assignment['estimated_cost'],
+                    'skill_match': assignment['skill_match']
+                })
+        
+        optimization_suggestions = {
+            'assignments': solution['assignments'],
+            'unassigned_roles': solution['unassigned'],
+            'changes': changes,
+            'cost_savings': round(cost_savings, 2),
+            'efficiency_gain': round(cost_savings / current_cost * 100, 2) if current_cost > 0 else 0,
+            'average_skill_match': solution['average_skill_match']
+        }
+        optimization_suggestions['narrative'] = await self._narrate_allocation_plan(delivery_plan, optimization_suggestions)
         
         return {
             'current_allocations': len(current_allocations),
@@ -279,6 +340,37 @@ class ResourcePlanningService:
             'efficiency_improvement': optimization_suggestions.get('efficiency_gain', 0)
         }
     
+    async def _narrate_allocation_plan(self, delivery_plan: DeliveryPlan, suggestions: Dict[str, Any]) -> str:
+        """Explain a solved allocation in plain language; the assignments themselves are not changed"""
+        
+        summary = {
+            'plan': delivery_plan.plan_name,
+            'changes': suggestions['changes'][:20],
+            'unassigned_roles': suggestions['unassigned_roles'][:20],
+            'cost_savings': suggestions['cost_savings'],
+            'average_skill_match': suggestions['average_skill_match']
+        }
+        
+        try:
+            response = await self.ai_service.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are a delivery manager. Explain resource reassignments concisely for an executive. Do not propose different assignments."},
+                    {"role": "user", "content": f"Summarize this optimized staffing plan in 3-5 sentences:\n{json.dumps(summary, indent=2)}"}
+                ],
+                temperature=0.2,
+                max_tokens=400
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            print(f"AI allocation narration failed: {e}")
+            return (
+                f"{len(suggestions['changes'])} reassignment(s) proposed with estimated savings of "
+                f"${suggestions['cost_savings']:,.0f}; {len(suggestions['unassigned_roles'])} role(s) have no qualified available resource."
+            )
+    
     async def generate_capacity_plan(self, user_id: int, planning_period_months: int = 12) -> Dict[str, Any]:
         """Generate comprehensive resource capacity plan"""
         
@@ -296,12 +388,16 @@ class ResourcePlanningService:
             ExternalResource.is_active == True
         ).all()
         
-        # Calculate capacity metrics
-        total_internal_hours = sum(emp.standard_hours_per_week * 52 * (planning_period_months / 12) for emp in employees)
-        
         # Get current and planned allocations
-        current_allocations = self._get_allocations_in_period(user_id, start_date, end_date)
-        total_allocated_hours = sum(alloc.estimated_hours for alloc in current_allocations)
+        availability = AvailabilityEngine(self.db)
+        current_allocations = availability.get_allocations_in_period(user_id, start_date, end_date)
+        
+        # Calculate capacity metrics from the day-by-day timeline so only the part of each allocation inside the period counts
+        timeline = availability.build_employee_timeline(
+            user_id, start_date, end_date, employees=employees, allocations=current_allocations
+        )
+        total_internal_hours, total_allocated_hours = timeline.total_hours()
+        weekly_capacity = timeline.weekly_capacity()
         
         utilization_percentage = (total_allocated_hours / total_internal_hours * 100) if total_internal_hours > 0 else 0
         
@@ -337,10 +433,65 @@ class ResourcePlanningService:
             'utilization_percentage': utilization_percentage,
             'available_hours': total_internal_hours,
             'allocated_hours': total_allocated_hours,
+            'weekly_capacity': weekly_capacity,
             'skill_gaps': skill_gaps,
             'ai_insights': capacity_insights
         }
     
+    def get_capacity_timeline(self, user_id: int, planning_period_months: int = 6, granularity: str = "week") -> Dict[str, Any]:
+        """Available vs. allocated hours per day or week over the planning period"""
+        
+        start_date = datetime.now()
+        end_date = start_date + timedelta(days=30 * planning_period_months)
+        
+        availability = AvailabilityEngine(self.db)
+        timeline = availability.build_employee_timeline(user_id, start_date, end_date, statuses=PLANNING_STATUSES)
+        total_available, total_allocated = timeline.total_hours()
+        
+        return {
+            'start_date': start_date.date().isoformat(),
+            'end_date': end_date.date().isoformat(),
+            'granularity': granularity,
+            'buckets': timeline.daily_capacity() if granularity == "day" else timeline.weekly_capacity(),
+            'total_available_hours': round(total_available, 2),
+            'total_allocated_hours': round(total_allocated, 2)
+        }
+    
+    def find_free_employees(
+        self,
+        user_id: int,
+        min_free_percentage: float,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Dict[str, Any]]:
+        """Employees with at least min_free_percentage headroom on every day between the dates"""
+        
+        employees = self.db.query(Employee).filter(
+            Employee.company_id == user_id,
+            Employee.is_active == True,
+            Employee.is_available == True
+        ).all()
+        
+        availability = AvailabilityEngine(self.db)
+        timeline = availability.build_employee_timeline(user_id, start_date, end_date, employees=employees)
+        employees_by_id = {emp.id: emp for emp in employees}
+        
+        free_employees = []
+        for entry in timeline.free_resources(min_free_percentage):
+            emp = employees_by_id.get(entry['resource_id'])
+            if not emp:
+                continue  # Allocated but inactive or unavailable
+            free_employees.append({
+                'id': emp.id,
+                'name': f"{emp.first_name} {emp.last_name}",
+                'position': emp.position_title,
+                'skills': emp.primary_skills or [],
+                'peak_allocation': entry['peak_allocation'],
+                'free_percentage': entry['free_percentage']
+            })
+        
+        return free_employees
+    
     async def track_delivery_progress(self, delivery_plan_id: int, user_id: int) -> Dict[str, Any]:
         """Track and analyze delivery progress"""
         
@@ -381,20 +532,89 @@ class ResourcePlanningService:
             'last_update': latest_update.update_date.isoformat() if latest_update else None
         }
     
-    def _calculate_current_utilization(self, employee_id: int, start_date: datetime, end_date: datetime) -> float:
-        """Calculate current utilization percentage for employee"""
-        
-        allocations = self.db.query(ResourceAllocation).filter(
-            ResourceAllocation.employee_id == employee_id,
-            ResourceAllocation.start_date <= end_date,
-            ResourceAllocation.end_date >= start_date,
-            ResourceAllocation.status.in_([AllocationStatus.CONFIRMED, AllocationStatus.ACTIVE])
-        ).all()
+    async def _analyze_skill_gaps(self, user_id: int, allocations: List[ResourceAllocation]) -> List[Dict[str, Any]]:
+        """Compare skills demanded by allocations in the period with skills held by the team"""
+        
+        demand = defaultdict(int)
+        for alloc in allocations:
+            for skill in alloc.required_skills or []:
+                demand[normalize_skill(skill)] += 1
+        
+        skill_matrix = SkillIndexService(self.db).get_matrix(user_id)
+        
+        skill_gaps = []
+        for skill, required in demand.items():
+            available = skill_matrix.holder_count(skill)
+            if required > available:
+                skill_gaps.append({
+                    'skill': skill,
+                    'required': required,
+                    'available': available,
+                    'shortfall': required - available
+                })
+        
+        skill_gaps.sort(key=lambda gap: gap['shortfall'], reverse=True)
+        return skill_gaps
+    
+    async def _ai_analyze_capacity(
+        self,
+        employees: List[Employee],
+        external_resources: List[ExternalResource],
+        allocations: List[ResourceAllocation],
+        skill_gaps: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """AI recommendations on hiring, training and capacity optimization"""
+        
+        context = {
+            'internal_headcount': len(employees),
+            'external_resources': len(external_resources),
+            'active_allocations': len(allocations),
+            'skill_gaps': skill_gaps[:15]
+        }
+        
+        prompt = f"""Analyze this government contractor's resource capacity and recommend actions:
+
+{json.dumps(context, indent=2)}
+
+Respond in JSON format:
+{{
+    "recommended_hires": [{{"role": "Role title", "count": 1, "reason": "Why"}}],
+    "training_needs": [{{"skill": "Skill", "employees": 2, "reason": "Why"}}],
+    "optimization_suggestions": ["Suggestion 1"],
+    "demand_forecast": {{"summary": "Expected demand trend"}},
+    "supply_forecast": {{"summary": "Expected supply trend"}}
+}}"""
         
-        total_allocation = sum(alloc.allocation_percentage for alloc in allocations)
-        return min(total_allocation, 100.0)  # Cap at 100%
+        try:
+            response = await self.ai_service.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": "You are an expert resource manager for government contracting firms."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=1500
+            )
+            
+            return self._parse_ai_delivery_response(response.choices[0].message.content)
+            
+        except Exception as e:
+            print(f"AI capacity analysis failed: {e}")
+            return {
+                'recommended_hires': [{'role': gap['skill'], 'count': gap['shortfall'], 'reason': 'Skill shortfall'} for gap in skill_gaps[:5]],
+                'training_needs': [],
+                'optimization_suggestions': ['Manual capacity review recommended'],
+                'demand_forecast': {},
+                'supply_forecast': {}
+            }
     
-    def _is_external_resource_available(self, resource: ExternalResource, start_date: datetime, end_date: datetime) -> bool:
+    def _is_external_resource_available(
+        self,
+        resource: ExternalResource,
+        start_date: datetime,
+        end_date: datetime,
+        current_allocation: float
+    ) -> bool:
         """Check if external resource is available for period"""
         
         if resource.available_start_date and resource.available_start_date > end_date:
@@ -403,16 +623,7 @@ class ResourcePlanningService:
         if resource.available_end_date and resource.available_end_date < start_date:
             return False
         
-        # Check existing allocations
-        existing_allocations = self.db.query(ResourceAllocation).filter(
-            ResourceAllocation.external_resource_id == resource.id,
-            ResourceAllocation.start_date <= end_date,
-            ResourceAllocation.end_date >= start_date,
-            ResourceAllocation.status.in_([AllocationStatus.CONFIRMED, AllocationStatus.ACTIVE])
-        ).all()
-        
-        total_allocation = sum(alloc.allocation_percentage for alloc in existing_allocations)
-        return total_allocation < 80  # Available if less than 80% allocated
+        return current_allocation < 80  # Available if less than 80% allocated
     
     def _generate_default_work_packages(self, plan_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate default work breakdown structure"""
@@ -534,40 +745,48 @@ class ResourcePlanningService:
     def _generate_resource_plan(self, optimized_plan: Dict[str, Any], available_resources: List[Dict]) -> Dict[str, Any]:
         """Generate resource allocation plan"""
         
-        # Simple resource allocation based on available resources
-        allocations = []
-        total_hours = optimized_plan.get('total_effort_hours', 2000)
-        duration_days = optimized_plan.get('duration_days', 169)
+        total_hours = optimized_plan.get('total_effort_hours') or 2000
+        duration_days = optimized_plan.get('duration_days') or 169
+        team_size = max(optimized_plan.get('peak_team_size') or 5, 1)
+        required_skills = optimized_plan.get('required_skills') or []
         
-        # Allocate based on skills and availability
-        hours_allocated = 0
+        # Spread the effort evenly over the team, bounded so no role books someone full time
+        working_days = duration_days * 0.7  # Assume 70% working days
+        allocation_percentage = min(max(total_hours / (team_size * working_days * 8) * 100, 20), 80) if working_days > 0 else 80
+        role_hours = working_days * 8 * (allocation_percentage / 100)
         
-        for resource in available_resources[:optimized_plan.get('peak_team_size', 5)]:
-            allocation_percentage = min(resource.get('available_capacity', 50), 80)
-            
-            # Calculate hours for this resource
-            working_days = duration_days * 0.7  # Assume 70% working days
-            hours_per_day = 8 * (allocation_percentage / 100)
-            resource_hours = working_days * hours_per_day
-            
+        # Required skills are dealt round-robin across team roles
+        roles = [
+            {
+                'role': 'Team Member',
+                'required_skills': required_skills[index::team_size],
+                'allocation_percentage': allocation_percentage,
+                'estimated_hours': role_hours,
+                'security_clearance': optimized_plan.get('required_clearance')
+            }
+            for index in range(team_size)
+        ]
+        
+        solution = AssignmentSolver().solve(roles, available_resources)
+        resources_by_key = {(r['type'], r['id']): r for r in available_resources}
+        
+        allocations = []
+        for assignment in solution['assignments']:
+            resource = resources_by_key[(assignment['type'], assignment['resource_id'])]
+            role = roles[assignment['role_index']]
             allocations.append({
                 'resource_id': resource['id'],
                 'type': resource['type'],
-                'role': resource.get('position', 'Team Member'),
+                'role': resource.get('position') or role['role'],
                 'start_date': optimized_plan.get('start_date'),
                 'end_date': optimized_plan.get('end_date'),
                 'allocation_percentage': allocation_percentage,
-                'estimated_hours': resource_hours,
-                'hourly_rate': resource.get('hourly_rate', 100),
-                'required_skills': resource.get('skills', [])
+                'estimated_hours': role_hours,
+                'hourly_rate': assignment['hourly_rate'],
+                'required_skills': role['required_skills'] or resource.get('skills', [])
             })
-            
-            hours_allocated += resource_hours
-            
-            if hours_allocated >= total_hours:
-                break
         
-        return {'allocations': allocations}
+        return {'allocations': allocations, 'unassigned_roles': len(solution['unassigned'])}
     
     def _get_delivery_planning_system_prompt(self) -> str:
         """System prompt for delivery planning AI"""
@@ -649,4 +868,10 @@ Focus on realistic timelines, efficient resource utilization, and risk mitigatio
         working_days = optimized['duration_days'] * 0.7
         optimized['total_effort_hours'] = team_size * working_days * 6  # 6 hours/day average
         
+        # Fill the rest of the plan locally so creation does not depend on the AI response
+        optimized.setdefault('work_packages', self._generate_default_work_packages(plan_data))
+        optimized.setdefault('deliverables', self._generate_default_deliverables(plan_data))
+        optimized.setdefault('milestones', self._generate_default_milestones(plan_data))
+        optimized.setdefault('resource_plan', self._generate_resource_plan(optimized, available_resources))
+        
         return optimized
\ No newline at end of file
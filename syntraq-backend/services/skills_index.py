@@ -0,0 +1,285 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Skill Dictionary & Employee Skill Index
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import re
+import threading
+import numpy as np
+from typing import Dict, List, Any, Iterable, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.resources import Employee, Skill, EmployeeSkill, DeliveryPlan
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Writes drop the matrix only in the process that made them, so other workers see them once it expires
+MATRIX_MAX_AGE = timedelta(minutes=5)
+
+# company_id -> {"computed_at", "matrix"}; dropped whenever an employee of the company is written
+_matrices: Dict[int, Dict[str, Any]] = {}
+_matrices_lock = threading.Lock()
+
+def normalize_skill(name: str) -> str:
+    return _WHITESPACE.sub(" ", str(name)).strip().lower()
+
+def invalidate_skill_matrix(company_id: int) -> None:
+    with _matrices_lock:
+        _matrices.pop(company_id, None)
+
+class SkillMatrix:
+    """Employee x skill bitsets for one company: bit i of a skill's mask is set when employee_ids[i] holds it"""
+
+    def __init__(self, rows: Iterable[Tuple[int, int, bool, str, str]]):
+        """Build from (employee_id, skill_id, is_primary, normalized name, display name) rows"""
+
+        rows = list(rows)
+        self.employee_ids = sorted({row[0] for row in rows})
+        employee_bits = {employee_id: bit for bit, employee_id in enumerate(self.employee_ids)}
+
+        self.display_names: Dict[int, str] = {}
+        self.skill_ids: Dict[str, int] = {}
+        primary_bits = defaultdict(list)
+        secondary_bits = defaultdict(list)
+
+        for employee_id, skill_id, is_primary, name, display_name in rows:
+            self.display_names[skill_id] = display_name or name
+            self.skill_ids[name] = skill_id
+            (primary_bits if is_primary else secondary_bits)[skill_id].append(employee_bits[employee_id])
+
+        self.primary_masks = {skill_id: self._pack(bits) for skill_id, bits in primary_bits.items()}
+        self.secondary_masks = {skill_id: self._pack(bits) for skill_id, bits in secondary_bits.items()}
+
+    def _pack(self, bits: List[int]) -> int:
+        flags = np.zeros(len(self.employee_ids), dtype=bool)
+        flags[bits] = True
+        return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+    def _members(self, mask: int) -> List[int]:
+        if not mask:
+            return []
+        packed = np.frombuffer(mask.to_bytes((len(self.employee_ids) + 7) // 8, "little"), dtype=np.uint8)
+        flags = np.unpackbits(packed, bitorder="little")[:len(self.employee_ids)]
+        return [self.employee_ids[bit] for bit in np.nonzero(flags)[0]]
+
+    def mask(self, skill: str) -> int:
+        """Employees holding the skill as primary or secondary"""
+
+        skill_id = self.skill_ids.get(normalize_skill(skill))
+        if skill_id is None:
+            return 0
+        return self.primary_masks.get(skill_id, 0) | self.secondary_masks.get(skill_id, 0)
+
+    def holder_count(self, skill: str) -> int:
+        return bin(self.mask(skill)).count("1")
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Per-skill primary, secondary and distinct-employee totals keyed by display name"""
+
+        inventory = {}
+        for skill_id, display_name in self.display_names.items():
+            primary = self.primary_masks.get(skill_id, 0)
+            secondary = self.secondary_masks.get(skill_id, 0)
+            inventory[display_name] = {
+                'primary': bin(primary).count("1"),
+                'secondary': bin(secondary).count("1"),
+                'total': bin(primary | secondary).count("1")
+            }
+        return inventory
+
+    def employees_with_skills(self, skills: List[str], match_all: bool = True) -> List[int]:
+        """Employee ids holding all (AND) or any (OR) of the skills"""
+
+        masks = [self.mask(skill) for skill in skills]
+        if not masks:
+            return []
+
+        combined = masks[0]
+        for mask in masks[1:]:
+            combined = combined & mask if match_all else combined | mask
+
+        return self._members(combined)
+
+class SkillIndexService:
+    """Maintains the skill dictionary and employee-skill rows, and answers inventory queries from bitsets"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_or_create_skills(self, names: Iterable[str]) -> Dict[str, int]:
+        """Map raw skill names to dictionary ids, inserting unseen skills"""
+
+        display_names = {}
+        for name in names:
+            if name and str(name).strip():
+                display_names.setdefault(normalize_skill(name), str(name).strip())
+
+        if not display_names:
+            return {}
+
+        existing = self.db.query(Skill.name, Skill.id).filter(Skill.name.in_(list(display_names))).all()
+        skill_ids = {name: skill_id for name, skill_id in existing}
+
+        missing = [Skill(name=name, display_name=display) for name, display in display_names.items() if name not in skill_ids]
+        if missing:
+            self.db.add_all(missing)
+            self.db.flush()
+            skill_ids.update({skill.name: skill.id for skill in missing})
+
+        return skill_ids
+
+    def sync_employee(self, employee: Employee) -> None:
+        """Rewrite the employee's skill rows from its JSON skill lists; caller commits"""
+
+        self.db.query(EmployeeSkill).filter(EmployeeSkill.employee_id == employee.id).delete(synchronize_session=False)
+        rows = self._employee_rows(employee, self.get_or_create_skills(
+            (employee.primary_skills or []) + (employee.secondary_skills or [])
+        ))
+        if rows:
+            self.db.execute(insert(EmployeeSkill), rows)
+        invalidate_skill_matrix(employee.company_id)
+
+    def rebuild_company(self, company_id: int) -> Dict[str, int]:
+        """Backfill skill rows for every employee of the company from the JSON skill lists"""
+
+        employees = self.db.query(Employee).filter(Employee.company_id == company_id).all()
+        skill_ids = self.get_or_create_skills(
+            skill for emp in employees for skill in (emp.primary_skills or []) + (emp.secondary_skills or [])
+        )
+
+        self.db.query(EmployeeSkill).filter(EmployeeSkill.company_id == company_id).delete(synchronize_session=False)
+        rows = [row for emp in employees for row in self._employee_rows(emp, skill_ids)]
+        if rows:
+            self.db.execute(insert(EmployeeSkill), rows)
+        self.db.commit()
+        invalidate_skill_matrix(company_id)
+
+        return {'employees': len(employees), 'skills': len(skill_ids), 'employee_skills': len(rows)}
+
+    def index_missing_employees(self, company_id: int) -> int:
+        """Write skill rows for the company's employees that have skills but no rows yet
+
+        Covers employees created before the index or written outside add_employee. Returns how many were indexed.
+        """
+
+        candidates = self.db.query(
+            Employee.id, Employee.company_id, Employee.primary_skills, Employee.secondary_skills
+        ).outerjoin(
+            EmployeeSkill, EmployeeSkill.employee_id == Employee.id
+        ).filter(
+            Employee.company_id == company_id,
+            EmployeeSkill.employee_id.is_(None)
+        ).all()
+
+        employees = [employee for employee in candidates if employee.primary_skills or employee.secondary_skills]
+        if not employees:
+            return 0
+
+        skill_ids = self.get_or_create_skills(
+            skill for emp in employees for skill in (emp.primary_skills or []) + (emp.secondary_skills or [])
+        )
+        rows = [row for emp in employees for row in self._employee_rows(emp, skill_ids)]
+        if rows:
+            self.db.execute(insert(EmployeeSkill), rows)
+        self.db.commit()
+        invalidate_skill_matrix(company_id)
+        return len(employees)
+
+    def _employee_rows(self, employee: Any, skill_ids: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Insert parameters for the employee's skills; a skill listed as both primary and secondary counts as primary"""
+
+        primary = {skill_ids[normalize_skill(s)] for s in employee.primary_skills or [] if normalize_skill(s) in skill_ids}
+        secondary = {skill_ids[normalize_skill(s)] for s in employee.secondary_skills or [] if normalize_skill(s) in skill_ids} - primary
+
+        return [
+            {'employee_id': employee.id, 'skill_id': skill_id, 'company_id': employee.company_id, 'is_primary': is_primary}
+            for group, is_primary in ((primary, True), (secondary, False))
+            for skill_id in sorted(group)
+        ]
+
+    def get_matrix(self, company_id: int) -> SkillMatrix:
+        """Bitset matrix over the company's active employees, cached until the next employee write or MATRIX_MAX_AGE"""
+
+        with _matrices_lock:
+            cached = _matrices.get(company_id)
+        if cached is not None and datetime.utcnow() - cached["computed_at"] < MATRIX_MAX_AGE:
+            return cached["matrix"]
+
+        self.index_missing_employees(company_id)
+        computed_at = datetime.utcnow()
+        rows = self.db.query(
+            EmployeeSkill.employee_id,
+            EmployeeSkill.skill_id,
+            EmployeeSkill.is_primary,
+            Skill.name,
+            Skill.display_name
+        ).join(
+            Skill, Skill.id == EmployeeSkill.skill_id
+        ).join(
+            Employee, Employee.id == EmployeeSkill.employee_id
+        ).filter(
+            EmployeeSkill.company_id == company_id,
+            Employee.is_active == True
+        ).all()
+
+        matrix = SkillMatrix(rows)
+        with _matrices_lock:
+            _matrices[company_id] = {"computed_at": computed_at, "matrix": matrix}
+        return matrix
+
+    def get_inventory(self, company_id: int) -> Dict[str, Any]:
+        """Company skills inventory, demand from approved/active plans, and gaps"""
+
+        matrix = self.get_matrix(company_id)
+        skills_inventory = matrix.counts()
+
+        # Plans are few relative to employees, so their JSON requirements are still read per request
+        plan_requirements = self.db.query(DeliveryPlan.required_skills).filter(
+            DeliveryPlan.created_by == company_id,
+            DeliveryPlan.status.in_(['approved', 'active'])
+        ).all()
+
+        required_skills = {}
+        for (requirements,) in plan_requirements:
+            for skill_req in requirements or []:
+                skill_name = skill_req.get('skill') if isinstance(skill_req, dict) else skill_req
+                quantity = skill_req.get('quantity', 1) if isinstance(skill_req, dict) else 1
+                if not skill_name:
+                    continue
+                required_skills[skill_name] = required_skills.get(skill_name, 0) + quantity
+
+        skill_gaps = []
+        for skill, required_count in required_skills.items():
+            available_count = matrix.holder_count(skill)
+            if required_count > available_count:
+                skill_gaps.append({
+                    'skill': skill,
+                    'required': required_count,
+                    'available': available_count,
+                    'gap': required_count - available_count
+                })
+
+        return {
+            "skills_inventory": skills_inventory,
+            "required_skills": required_skills,
+            "skill_gaps": skill_gaps,
+            "summary": {
+                "total_skills": len(skills_inventory),
+                "total_gaps": len(skill_gaps),
+                "coverage_percentage": (len(required_skills) - len(skill_gaps)) / len(required_skills) * 100 if required_skills else 100
+            }
+        }
+
+    def find_employees(self, company_id: int, skills: List[str], match_all: bool = True) -> List[Employee]:
+        """Active employees holding all (or any) of the given skills"""
+
+        employee_ids = self.get_matrix(company_id).employees_with_skills(skills, match_all)
+        if not employee_ids:
+            return []
+
+        return self.db.query(Employee).filter(Employee.id.in_(employee_ids)).order_by(Employee.id).all()
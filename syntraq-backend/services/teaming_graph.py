@@ -0,0 +1,543 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Teaming Relationship Graph
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import io
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, delete, insert
+from sqlalchemy.orm import Session
+
+from models.market_research import CompetitorProfile, ContractAward, TeamingRelationship, TeamingGraphSnapshot
+
+TEAMING_GRAPH_CHECK_INTERVAL = timedelta(minutes=1)  # How often reads look for new teaming or award rows
+FETCH_SIZE = 10000
+
+# Persisted arrays; edge_* are indexed by position in edge_ids (TeamingRelationship ids, ascending),
+# link_* hold one row per (company, NAICS, agency) award total, and indptr/adj_* are the CSR adjacency
+ARRAY_FIELDS = (
+    'edge_ids', 'edge_prime', 'edge_partner', 'edge_naics', 'edge_agency', 'edge_value',
+    'profile_ids', 'profile_nodes',
+    'link_node', 'link_naics', 'link_agency', 'link_count', 'link_value',
+    'indptr', 'adj_node', 'adj_edge'
+)
+
+# Latest graph and when the database was last checked for changes
+_graph: Dict[str, Any] = {"graph": None, "checked_at": None}
+_lock = threading.Lock()
+
+def _normalize(name: Optional[str]) -> str:
+    return ' '.join(str(name or '').split()).upper()
+
+def ensure_teaming_graph(bind) -> None:
+    for table in (TeamingRelationship.__table__, TeamingGraphSnapshot.__table__):
+        table.create(bind=bind, checkfirst=True)
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def invalidate_teaming_graph() -> None:
+    """Make the next read check the database for changes instead of waiting for the interval"""
+
+    with _lock:
+        _graph["checked_at"] = None
+
+class TeamingGraph:
+    """Companies as nodes, teaming relationships as edges, plus per-company award totals by NAICS and agency
+
+    Edges take their NAICS, agency and value from the linked contract award; relationships without
+    one only count in queries that do not filter on NAICS.
+    """
+
+    def __init__(self, companies: List[str], naics_codes: List[str], agencies: List[str], arrays: Dict[str, np.ndarray]):
+        self.companies = companies
+        self.naics_codes = naics_codes
+        self.agencies = agencies
+        self.company_index = {_normalize(name): node for node, name in enumerate(companies)}
+        self.naics_index = {code: i for i, code in enumerate(naics_codes)}
+        self.agency_index = {_normalize(agency): i for i, agency in enumerate(agencies)}
+
+        for field in ARRAY_FIELDS:
+            setattr(self, field, arrays.get(field))
+        if self.indptr is None or len(self.indptr) != len(companies) + 1:
+            self._build_adjacency()
+
+        # The graph never changes once built, so rankings can be kept for its lifetime
+        self._centrality: Dict[Optional[str], List[Dict[str, Any]]] = {}
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.adj_node) // 2
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {field: getattr(self, field) for field in ARRAY_FIELDS}
+
+    def _build_adjacency(self) -> None:
+        """CSR adjacency over both directions of every edge whose endpoints are known"""
+
+        edges = np.nonzero((self.edge_prime >= 0) & (self.edge_partner >= 0) & (self.edge_prime != self.edge_partner))[0].astype(np.int32)
+        source = np.concatenate([self.edge_prime[edges], self.edge_partner[edges]])
+        target = np.concatenate([self.edge_partner[edges], self.edge_prime[edges]])
+        order = np.argsort(source, kind='stable')
+
+        self.adj_node = target[order].astype(np.int32)
+        self.adj_edge = np.concatenate([edges, edges])[order].astype(np.int32)
+        self.indptr = np.zeros(len(self.companies) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=len(self.companies)), out=self.indptr[1:])
+
+    def _neighbors(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.adj_node[start:end], self.adj_edge[start:end]
+
+    def _agency_award_values(self, agency_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Award count and value at the agency for every company"""
+
+        at_agency = self.link_agency == agency_id
+        nodes = self.link_node[at_agency]
+        counts = np.bincount(nodes, weights=self.link_count[at_agency], minlength=len(self.companies))
+        values = np.bincount(nodes, weights=self.link_value[at_agency], minlength=len(self.companies))
+        return counts, values
+
+    def top_partners(self, company: str, naics_code: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Companies teamed with the company most often, optionally only on contracts in one NAICS"""
+
+        node = self.company_index.get(_normalize(company))
+        if node is None:
+            return []
+
+        neighbors, edges = self._neighbors(node)
+        if naics_code:
+            keep = self.edge_naics[edges] == self.naics_index.get(naics_code, -2)
+            neighbors, edges = neighbors[keep], edges[keep]
+        if not neighbors.size:
+            return []
+
+        partners, inverse = np.unique(neighbors, return_inverse=True)
+        teamings = np.bincount(inverse)
+        values = np.bincount(inverse, weights=self.edge_value[edges])
+        as_prime = np.bincount(inverse, weights=self.edge_prime[edges] == node)
+
+        order = np.lexsort((-values, -teamings))[:limit]
+        return [
+            {
+                'company': self.companies[partners[i]],
+                'teamings': int(teamings[i]),
+                'as_prime': int(as_prime[i]),  # Relationships where the queried company was the prime
+                'total_value': float(values[i])
+            }
+            for i in order
+        ]
+
+    def paths_to_agency(self, company: str, agency: str, limit: int = 20) -> Dict[str, List[Dict[str, Any]]]:
+        """Direct partners and partners-of-partners of the company that hold awards at the agency"""
+
+        node = self.company_index.get(_normalize(company))
+        agency_id = self.agency_index.get(_normalize(agency))
+        if node is None or agency_id is None:
+            return {'direct': [], 'two_hop': []}
+
+        award_counts, award_values = self._agency_award_values(agency_id)
+
+        first_hop, first_inverse = np.unique(self._neighbors(node)[0], return_inverse=True)
+        first_strength = np.bincount(first_inverse, minlength=len(first_hop))
+
+        direct = first_hop[award_values[first_hop] > 0]
+        direct = direct[np.argsort(-award_values[direct], kind='stable')][:limit]
+
+        # Second hop: every neighbor slice of the first hop gathered in one pass
+        starts = self.indptr[first_hop]
+        lengths = self.indptr[first_hop + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        via = np.repeat(np.arange(len(first_hop)), lengths)
+        targets = self.adj_node[positions]
+
+        keep = (targets != node) & (award_values[targets] > 0)
+        pairs, second_strength = np.unique(via[keep].astype(np.int64) * len(self.companies) + targets[keep], return_counts=True)
+        via, targets = pairs // len(self.companies), pairs % len(self.companies)
+
+        # Strongest endpoint first, then the path whose weaker link has the most teamings
+        weakest = np.minimum(first_strength[via], second_strength)
+        order = np.lexsort((-weakest, -award_values[targets]))[:limit]
+
+        return {
+            'direct': [
+                {
+                    'path': [self.companies[node], self.companies[partner]],
+                    'teamings': int(first_strength[np.searchsorted(first_hop, partner)]),
+                    'agency_awards': int(award_counts[partner]),
+                    'agency_award_value': float(award_values[partner])
+                }
+                for partner in direct
+            ],
+            'two_hop': [
+                {
+                    'path': [self.companies[node], self.companies[first_hop[via[i]]], self.companies[targets[i]]],
+                    'teamings': int(weakest[i]),  # Teamings on the weaker of the two links
+                    'agency_awards': int(award_counts[targets[i]]),
+                    'agency_award_value': float(award_values[targets[i]])
+                }
+                for i in order
+            ]
+        }
+
+    def centrality(self, naics_code: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Degree centrality over the teaming edges on contracts in the NAICS (all edges when None)"""
+
+        if naics_code not in self._centrality:
+            self._centrality[naics_code] = self._rank_centrality(naics_code)
+        return self._centrality[naics_code][:limit]
+
+    def _rank_centrality(self, naics_code: Optional[str]) -> List[Dict[str, Any]]:
+        valid = (self.edge_prime >= 0) & (self.edge_partner >= 0) & (self.edge_prime != self.edge_partner)
+        if naics_code:
+            valid &= self.edge_naics == self.naics_index.get(naics_code, -2)
+        edges = np.nonzero(valid)[0]
+        if not edges.size:
+            return []
+
+        prime, partner = self.edge_prime[edges].astype(np.int64), self.edge_partner[edges].astype(np.int64)
+        n = len(self.companies)
+        teamings = np.bincount(np.concatenate([prime, partner]), minlength=n)
+
+        # Distinct partners count each company pair once however many contracts it teamed on
+        pairs = np.unique(np.minimum(prime, partner) * n + np.maximum(prime, partner))
+        distinct = np.bincount(np.concatenate([pairs // n, pairs % n]), minlength=n)
+
+        active = np.count_nonzero(distinct)
+        order = np.lexsort((-teamings, -distinct))[:active]
+        return [
+            {
+                'company': self.companies[node],
+                'partners': int(distinct[node]),
+                'teamings': int(teamings[node]),
+                'degree_centrality': float(distinct[node] / (active - 1)) if active > 1 else 0.0
+            }
+            for node in order
+        ]
+
+    def agency_award_value(self, company: str, agency: Optional[str]) -> float:
+        node = self.company_index.get(_normalize(company))
+        agency_id = self.agency_index.get(_normalize(agency))
+        if node is None or agency_id is None:
+            return 0.0
+        mask = (self.link_node == node) & (self.link_agency == agency_id)
+        return float(self.link_value[mask].sum())
+
+class TeamingGraphService:
+    """Builds, persists and incrementally refreshes the teaming graph"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_graph(self) -> TeamingGraph:
+        with _lock:
+            graph, checked_at = _graph["graph"], _graph["checked_at"]
+        if graph is not None and checked_at is not None and datetime.utcnow() - checked_at <= TEAMING_GRAPH_CHECK_INTERVAL:
+            return graph
+        return self.refresh()
+
+    def refresh(self) -> TeamingGraph:
+        """Fold teaming and award rows changed since the last build into the graph; rebuild when rows were deleted"""
+
+        with _lock:
+            current = _graph.get("state")
+        state = self._load_snapshot() if current is None else {
+            # Work on copies; the published graph shares these lists and arrays with readers
+            **current,
+            "companies": list(current["companies"]),
+            "naics_codes": list(current["naics_codes"]),
+            "agencies": list(current["agencies"]),
+            "arrays": {field: values.copy() for field, values in current["arrays"].items()}
+        }
+        if state is None:
+            return self.rebuild()
+
+        checked_at = datetime.utcnow()
+        changed = self._apply_teaming_changes(state)
+        award_watermark = self.db.query(func.max(ContractAward.updated_at)).scalar()
+        if award_watermark is not None and (state["award_watermark"] is None or award_watermark > state["award_watermark"]):
+            self._load_profiles(state)
+            self._load_links(state)
+            state["award_watermark"] = award_watermark
+            changed = True
+
+        if self.db.query(func.count(TeamingRelationship.id)).scalar() != len(state["arrays"]["edge_ids"]):
+            return self.rebuild()
+
+        if changed:
+            state["arrays"].pop("indptr", None)
+            graph = self._publish(state, checked_at)
+            self._save_snapshot(state, graph)
+            return graph
+        if current is None:
+            return self._publish(state, checked_at)
+
+        with _lock:
+            _graph["checked_at"] = checked_at
+            return _graph["graph"]
+
+    def rebuild(self) -> TeamingGraph:
+        """Build the whole graph from TeamingRelationship, CompetitorProfile and ContractAward"""
+
+        checked_at = datetime.utcnow()
+        state = {
+            "companies": [], "naics_codes": [], "agencies": [],
+            "arrays": {
+                "edge_ids": np.zeros(0, dtype=np.int64), "profile_ids": np.zeros(0, dtype=np.int64),
+                "profile_nodes": np.zeros(0, dtype=np.int32)
+            },
+            "teaming_watermark": None,
+            "award_watermark": self.db.query(func.max(ContractAward.updated_at)).scalar()
+        }
+        for field in ('edge_prime', 'edge_partner', 'edge_naics', 'edge_agency'):
+            state["arrays"][field] = np.zeros(0, dtype=np.int32)
+        state["arrays"]["edge_value"] = np.zeros(0)
+
+        self._load_profiles(state)
+        self._apply_teaming_changes(state)
+        self._load_links(state)
+
+        graph = self._publish(state, checked_at)
+        self._save_snapshot(state, graph)
+        return graph
+
+    def _publish(self, state: Dict[str, Any], checked_at: datetime) -> TeamingGraph:
+        graph = TeamingGraph(state["companies"], state["naics_codes"], state["agencies"], state["arrays"])
+        state["arrays"] = graph.arrays()
+        with _lock:
+            _graph.update(graph=graph, checked_at=checked_at, state=state)
+        return graph
+
+    def _lookups(self, state: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+        """Functions mapping a company name, NAICS code or agency to its position, appending unseen ones"""
+
+        def position(values: List[str], index: Dict[str, int], key):
+            def lookup(value: Optional[str]) -> int:
+                if not value:
+                    return -1
+                normalized = key(value)
+                if normalized not in index:
+                    index[normalized] = len(values)
+                    values.append(value)
+                return index[normalized]
+            return lookup
+
+        company_index = {_normalize(name): node for node, name in enumerate(state["companies"])}
+        naics_index = {code: i for i, code in enumerate(state["naics_codes"])}
+        agency_index = {_normalize(agency): i for i, agency in enumerate(state["agencies"])}
+        return (
+            position(state["companies"], company_index, _normalize),
+            position(state["naics_codes"], naics_index, str),
+            position(state["agencies"], agency_index, _normalize)
+        )
+
+    def _load_profiles(self, state: Dict[str, Any]) -> None:
+        """Map competitor profiles created since the last build to company nodes"""
+
+        arrays = state["arrays"]
+        company_node, _, _ = self._lookups(state)
+        last_id = int(arrays["profile_ids"][-1]) if arrays["profile_ids"].size else 0
+
+        rows = self.db.execute(
+            select(CompetitorProfile.id, CompetitorProfile.company_name).where(CompetitorProfile.id > last_id).order_by(CompetitorProfile.id)
+        ).all()
+        if rows:
+            arrays["profile_ids"] = np.concatenate([arrays["profile_ids"], np.array([row[0] for row in rows], dtype=np.int64)])
+            arrays["profile_nodes"] = np.concatenate([arrays["profile_nodes"], np.array([company_node(row[1]) for row in rows], dtype=np.int32)])
+
+    def _profile_nodes(self, state: Dict[str, Any], profile_ids: np.ndarray) -> np.ndarray:
+        arrays = state["arrays"]
+        if not arrays["profile_ids"].size:
+            return np.full(len(profile_ids), -1, dtype=np.int32)
+        positions = np.searchsorted(arrays["profile_ids"], profile_ids).clip(max=len(arrays["profile_ids"]) - 1)
+        return np.where(arrays["profile_ids"][positions] == profile_ids, arrays["profile_nodes"][positions], -1).astype(np.int32)
+
+    def _apply_teaming_changes(self, state: Dict[str, Any]) -> bool:
+        """Insert or overwrite edges for teaming rows updated since the watermark; returns whether any changed"""
+
+        query = select(
+            TeamingRelationship.id, TeamingRelationship.prime_contractor, TeamingRelationship.partner_id,
+            ContractAward.naics_code, ContractAward.agency, ContractAward.total_value, TeamingRelationship.updated_at
+        ).outerjoin(ContractAward, ContractAward.id == TeamingRelationship.contract_id)
+        if state["teaming_watermark"] is not None:
+            query = query.where(TeamingRelationship.updated_at >= state["teaming_watermark"])
+
+        rows = self.db.execute(query.order_by(TeamingRelationship.id).execution_options(yield_per=FETCH_SIZE)).all()
+        if not rows:
+            return False
+
+        # Partners may be profiles created after the last build
+        self._load_profiles(state)
+        company_node, naics_position, agency_position = self._lookups(state)
+        arrays = state["arrays"]
+
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        changes = {
+            'edge_prime': np.array([company_node(row[1]) for row in rows], dtype=np.int32),
+            'edge_partner': self._profile_nodes(state, np.array([row[2] or 0 for row in rows], dtype=np.int64)),
+            'edge_naics': np.array([naics_position(row[3]) for row in rows], dtype=np.int32),
+            'edge_agency': np.array([agency_position(row[4]) for row in rows], dtype=np.int32),
+            'edge_value': np.array([row[5] or 0.0 for row in rows], dtype=float)
+        }
+
+        known = arrays["edge_ids"]
+        positions = np.searchsorted(known, ids)
+        existing = positions < len(known)
+        existing[existing] = known[positions[existing]] == ids[existing]
+
+        for field, values in changes.items():
+            arrays[field][positions[existing]] = values[existing]
+            arrays[field] = np.concatenate([arrays[field], values[~existing]])
+        arrays["edge_ids"] = np.concatenate([known, ids[~existing]])
+
+        # Appended ids are normally the largest, but rows can be updated out of id order
+        if np.any(np.diff(arrays["edge_ids"]) < 0):
+            order = np.argsort(arrays["edge_ids"], kind='stable')
+            for field in ('edge_ids', *changes):
+                arrays[field] = arrays[field][order]
+
+        updated = [row[6] for row in rows if row[6] is not None]
+        if updated:
+            state["teaming_watermark"] = max(updated + ([state["teaming_watermark"]] if state["teaming_watermark"] else []))
+        return True
+
+    def _load_links(self, state: Dict[str, Any]) -> None:
+        """Per-company award count and value by NAICS and agency, aggregated in SQL"""
+
+        _, naics_position, agency_position = self._lookups(state)
+        result = self.db.execute(
+            select(
+                ContractAward.contractor_id, ContractAward.naics_code, ContractAward.agency,
+                func.count(ContractAward.id), func.coalesce(func.sum(ContractAward.total_value), 0.0)
+            ).where(ContractAward.contractor_id.isnot(None)).group_by(
+                ContractAward.contractor_id, ContractAward.naics_code, ContractAward.agency
+            ).execution_options(yield_per=FETCH_SIZE)
+        ).all()
+
+        arrays = state["arrays"]
+        arrays["link_node"] = self._profile_nodes(state, np.array([row[0] for row in result], dtype=np.int64))
+        arrays["link_naics"] = np.array([naics_position(row[1]) for row in result], dtype=np.int32)
+        arrays["link_agency"] = np.array([agency_position(row[2]) for row in result], dtype=np.int32)
+        arrays["link_count"] = np.array([row[3] for row in result], dtype=np.int32)
+        arrays["link_value"] = np.array([row[4] for row in result], dtype=float)
+
+        known = arrays["link_node"] >= 0
+        for field in ('link_node', 'link_naics', 'link_agency', 'link_count', 'link_value'):
+            arrays[field] = arrays[field][known]
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        snapshot = self.db.query(TeamingGraphSnapshot).order_by(TeamingGraphSnapshot.id.desc()).first()
+        if snapshot is None or not snapshot.arrays:
+            return None
+
+        with np.load(io.BytesIO(snapshot.arrays)) as archive:
+            arrays = {field: archive[field] for field in archive.files}
+        return {
+            "companies": list(snapshot.companies or []),
+            "naics_codes": list(snapshot.naics_codes or []),
+            "agencies": list(snapshot.agencies or []),
+            "arrays": arrays,
+            "teaming_watermark": snapshot.teaming_watermark,
+            "award_watermark": snapshot.award_watermark
+        }
+
+    def _save_snapshot(self, state: Dict[str, Any], graph: TeamingGraph) -> None:
+        buffer = io.BytesIO()
+        np.savez(buffer, **graph.arrays())
+
+        self.db.execute(delete(TeamingGraphSnapshot))
+        self.db.execute(insert(TeamingGraphSnapshot), [{
+            "companies": state["companies"],
+            "naics_codes": state["naics_codes"],
+            "agencies": state["agencies"],
+            "arrays": buffer.getvalue(),
+            "node_count": len(state["companies"]),
+            "edge_count": graph.edge_count,
+            "teaming_watermark": state["teaming_watermark"],
+            "award_watermark": state["award_watermark"],
+            "built_at": datetime.utcnow()
+        }])
+        self.db.commit()
+
+def _benchmark(companies: int = 20000, edges: int = 100000, seed: int = 11) -> None:
+    """python -m services.teaming_graph: build, snapshot and query timings on a 100k-edge graph"""
+
+    import random
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from services.award_warehouse import ensure_award_warehouse
+
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    ensure_teaming_graph(engine)
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(seed)
+    agencies = [f"Department {i}" for i in range(20)]
+    now = datetime.utcnow()
+    db.execute(insert(CompetitorProfile), [{"company_name": f"Company {i}"} for i in range(1, companies + 1)])
+    db.execute(insert(ContractAward), [
+        {
+            "contract_number": f"BENCH-{i}",
+            "naics_code": str(541500 + rng.randrange(20)),
+            "agency": rng.choice(agencies),
+            "total_value": rng.lognormvariate(13, 1.5),
+            "contractor_id": 1 + int(companies * rng.random() ** 2),  # A few large primes win most awards
+            "award_date": now
+        }
+        for i in range(edges // 2)
+    ])
+    db.execute(insert(TeamingRelationship), [
+        {
+            "prime_contractor": f"Company {1 + int(companies * rng.random() ** 3)}",
+            "partner_id": 1 + rng.randrange(companies),
+            "relationship_type": "prime-sub",
+            "contract_id": 1 + rng.randrange(edges // 2) if rng.random() < 0.8 else None,
+            "start_date": now
+        }
+        for _ in range(edges)
+    ])
+    db.commit()
+
+    service = TeamingGraphService(db)
+    start_time = time.perf_counter()
+    service.rebuild()
+    build_ms = (time.perf_counter() - start_time) * 1000
+
+    with _lock:
+        _graph.update(graph=None, checked_at=None, state=None)
+    start_time = time.perf_counter()
+    reloaded = service.refresh()
+    reload_ms = (time.perf_counter() - start_time) * 1000
+
+    db.execute(insert(TeamingRelationship), [
+        {"prime_contractor": "Company 1", "partner_id": 2 + i, "relationship_type": "prime-sub", "start_date": now} for i in range(100)
+    ])
+    db.commit()
+    start_time = time.perf_counter()
+    refreshed = service.refresh()
+    refresh_ms = (time.perf_counter() - start_time) * 1000
+
+    timings = {}
+    for name, query in (
+        ("top partners", lambda: refreshed.top_partners("Company 1", "541505")),
+        ("two-hop paths", lambda: refreshed.paths_to_agency("Company 2", "Department 3")),
+        ("centrality by NAICS", lambda: refreshed.centrality("541505")),
+        ("centrality overall", lambda: refreshed.centrality()),
+    ):
+        start_time = time.perf_counter()
+        for _ in range(20):
+            query()
+        timings[name] = (time.perf_counter() - start_time) * 1000 / 20
+
+    print(f"{refreshed.edge_count} edges, {len(refreshed.companies)} companies: build {build_ms:.0f} ms, "
+          f"snapshot load ({reloaded.edge_count} edges) {reload_ms:.0f} ms, 100-row refresh {refresh_ms:.0f} ms")
+    print(", ".join(f"{name} {ms:.2f} ms" for name, ms in timings.items()))
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,197 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Bulk Time Entry Import
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import csv
+import json
+from typing import Dict, List, Any, Optional, Iterable, Iterator, TextIO, Tuple
+from datetime import datetime, date
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.resources import ResourceAllocation, DeliveryPlan, TimeEntry
+from services.utilization_report import apply_time_entries_to_snapshot
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+class TimeEntryImportRow(BaseModel):
+    allocation_id: int
+    work_date: datetime
+    hours_worked: float
+    billable_hours: float
+    task_description: str = ""
+    work_package: Optional[str] = None
+
+    @field_validator("work_date", mode="before")
+    @classmethod
+    def accept_plain_dates(cls, value: Any) -> Any:
+        # Timesheet exports usually carry a date without a time of day
+        if isinstance(value, str) and len(value.strip()) == 10:
+            try:
+                return datetime.combine(date.fromisoformat(value.strip()), datetime.min.time())
+            except ValueError:
+                return value
+        return value
+
+    @field_validator("work_package", mode="before")
+    @classmethod
+    def blank_to_none(cls, value: Any) -> Any:
+        return value or None
+
+    @model_validator(mode="after")
+    def check_hours(self) -> "TimeEntryImportRow":
+        if not 0 < self.hours_worked <= 24:
+            raise ValueError("hours_worked must be between 0 and 24")
+        if not 0 <= self.billable_hours <= self.hours_worked:
+            raise ValueError("billable_hours must be between 0 and hours_worked")
+        return self
+
+def iter_csv_records(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, row dict) from a CSV stream with a header row"""
+
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, {key.strip(): value for key, value in record.items() if key}
+
+def iter_ndjson_records(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, object) per NDJSON line; undecodable lines yield the error instead"""
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+
+class TimeEntryImportService:
+    """Streaming validation and chunked insertion of timesheet exports"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+        # allocation_id -> (employee_id, hourly_rate), or None when missing or not owned by the company
+        self._allocations: Dict[int, Optional[Tuple[Optional[int], Optional[float]]]] = {}
+
+    def import_entries(self, company_id: int, records: Iterable[Tuple[int, Any]], atomic: bool = False) -> Dict[str, Any]:
+        """Insert valid rows in chunks within one transaction; with atomic=True any row error rolls everything back"""
+
+        errors: List[Dict[str, Any]] = []
+        error_count = 0
+        processed = 0
+        imported = 0
+        pending: List[Tuple[int, TimeEntryImportRow]] = []
+        snapshot_deltas: List[Tuple[int, datetime, float, float]] = []
+
+        def record_error(line: int, message: str) -> None:
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "error": message})
+
+        def flush() -> None:
+            nonlocal imported
+            rows = self._resolve_chunk(company_id, pending, record_error)
+            if rows:
+                self.db.execute(insert(TimeEntry), rows)
+                imported += len(rows)
+                snapshot_deltas.extend(
+                    (row["employee_id"], row["work_date"], row["hours_worked"], row["billable_hours"]) for row in rows
+                )
+            pending.clear()
+
+        try:
+            for line, record in records:
+                processed += 1
+
+                if isinstance(record, Exception):
+                    record_error(line, f"Invalid JSON: {record}")
+                    continue
+                if not isinstance(record, dict):
+                    record_error(line, "Row must be an object")
+                    continue
+
+                try:
+                    pending.append((line, TimeEntryImportRow(**record)))
+                except ValidationError as e:
+                    record_error(line, "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+                    ))
+                    continue
+
+                if len(pending) >= CHUNK_SIZE:
+                    flush()
+
+            if pending:
+                flush()
+
+            if atomic and error_count:
+                self.db.rollback()
+                imported = 0
+                snapshot_deltas = []
+            else:
+                self.db.commit()
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+        apply_time_entries_to_snapshot(company_id, snapshot_deltas)
+        errors.sort(key=lambda error: error["line"])  # Ownership errors surface at chunk flush, after later rows
+
+        return {
+            "status": "failed" if atomic and error_count else "success",
+            "rows_processed": processed,
+            "rows_imported": imported,
+            "rows_failed": error_count,
+            "errors": errors,
+            "errors_truncated": error_count > len(errors)
+        }
+
+    def _resolve_chunk(self, company_id: int, chunk: List[Tuple[int, TimeEntryImportRow]], record_error) -> List[Dict[str, Any]]:
+        """Check allocation ownership for the chunk with one query and build insert parameters"""
+
+        unseen = {row.allocation_id for _, row in chunk} - set(self._allocations)
+        if unseen:
+            owned = self.db.query(
+                ResourceAllocation.id,
+                ResourceAllocation.employee_id,
+                ResourceAllocation.hourly_rate
+            ).join(
+                DeliveryPlan, DeliveryPlan.id == ResourceAllocation.delivery_plan_id
+            ).filter(
+                ResourceAllocation.id.in_(unseen),
+                DeliveryPlan.created_by == company_id
+            ).all()
+
+            for allocation_id in unseen:
+                self._allocations[allocation_id] = None
+            for allocation_id, employee_id, hourly_rate in owned:
+                self._allocations[allocation_id] = (employee_id, hourly_rate)
+
+        rows = []
+        for line, row in chunk:
+            allocation = self._allocations[row.allocation_id]
+            if allocation is None:
+                record_error(line, f"Allocation {row.allocation_id} not found")
+                continue
+
+            employee_id, hourly_rate = allocation
+            rows.append({
+                "allocation_id": row.allocation_id,
+                "employee_id": employee_id,
+                "work_date": row.work_date,
+                "hours_worked": row.hours_worked,
+                "task_description": row.task_description,
+                "billable_hours": row.billable_hours,
+                "non_billable_hours": row.hours_worked - row.billable_hours,
+                "work_package": row.work_package,
+                "billing_rate": hourly_rate
+            })
+
+        return rows
@@ -0,0 +1,191 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Resource Utilization Reporting
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import threading
+from typing import Dict, Any, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.resources import Employee, ResourceAllocation, TimeEntry
+
+DEFAULT_REPORT_DAYS = 30
+SNAPSHOT_MAX_AGE = timedelta(minutes=15)  # The default window slides, so snapshots also expire
+
+# company_id -> {"computed_at", "start_date", "end_date", "report"}; dropped after allocation or employee
+# writes, patched in place by new time entries
+_snapshots: Dict[int, Dict[str, Any]] = {}
+_snapshots_lock = threading.Lock()
+
+def invalidate_utilization_snapshot(company_id: int) -> None:
+    """Drop the cached default-window report so the next snapshot read recomputes it"""
+
+    with _snapshots_lock:
+        _snapshots.pop(company_id, None)
+
+def apply_time_entries_to_snapshot(company_id: int, entries: Iterable[Tuple[int, datetime, float, float]]) -> None:
+    """Fold new (employee_id, work_date, hours_worked, billable_hours) entries into the cached snapshot"""
+
+    entries = list(entries)
+    if not entries:
+        return
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(company_id)
+        if snapshot is None:
+            return
+
+        deltas = {}
+        for employee_id, work_date, hours_worked, billable_hours in entries:
+            if snapshot["start_date"] <= work_date <= snapshot["end_date"]:
+                hours, billable = deltas.get(employee_id, (0.0, 0.0))
+                deltas[employee_id] = (hours + hours_worked, billable + billable_hours)
+
+        if not deltas:
+            return
+
+        report = snapshot["report"]
+        known_employees = {u["employee_id"] for u in report["utilization_data"]}
+        if not set(deltas) <= known_employees:
+            # Entry for an employee the snapshot does not know about; recompute on next read
+            _snapshots.pop(company_id, None)
+            return
+
+        # Copy on write so responses already holding the old report are unaffected
+        utilization_data = []
+        for row in report["utilization_data"]:
+            if row["employee_id"] in deltas:
+                hours, billable = deltas[row["employee_id"]]
+                row = dict(row, actual_hours=row["actual_hours"] + hours, billable_hours=row["billable_hours"] + billable)
+                row["billable_rate"] = (row["billable_hours"] / row["actual_hours"] * 100) if row["actual_hours"] > 0 else 0
+            utilization_data.append(row)
+
+        snapshot["report"] = dict(
+            report,
+            utilization_data=utilization_data,
+            summary=dict(
+                report["summary"],
+                total_hours=sum(u["actual_hours"] for u in utilization_data),
+                total_billable=sum(u["billable_hours"] for u in utilization_data)
+            )
+        )
+
+class UtilizationReportService:
+    """Set-based planned vs. actual utilization reporting"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_utilization_report(
+        self,
+        company_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        use_snapshot: bool = False
+    ) -> Dict[str, Any]:
+        """Planned allocation, actual and billable hours for every active employee"""
+
+        # Snapshots only cover the default rolling window; explicit periods are always computed
+        default_window = start_date is None and end_date is None
+
+        if use_snapshot and default_window:
+            with _snapshots_lock:
+                snapshot = _snapshots.get(company_id)
+            if snapshot and datetime.now() - snapshot["computed_at"] < SNAPSHOT_MAX_AGE:
+                return {**snapshot["report"], "snapshot_at": snapshot["computed_at"].isoformat()}
+
+        if not start_date:
+            start_date = datetime.now() - timedelta(days=DEFAULT_REPORT_DAYS)
+        if not end_date:
+            end_date = datetime.now()
+
+        report = self._build_report(company_id, start_date, end_date)
+
+        if use_snapshot and default_window:
+            computed_at = datetime.now()
+            with _snapshots_lock:
+                _snapshots[company_id] = {
+                    "computed_at": computed_at,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "report": report
+                }
+            return {**report, "snapshot_at": computed_at.isoformat()}
+
+        return report
+
+    def _build_report(self, company_id: int, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        # Per-employee totals are aggregated in the database and joined back in a single statement
+        planned = self.db.query(
+            ResourceAllocation.employee_id.label("employee_id"),
+            func.sum(ResourceAllocation.allocation_percentage).label("total_allocation")
+        ).join(
+            Employee, Employee.id == ResourceAllocation.employee_id
+        ).filter(
+            Employee.company_id == company_id,
+            Employee.is_active == True,
+            ResourceAllocation.start_date <= end_date,
+            ResourceAllocation.end_date >= start_date
+        ).group_by(ResourceAllocation.employee_id).subquery()
+
+        actual = self.db.query(
+            TimeEntry.employee_id.label("employee_id"),
+            func.sum(TimeEntry.hours_worked).label("total_hours"),
+            func.sum(TimeEntry.billable_hours).label("billable_hours")
+        ).join(
+            Employee, Employee.id == TimeEntry.employee_id
+        ).filter(
+            Employee.company_id == company_id,
+            Employee.is_active == True,
+            TimeEntry.work_date >= start_date,
+            TimeEntry.work_date <= end_date
+        ).group_by(TimeEntry.employee_id).subquery()
+
+        rows = self.db.query(
+            Employee.id,
+            Employee.first_name,
+            Employee.last_name,
+            Employee.position_title,
+            Employee.primary_skills,
+            func.coalesce(planned.c.total_allocation, 0.0).label("total_allocation"),
+            func.coalesce(actual.c.total_hours, 0.0).label("total_hours"),
+            func.coalesce(actual.c.billable_hours, 0.0).label("billable_hours")
+        ).outerjoin(
+            planned, planned.c.employee_id == Employee.id
+        ).outerjoin(
+            actual, actual.c.employee_id == Employee.id
+        ).filter(
+            Employee.company_id == company_id,
+            Employee.is_active == True
+        ).order_by(Employee.id).all()
+
+        utilization_data = []
+        for row in rows:
+            utilization_data.append({
+                "employee_id": row.id,
+                "name": f"{row.first_name} {row.last_name}",
+                "position": row.position_title,
+                "planned_allocation": min(row.total_allocation, 100),
+                "actual_hours": row.total_hours,
+                "billable_hours": row.billable_hours,
+                "billable_rate": (row.billable_hours / row.total_hours * 100) if row.total_hours > 0 else 0,
+                "skills": row.primary_skills or []
+            })
+
+        return {
+            "period": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat()
+            },
+            "utilization_data": utilization_data,
+            "summary": {
+                "total_employees": len(utilization_data),
+                "average_utilization": sum(u["planned_allocation"] for u in utilization_data) / len(utilization_data) if utilization_data else 0,
+                "total_hours": sum(u["actual_hours"] for u in utilization_data),
+                "total_billable": sum(u["billable_hours"] for u in utilization_data)
+            }
+        }
@@ -0,0 +1,81 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Test Fixtures
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import os
+import sys
+import tempfile
+
+# Configuration is read at import time, so it is set before any app module loads
+_database_dir = tempfile.mkdtemp(prefix="syntraq-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'syntraq.db')}"
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Table, Column, Integer, event
+
+import main
+from database.connection import engine, SessionLocal
+from models.user import User
+from routers.users import get_current_user
+
+TEST_COMPANY_ID = 1
+
+def create_tables(*bases) -> None:
+    """Create each model module's tables; modules have their own Base, so foreign keys into
+    another module get a placeholder table that is never created"""
+
+    for base in bases:
+        tables = list(base.metadata.tables.values())
+        for table in tables:
+            for foreign_key in table.foreign_keys:
+                target = foreign_key.target_fullname.split(".")[0]
+                if target not in base.metadata.tables:
+                    Table(target, base.metadata, Column("id", Integer, primary_key=True))
+        base.metadata.create_all(bind=engine, tables=tables)
+
+class StatementCounter:
+    """Counts statements sent to the database while active"""
+
+    def __init__(self):
+        self.active = False
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args) -> None:
+        if self.active:
+            self.count += 1
+
+    def __enter__(self) -> "StatementCounter":
+        self.count = 0
+        self.active = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.active = False
+
+@pytest.fixture(scope="session")
+def client():
+    main.app.dependency_overrides[get_current_user] = lambda: User(id=TEST_COMPANY_ID, role="admin", is_active=True)
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture(scope="session")
+def statements() -> StatementCounter:
+    return StatementCounter()
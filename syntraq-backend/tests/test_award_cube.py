@@ -0,0 +1,139 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Award Cube Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import AwardMonthlyCube, ContractAward
+from services.award_cube import CubeDeltas, MarketTrendService, cube_key, rebuild_award_cube, set_aside_class
+from services.award_warehouse import ensure_award_warehouse
+
+AWARDS = 2000
+AGENCIES = [f"Department {i}" for i in range(4)]
+SET_ASIDES = [None, "SMALL BUSINESS SET ASIDE - TOTAL", "8(A) SOLE SOURCE", "HUBZONE SET-ASIDE", "FULL AND OPEN"]
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    session = sessionmaker(bind=engine)()
+
+    rng = random.Random(7)
+    now = datetime.now()
+    session.execute(insert(ContractAward), [
+        {
+            "contract_number": f"CUBE-{i}",
+            "naics_code": str(541510 + rng.randrange(3)),
+            "agency": rng.choice(AGENCIES),
+            "set_aside": rng.choice(SET_ASIDES),
+            "total_value": rng.lognormvariate(13, 1.5),
+            "award_date": now - timedelta(days=rng.randrange(365 * 4))
+        }
+        for i in range(AWARDS)
+    ])
+    session.execute(insert(ContractAward), [{"contract_number": "CUBE-UNDATED", "naics_code": "541511", "total_value": 1000.0}])
+    session.commit()
+    yield session
+    session.close()
+
+def cube_cells(session):
+    return {
+        (row.month, row.naics_code, row.agency, row.set_aside_class): (row.award_count, row.total_value, row.small_business_awards)
+        for row in session.query(AwardMonthlyCube).all()
+    }
+
+def scan_trends(session, months_back, naics_code=None, agency=None):
+    """Monthly (count, value, small-business count) grouped straight from the awards"""
+
+    start_month = (datetime.now() - timedelta(days=30 * months_back)).strftime('%Y-%m')
+    months = defaultdict(lambda: [0, 0.0, 0])
+    for award in session.query(ContractAward).filter(ContractAward.award_date.isnot(None)).all():
+        month = award.award_date.strftime('%Y-%m')
+        if month < start_month or (naics_code and award.naics_code != naics_code):
+            continue
+        if agency and agency.lower() not in (award.agency or '').lower():
+            continue
+        cell = months[month]
+        cell[0] += 1
+        cell[1] += award.total_value
+        cell[2] += set_aside_class(award.set_aside) in ('small', '8a', 'hubzone', 'wosb', 'sdvosb')
+    return dict(sorted(months.items()))
+
+@pytest.mark.parametrize("set_aside, expected", [
+    (None, "none"),
+    ("", "none"),
+    ("8(A) SOLE SOURCE", "8a"),
+    ("HUBZONE SET-ASIDE", "hubzone"),
+    ("WOMEN-OWNED SMALL BUSINESS", "wosb"),
+    ("SERVICE-DISABLED VETERAN-OWNED SMALL BUSINESS", "sdvosb"),
+    ("SMALL BUSINESS SET ASIDE - TOTAL", "small"),
+    ("FULL AND OPEN", "other"),
+])
+def test_set_aside_class(set_aside, expected):
+    assert set_aside_class(set_aside) == expected
+
+def test_cube_key():
+    assert cube_key(None, "541511", "GSA", None) is None
+    assert cube_key(datetime(2024, 3, 9), None, None, "HUBZONE SET-ASIDE") == ("2024-03", "", "", "hubzone")
+
+def test_rebuild_counts_every_dated_award(session):
+    cells = rebuild_award_cube(session)
+    cube = cube_cells(session)
+
+    assert cells == len(cube)
+    assert sum(count for count, _, _ in cube.values()) == AWARDS
+    assert rebuild_award_cube(session) == cells
+
+@pytest.mark.parametrize("filters", [{}, {"naics_code": "541511"}, {"agency": "department 2"}])
+def test_trends_match_grouping_the_awards(session, filters):
+    rebuild_award_cube(session)
+    trends = MarketTrendService(session).get_market_trends(months_back=36, **filters)
+    expected = scan_trends(session, 36, **filters)
+
+    assert [trend["month"] for trend in trends["trends"]] == list(expected)
+    for trend in trends["trends"]:
+        count, value, small = expected[trend["month"]]
+        assert trend["award_count"] == count
+        assert trend["total_value"] == pytest.approx(value)
+        assert trend["small_business_percentage"] == pytest.approx(small / count * 100)
+    assert trends["summary"]["total_awards"] == sum(count for count, _, _ in expected.values())
+
+def test_deltas_fold_into_the_rebuilt_cube(session):
+    rebuild_award_cube(session)
+    rebuilt = cube_cells(session)
+
+    session.execute(delete(AwardMonthlyCube))
+    deltas = CubeDeltas()
+    for award in session.query(ContractAward).all():
+        deltas.add(cube_key(award.award_date, award.naics_code, award.agency, award.set_aside), award.total_value)
+    deltas.apply(session)
+    session.commit()
+
+    incremental = cube_cells(session)
+    assert incremental.keys() == rebuilt.keys()
+    for key, (count, value, small) in rebuilt.items():
+        assert incremental[key][0] == count and incremental[key][2] == small
+        assert incremental[key][1] == pytest.approx(value)
+
+def test_deltas_update_existing_cells(session):
+    rebuild_award_cube(session)
+    key, (count, value, small) = next(iter(cube_cells(session).items()))
+
+    deltas = CubeDeltas()
+    deltas.add(key, 500.0)
+    deltas.add(key, 200.0, sign=-1)
+    deltas.add(None, 1e9)
+    deltas.apply(session)
+    session.commit()
+
+    assert cube_cells(session)[key][:2] == (count, pytest.approx(value + 300.0))
+    rebuild_award_cube(session)
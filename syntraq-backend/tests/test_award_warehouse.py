@@ -0,0 +1,76 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Award Warehouse Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import AwardMonthlyCube, CompetitorNaics, CompetitorProfile, ContractAward
+from services.award_warehouse import FIXTURE_PATH, AwardWarehouseLoader, ensure_award_warehouse
+
+# 10 rows: one award repeated by two modifications, one row without a recipient
+FIXTURE_AWARDS = 7
+FIXTURE_COMPETITORS = 4
+
+@pytest.fixture(scope="module")
+def loads():
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    session = sessionmaker(bind=engine)()
+    first = AwardWarehouseLoader(session).load_paths([FIXTURE_PATH])
+    second = AwardWarehouseLoader(session).load_paths([FIXTURE_PATH])
+    yield session, first, second
+    session.close()
+
+def test_first_load(loads):
+    _, first, _ = loads
+
+    assert first == {
+        'rows_read': 10, 'rows_skipped': 1, 'duplicates_merged': 2,
+        'awards_inserted': FIXTURE_AWARDS, 'awards_updated': 0, 'competitors_created': FIXTURE_COMPETITORS,
+        'files': ['usaspending_contracts_sample.csv']
+    }
+
+def test_reload_updates_in_place(loads):
+    session, _, second = loads
+
+    assert second['awards_inserted'] == 0 and second['awards_updated'] == FIXTURE_AWARDS
+    assert second['competitors_created'] == 0
+    assert second['duplicates_merged'] == 2 and second['rows_skipped'] == 1
+    assert session.query(ContractAward).count() == FIXTURE_AWARDS
+    assert session.query(CompetitorProfile).count() == FIXTURE_COMPETITORS
+
+def test_modifications_merge_into_one_award(loads):
+    session, _, _ = loads
+
+    award = session.query(ContractAward).filter(ContractAward.piid == "W91QUZ23C0012").one()
+    assert award.total_value == 4950000.0 and award.obligated_amount == 3250000.0  # Latest modification
+    assert award.award_date == datetime(2023, 2, 14)  # Earliest award date
+
+def test_name_variants_with_one_duns_share_a_profile(loads):
+    session, _, _ = loads
+
+    owners = dict(session.query(ContractAward.piid, ContractAward.contractor_id).all())
+    assert owners["W91QUZ23C0012"] == owners["70RSAT24C00000031"]  # ORION DATA SYSTEMS (LLC)
+    assert owners["75N98023C00044"] == owners["HHSN316201200045W"]  # MERIDIAN HEALTH ANALYTICS CORP(ORATION)
+
+def test_competitor_naics_are_indexed(loads):
+    session, _, _ = loads
+
+    cascade = session.query(CompetitorProfile).filter(CompetitorProfile.company_name == "CASCADE FEDERAL SOLUTIONS INC").one()
+    assert sorted(cascade.naics_codes) == ["541511", "541519"]
+    indexed = [code for (code,) in session.query(CompetitorNaics.naics_code).filter(CompetitorNaics.competitor_id == cascade.id).order_by(CompetitorNaics.naics_code)]
+    assert indexed == ["541511", "541519"]
+
+def test_cube_counts_each_award_once(loads):
+    session, _, _ = loads
+
+    count, value = session.query(func.sum(AwardMonthlyCube.award_count), func.sum(AwardMonthlyCube.total_value)).one()
+    assert count == FIXTURE_AWARDS
+    assert value == pytest.approx(session.query(func.sum(ContractAward.total_value)).scalar())
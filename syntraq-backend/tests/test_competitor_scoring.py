@@ -0,0 +1,127 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Competitor Scoring Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import CompetitorProfile
+from services.competitor_index import CompetitorIndexService, ensure_competitor_index
+from services.competitor_scoring import CompetitorFeatureMatrix, CompetitorScoringService, state_code
+
+CERTIFICATIONS = ["8(a)", "HUBZone", "WOSB", "SDVOSB", "Small Business"]
+STATES = ["VA", "Maryland", "DC", "TX", "West Virginia", "CA"]
+
+def profile(id: int, **fields) -> Dict[str, Any]:
+    return {
+        'id': id, 'company_name': f"Company {id}", 'size_standard': None, 'certifications': [], 'capabilities': [],
+        'past_performance_rating': None, 'contract_vehicles': [], 'locations': [], 'annual_revenue': None, **fields
+    }
+
+def reference_score(competitor: Dict[str, Any], states_held: List[str], set_aside: Optional[str], place: Optional[str]) -> float:
+    """The per-profile scoring rules the matrix vectorizes"""
+
+    score = 50.0
+    if competitor['past_performance_rating']:
+        score += (competitor['past_performance_rating'] - 3) * 10
+    if set_aside and set_aside in competitor['certifications']:
+        score += 20
+    score += len(competitor['contract_vehicles']) * 5
+    if set_aside and competitor['size_standard'] == 'small':
+        score += 15
+    if competitor['annual_revenue']:
+        score += 10 if competitor['annual_revenue'] > 50000000 else 5 if competitor['annual_revenue'] > 10000000 else 0
+    if state_code(place) and state_code(place) in {state_code(state) for state in states_held}:
+        score += 5
+    return min(score, 100.0)
+
+@pytest.mark.parametrize("text, expected", [
+    ("Arlington, VA 22202", "VA"),
+    ("VA", "VA"),
+    ("West Virginia", "WV"),
+    ("Charleston, West Virginia", "WV"),
+    ("Washington, DC", "DC"),
+    ("Remote", None),
+    (None, None),
+])
+def test_state_code(text, expected):
+    assert state_code(text) == expected
+
+@pytest.mark.parametrize("set_aside, place", [
+    (None, None),
+    ("8(a)", "Arlington, VA"),
+    ("WOSB", "Charleston, West Virginia"),
+    ("Unknown", "Remote"),
+])
+def test_scores_match_the_per_profile_rules(set_aside, place):
+    rng = random.Random(5)
+    profiles = [
+        profile(
+            i,
+            size_standard=rng.choice(["small", "large", None]),
+            certifications=rng.sample(CERTIFICATIONS, rng.randrange(3)),
+            past_performance_rating=rng.choice([None, 1.0, 2.5, 3.0, 4.2, 5.0]),
+            contract_vehicles=["GSA MAS"] * rng.randrange(6),
+            annual_revenue=rng.choice([None, 5e6, 2e7, 9e7])
+        )
+        for i in range(2000)
+    ]
+    performance_states = [rng.sample(STATES, rng.randrange(3)) for _ in profiles]
+
+    scores = CompetitorFeatureMatrix(profiles, performance_states).score(set_aside, place)
+
+    expected = [reference_score(p, states, set_aside, place) for p, states in zip(profiles, performance_states)]
+    assert np.allclose(scores, expected)
+
+def test_scores_are_capped_at_100():
+    matrix = CompetitorFeatureMatrix([profile(1, past_performance_rating=5.0, contract_vehicles=["GSA MAS"] * 10)])
+
+    assert matrix.score().tolist() == [100.0]
+
+def test_rank_orders_by_score_then_older_profile():
+    matrix = CompetitorFeatureMatrix([
+        profile(3, certifications=["HUBZone"]),
+        profile(1),
+        profile(2, certifications=["HUBZone"], size_standard="small"),
+        profile(4),
+    ])
+
+    ranked = matrix.rank("HUBZone", limit=3)
+
+    assert [(c['id'], c['strength_score']) for c in ranked] == [(2, 85.0), (3, 70.0), (1, 50.0)]
+    assert matrix.small_count == 1 and matrix.large_count == 0
+
+def test_unknown_certification_is_held_by_nobody():
+    matrix = CompetitorFeatureMatrix([profile(1, certifications=["8(a)"]), profile(2)])
+
+    assert matrix.holds_certification("8(a)").tolist() == [True, False]
+    assert matrix.holds_certification("WOSB").tolist() == [False, False]
+
+def test_empty_matrix_ranks_nothing():
+    assert CompetitorFeatureMatrix([]).rank("8(a)") == []
+
+def test_load_matrix_reads_active_competitors_indexed_under_the_naics():
+    engine = create_engine("sqlite://")
+    ensure_competitor_index(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        CompetitorProfile(company_name="Orion", naics_codes=["541512"], certifications=["8(a)"], performance_states=["VA"], is_active=True),
+        CompetitorProfile(company_name="Cascade", naics_codes=["541511"], is_active=True),
+        CompetitorProfile(company_name="Dormant", naics_codes=["541512"], is_active=False),
+    ])
+    session.commit()
+    CompetitorIndexService(session).rebuild()
+
+    matrix = CompetitorScoringService(session).load_matrix("541512")
+
+    assert [c['company_name'] for c in matrix.profiles] == ["Orion"]
+    assert matrix.rank("8(a)", "Arlington, VA")[0]['strength_score'] == 75.0
+    session.close()
@@ -0,0 +1,153 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Federal API Client Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from services import federal_api
+from services.federal_api import ResponseStore, ensure_response_store, fetch_json, request_with_retry, response_key
+
+URL = "https://api.example.gov/search"
+
+class MockAPI:
+    """Mock transport handler that records calls and peak concurrency; `statuses` are served first, then 200s"""
+
+    def __init__(self, statuses=(), etag='"v1"'):
+        self.statuses = list(statuses)
+        self.etag = etag
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.005)
+            if self.statuses:
+                status = self.statuses.pop(0)
+                if isinstance(status, Exception):
+                    raise status
+                return httpx.Response(status)
+            if self.etag and request.headers.get("If-None-Match") == self.etag:
+                return httpx.Response(304)
+            headers = {"ETag": self.etag} if self.etag else {}
+            return httpx.Response(200, json={"offset": request.url.params.get("offset")}, headers=headers)
+        finally:
+            self.in_flight -= 1
+
+def run(api: MockAPI, coroutine_function):
+    """Run coroutine_function() with the pooled client replaced by one on the mock transport"""
+
+    async def main():
+        federal_api._state.update(
+            loop=asyncio.get_running_loop(), client=httpx.AsyncClient(transport=httpx.MockTransport(api)), limiters={}, budgets={}
+        )
+        try:
+            return await coroutine_function()
+        finally:
+            await federal_api.close_http_client()
+
+    return asyncio.run(main())
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(federal_api, "RETRY_BASE_DELAY", 0.001)
+
+@pytest.fixture
+def store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ensure_response_store(engine)
+    return ResponseStore(sessionmaker(bind=engine))
+
+def test_concurrent_pages_stay_under_the_host_cap(store):
+    api = MockAPI()
+
+    pages = run(api, lambda: asyncio.gather(*[fetch_json(URL, {"offset": offset, "api_key": "secret"}, store) for offset in range(12)]))
+
+    assert [page["offset"] for page in pages] == [str(offset) for offset in range(12)]
+    assert len(api.calls) == 12
+    assert 1 < api.peak <= federal_api.HOST_CONCURRENCY
+
+def test_stored_url_leaves_out_credentials(store):
+    run(MockAPI(), lambda: fetch_json(URL, {"offset": 0, "api_key": "secret"}, store))
+
+    stored = store.get(response_key(URL, {"offset": 0})[0])
+    assert stored.url == f"{URL}?offset=0" and stored.etag == '"v1"'
+    assert response_key(URL, {"offset": 0, "api_key": "other"}) == response_key(URL, {"offset": 0})
+
+def test_not_modified_is_served_from_the_store(store):
+    run(MockAPI(), lambda: fetch_json(URL, {"offset": 3}, store))
+    first = store.get(response_key(URL, {"offset": 3})[0])
+
+    api = MockAPI()
+    body = run(api, lambda: fetch_json(URL, {"offset": 3}, store))
+
+    assert body == {"offset": "3"}
+    assert len(api.calls) == 1 and api.calls[0].headers["If-None-Match"] == '"v1"'
+    assert store.get(response_key(URL, {"offset": 3})[0]).revalidated_at > first.revalidated_at
+
+def test_retryable_statuses_and_transport_errors_are_retried():
+    api = MockAPI(statuses=[503, httpx.ConnectError("reset"), 429])
+
+    response = run(api, lambda: request_with_retry("GET", URL, params={"offset": 1}))
+
+    assert response.status_code == 200
+    assert len(api.calls) == 4
+
+def test_last_response_is_returned_after_the_final_attempt():
+    api = MockAPI(statuses=[503] * federal_api.RETRY_ATTEMPTS)
+
+    response = run(api, lambda: request_with_retry("GET", URL))
+
+    assert response.status_code == 503
+    assert len(api.calls) == federal_api.RETRY_ATTEMPTS
+
+def test_client_errors_are_not_retried():
+    api = MockAPI(statuses=[404])
+
+    assert run(api, lambda: request_with_retry("GET", URL)).status_code == 404
+    assert len(api.calls) == 1
+
+def test_retry_budget_caps_extra_traffic_during_an_outage():
+    requests = 30
+    api = MockAPI(statuses=[503] * 1000)
+
+    async def outage():
+        return [await request_with_retry("GET", URL) for _ in range(requests)]
+
+    responses = run(api, outage)
+
+    assert all(response.status_code == 503 for response in responses)
+    retries = len(api.calls) - requests
+    assert retries <= federal_api.RETRY_BUDGET_MAX + requests * federal_api.RETRY_BUDGET_RATIO
+    assert len(api.calls) < requests * federal_api.RETRY_ATTEMPTS
+
+def test_stored_body_is_served_when_the_api_fails(store):
+    run(MockAPI(), lambda: fetch_json(URL, {"offset": 5}, store))
+
+    api = MockAPI(statuses=[500] * federal_api.RETRY_ATTEMPTS)
+    assert run(api, lambda: fetch_json(URL, {"offset": 5}, store)) == {"offset": "5"}
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run(MockAPI(statuses=[500] * federal_api.RETRY_ATTEMPTS), lambda: fetch_json(URL, {"offset": 6}, store))
+
+def test_responses_without_validators_are_not_stored(store):
+    run(MockAPI(etag=None), lambda: fetch_json(URL, {"offset": 7}, store))
+
+    assert store.get(response_key(URL, {"offset": 7})[0]) is None
+
+def test_retry_after_seconds_are_honoured():
+    assert federal_api._backoff(0, httpx.Response(429, headers={"Retry-After": "2"})) == 2.0
+    assert federal_api._backoff(0, httpx.Response(429, headers={"Retry-After": "600"})) == federal_api.RETRY_MAX_DELAY
+    assert 0 <= federal_api._backoff(3, None) <= federal_api.RETRY_MAX_DELAY
@@ -0,0 +1,88 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - NPV / IRR Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import numpy as np
+import pytest
+
+from services import finance_math
+from services.finance_math import npv, irr
+
+# Checked against 40-digit decimal bisection
+REFERENCE_IRR = [
+    ([-100, 110], 0.10),
+    ([-100, 39, 59, 55, 20], 0.28094842115996110),
+    ([-100, 0, 0, 74], 0.74 ** (1 / 3) - 1),
+    ([-5000, -800, 1200, 2500, 3000, 2000], 0.12359674567289091),
+]
+
+@pytest.fixture
+def bisections(monkeypatch):
+    """Rows handed to the bisection fallback"""
+
+    calls = []
+
+    def spy(flows):
+        calls.append(flows)
+        return bisect(flows)
+
+    bisect = finance_math._bisect
+    monkeypatch.setattr(finance_math, "_bisect", spy)
+    return calls
+
+@pytest.mark.parametrize("flows, expected", REFERENCE_IRR)
+def test_reference_irr(flows, expected):
+    assert irr(flows) == pytest.approx(expected, abs=1e-8)
+
+def test_reference_npv():
+    assert npv(0.05, [-15000, 1500, 2500, 3500, 4500, 6000]) == pytest.approx(122.89485495094269, abs=1e-8)
+
+def test_batched_npv_matches_single_series():
+    flows = np.array([[-100, 60, 60], [-200, 0, 250]], dtype=float)
+    rates = np.array([0.05, 0.1])
+
+    assert np.allclose(npv(0.05, flows), [npv(0.05, row) for row in flows])
+    assert np.allclose(npv(rates, flows), [npv(rate, row) for rate, row in zip(rates, flows)])
+
+def test_npv_at_irr_is_zero_for_random_flows():
+    rng = np.random.default_rng(5)
+    flows = np.column_stack([-rng.uniform(50, 500, 2000), rng.uniform(0, 100, (2000, 23))])
+
+    rates = irr(flows)
+
+    assert np.isfinite(rates).all()
+    assert np.allclose(npv(rates, flows), 0, atol=1e-6 * np.abs(flows).sum(axis=1))
+
+def test_newton_failures_fall_back_to_bisection(bisections):
+    # Sign flips mid-series and a far-off guess push Newton out of range
+    hard = np.zeros((2, 16))
+    hard[0, :6] = [-1000, 5000, -100, 0, 0, 2]
+    hard[1, [0, 15]] = [-1, 1e6]
+
+    rates = irr(hard, guess=-0.9)
+
+    assert bisections
+    for row, rate in zip(hard, rates):
+        assert np.isfinite(rate)
+        assert abs(npv(rate, row)) < 1e-6 * np.abs(row).sum()
+
+def test_bisection_alone_matches_reference_values(monkeypatch, bisections):
+    monkeypatch.setattr(finance_math, "NEWTON_MAX_ITERATIONS", 0)
+
+    for flows, expected in REFERENCE_IRR:
+        assert irr(flows) == pytest.approx(expected, abs=1e-8)
+    assert len(bisections) == len(REFERENCE_IRR)
+
+@pytest.mark.parametrize("flows", [[100, 50, 25], [-100, -50], [0, 0, 0]])
+def test_no_sign_change_has_no_irr(flows, bisections):
+    assert np.isnan(irr(flows))
+    assert not bisections
+
+def test_batched_irr_marks_unsolvable_rows():
+    rates = irr([[-100, 110], [100, 50], [-100, -50]])
+
+    assert rates[0] == pytest.approx(0.10)
+    assert np.isnan(rates[1:]).all()
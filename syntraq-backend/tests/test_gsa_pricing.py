@@ -0,0 +1,86 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - GSA Pricing Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import GSAPricing, GSAPricingCategory
+from services.gsa_pricing import FIXTURE_PATH, GSAPricingLoader, GSAPricingIndexService, ensure_gsa_pricing, invalidate_gsa_rates
+
+FIXTURE_PRICES = 12
+
+@pytest.fixture(scope="module")
+def loads():
+    engine = create_engine("sqlite://")
+    ensure_gsa_pricing(engine)
+    session = sessionmaker(bind=engine)()
+    invalidate_gsa_rates()
+    first = GSAPricingLoader(session).load_paths([FIXTURE_PATH])
+    second = GSAPricingLoader(session).load_paths([FIXTURE_PATH])
+    yield session, first, second
+    invalidate_gsa_rates()
+    session.close()
+
+@pytest.fixture
+def service(loads):
+    invalidate_gsa_rates()
+    return GSAPricingIndexService(loads[0])
+
+def test_reloading_updates_instead_of_duplicating(loads):
+    session, first, second = loads
+
+    assert session.query(GSAPricing).count() == FIXTURE_PRICES
+    assert first['prices_inserted'] == FIXTURE_PRICES and first['prices_updated'] == 0
+    assert second['prices_inserted'] == 0 and second['prices_updated'] == FIXTURE_PRICES
+    assert first['unmapped_categories'] == 0
+    assert session.query(GSAPricingCategory).count() == FIXTURE_PRICES
+
+def test_rebuild_index_covers_every_price(service):
+    assert service.rebuild_index()['prices'] == FIXTURE_PRICES
+    assert service.db.query(GSAPricingCategory).count() == FIXTURE_PRICES
+
+def test_rates_by_naics(service):
+    rates = service.get_rates(naics_code="541512")
+
+    assert rates["match"] == "naics" and rates["unit"] == "hour"
+    assert rates["data_points"] == 6
+    assert rates["rate_distribution"]["percentile_50"] == pytest.approx(155.525)
+    assert rates["rate_distribution"]["min"] == pytest.approx(62.35)
+    assert rates["rate_distribution"]["max"] == pytest.approx(189.95)
+
+def test_rates_by_psc(service):
+    rates = service.get_rates(psc_code="R408")
+
+    assert rates["match"] == "psc"
+    assert rates["data_points"] == 3
+    assert rates["rate_distribution"]["percentile_50"] == pytest.approx(176.25)
+
+def test_token_query_expands_abbreviations(service):
+    rates = service.get_rates(query="sr. software eng")
+
+    assert rates["match"] == "tokens"
+    assert [row["labor_category"] for row in rates["labor_categories"]] == ["Senior Software Engineer"]
+
+def test_token_query_within_naics(service):
+    rates = service.get_rates(query="cybersecurity analyst", naics_code="541512")
+
+    assert [row["labor_category"] for row in rates["labor_categories"]] == ["Cybersecurity Analyst III"]
+    assert rates["rate_distribution"]["average"] == pytest.approx(152.30)
+
+def test_unmatched_query_is_empty(service):
+    rates = service.get_rates(query="astronaut")
+
+    assert rates["data_points"] == 0 and rates["labor_categories"] == []
+
+def test_limit_applies_to_cached_results(service):
+    assert len(service.get_rates(naics_code="541512", limit=2)["labor_categories"]) == 2
+    assert len(service.get_rates(naics_code="541512", limit=20)["labor_categories"]) == 6
+
+def test_a_key_is_required(service):
+    with pytest.raises(ValueError):
+        service.get_rates()
@@ -0,0 +1,123 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Pricing Statistics Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import ContractAward
+from services.award_warehouse import ensure_award_warehouse
+from services.pricing_stats import PERCENTILES, PRICING_WINDOW, SIZE_BUCKETS, PricingStatsService, invalidate_pricing_stats
+
+AWARDS = 3000
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    session = sessionmaker(bind=engine)()
+
+    values = np.random.default_rng(3).lognormal(13, 1.6, AWARDS)
+    now = datetime.now()
+    session.execute(insert(ContractAward), [
+        {
+            "contract_number": f"STATS-{i}",
+            "naics_code": "541512" if i % 3 else "541511",
+            "total_value": float(v),
+            "award_date": now - timedelta(days=i % 1000)
+        }
+        for i, v in enumerate(values)
+    ])
+    session.execute(insert(ContractAward), [
+        {"contract_number": "STATS-OLD", "naics_code": "541512", "total_value": 1e9, "award_date": now - PRICING_WINDOW - timedelta(days=30)},
+        {"contract_number": "STATS-ZERO", "naics_code": "541512", "total_value": 0.0, "award_date": now}
+    ])
+    session.commit()
+    invalidate_pricing_stats()
+    yield session
+    invalidate_pricing_stats()
+    session.close()
+
+@pytest.fixture
+def service(session):
+    invalidate_pricing_stats()
+    return PricingStatsService(session)
+
+def naics_conditions(naics_code):
+    return [ContractAward.total_value > 0, ContractAward.naics_code == naics_code]
+
+@pytest.mark.parametrize("naics_code", ["541512", "541511"])
+def test_window_path_agrees_with_numpy(service, naics_code):
+    window_stats, window_buckets = service._aggregate_window(naics_conditions(naics_code))
+    numpy_stats, numpy_buckets = service._aggregate_numpy(naics_conditions(naics_code))
+
+    assert window_stats["count"] == numpy_stats["count"]
+    for metric in ("mean", "std", "min", "max"):
+        assert math.isclose(window_stats[metric], numpy_stats[metric], rel_tol=1e-9), metric
+    for p in PERCENTILES:
+        assert math.isclose(window_stats["percentiles"][p], numpy_stats["percentiles"][p], rel_tol=1e-9), p
+
+    assert [count for count, _ in window_buckets] == [count for count, _ in numpy_buckets]
+    for (_, window_total), (_, numpy_total) in zip(window_buckets, numpy_buckets):
+        assert math.isclose(window_total, numpy_total, rel_tol=1e-9)
+
+def test_numpy_stats_on_known_values():
+    values = np.array([50000.0, 100000.0, 250000.0, 500000.0, 6000000.0])
+    stats, buckets = PricingStatsService._numpy_stats(values)
+
+    assert stats["count"] == 5
+    assert stats["min"] == 50000.0 and stats["max"] == 6000000.0
+    assert stats["mean"] == pytest.approx(1380000.0)
+    assert stats["percentiles"][50] == 250000.0
+    assert stats["percentiles"][25] == 100000.0
+    assert stats["percentiles"][90] == pytest.approx(3800000.0)
+    # Lower bounds are inclusive: 100000 is a small business award and 500000 a medium contract
+    assert buckets == [(1, 50000.0), (2, 350000.0), (1, 500000.0), (1, 6000000.0)]
+
+def test_numpy_stats_empty():
+    assert PricingStatsService._numpy_stats(np.array([])) == ({"count": 0}, [])
+
+def test_window_path_on_known_values(service):
+    conditions = [ContractAward.total_value > 0, ContractAward.contract_number.in_(["STATS-0", "STATS-1", "STATS-2", "STATS-3"])]
+    values = np.array([row[0] for row in service.db.query(ContractAward.total_value).filter(*conditions)])
+    stats, buckets = service._aggregate_window(conditions)
+
+    assert stats["count"] == 4
+    assert stats["percentiles"][50] == pytest.approx(float(np.median(values)))
+    assert stats["std"] == pytest.approx(float(values.std()))
+    assert sum(count for count, _ in buckets) == 4
+
+def test_window_path_without_rows(service):
+    stats, buckets = service._aggregate_window(naics_conditions("999999"))
+
+    assert stats["count"] == 0 and stats["percentiles"] == {}
+    assert [count for count, _ in buckets] == [0] * len(SIZE_BUCKETS)
+
+def test_pricing_intelligence_skips_old_and_zero_awards(service):
+    result = service.get_pricing_intelligence(naics_code="541512")
+    expected = AWARDS - math.ceil(AWARDS / 3)
+
+    assert result["computation"] == "window"
+    assert result["data_points"] == expected
+    assert result["pricing_statistics"]["max"] < 1e9
+    assert sum(benchmark["count"] for benchmark in result["market_benchmarks"]) == expected
+    assert len(result["recent_awards"]) == 10
+
+def test_pricing_intelligence_is_cached_until_invalidated(service, session):
+    first = service.get_pricing_intelligence(naics_code="541511")
+    assert service.get_pricing_intelligence(naics_code="541511") is first
+
+    invalidate_pricing_stats()
+    assert service.get_pricing_intelligence(naics_code="541511") is not first
+
+def test_pricing_intelligence_without_matches(service):
+    result = service.get_pricing_intelligence(naics_code="999999")
+    assert result == {"data_points": 0, "pricing_statistics": {}, "market_benchmarks": []}
@@ -0,0 +1,105 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - N+1 Query Detector Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from services import query_budget
+from services.query_budget import (
+    DEFAULT_QUERY_BUDGET, REPEATED_STATEMENT_LIMIT, QueryBudgetExceeded,
+    check_query_budget, find_budget_violations, get_route_budget, install_query_budget, normalize_statement
+)
+from services.request_context import RequestContext, bind_request_context, reset_request_context
+
+def request_context(statements, route="/api/test", method="GET") -> RequestContext:
+    context = RequestContext(route, method)
+    context.statement_counts = Counter(normalize_statement(statement) for statement in statements)
+    return context
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT * FROM users WHERE name = 'O''Brien'", "SELECT * FROM users WHERE name = ?"),
+    ("SELECT * FROM awards WHERE total_value > 1250000.50", "SELECT * FROM awards WHERE total_value > ?"),
+    ("SELECT * FROM awards WHERE id IN (?, ?, ?)", "SELECT * FROM awards WHERE id IN (?)"),
+    ("SELECT * FROM awards WHERE id IN (%(id_1)s, %(id_2)s)", "SELECT * FROM awards WHERE id IN (?)"),
+    ("SELECT * FROM awards WHERE id IN (:id_1,:id_2)", "SELECT * FROM awards WHERE id IN (?)"),
+    ("SELECT *\n  FROM awards\n  WHERE id = ?", "SELECT * FROM awards WHERE id = ?"),
+])
+def test_normalize_statement(statement, expected):
+    assert normalize_statement(statement) == expected
+
+def test_normalize_keeps_digits_inside_names():
+    assert normalize_statement("SELECT col1 FROM table2 WHERE id = 7") == "SELECT col1 FROM table2 WHERE id = ?"
+
+def test_per_row_selects_are_reported_as_repeated():
+    lookups = [f"SELECT * FROM contacts WHERE contacts.id = {i}" for i in range(REPEATED_STATEMENT_LIMIT + 1)]
+    total, budget, repeated = find_budget_violations(request_context(["SELECT * FROM communications", *lookups]))
+
+    assert total == REPEATED_STATEMENT_LIMIT + 2
+    assert budget == DEFAULT_QUERY_BUDGET
+    assert repeated == [("SELECT * FROM contacts WHERE contacts.id = ?", REPEATED_STATEMENT_LIMIT + 1)]
+
+def test_selects_up_to_the_repeat_limit_are_not_reported():
+    lookups = [f"SELECT * FROM contacts WHERE id = {i}" for i in range(REPEATED_STATEMENT_LIMIT)]
+    assert find_budget_violations(request_context(lookups))[2] == []
+
+def test_repeated_writes_are_not_reported():
+    inserts = [f"INSERT INTO cube (month, count) VALUES ('2025-0{i % 9 + 1}', {i})" for i in range(REPEATED_STATEMENT_LIMIT * 2)]
+    assert find_budget_violations(request_context(inserts))[2] == []
+
+def test_route_budget_overrides():
+    assert get_route_budget("GET", "/api/resources/resource-utilization") == 5
+    assert get_route_budget("POST", "/api/resources/resource-utilization") == DEFAULT_QUERY_BUDGET
+    assert get_route_budget("GET", "/api/unknown") == DEFAULT_QUERY_BUDGET
+
+def test_known_n_plus_one_raises(monkeypatch):
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    lookups = [f"SELECT * FROM contacts WHERE id = {i}" for i in range(10)]
+
+    with pytest.raises(QueryBudgetExceeded, match=r"10x SELECT \* FROM contacts WHERE id = \?"):
+        check_query_budget(request_context(["SELECT * FROM communications LIMIT 10", *lookups]))
+
+def test_over_budget_raises(monkeypatch):
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    statements = [f"SELECT * FROM table_{chr(97 + i % 26)}{i // 26}" for i in range(DEFAULT_QUERY_BUDGET + 1)]
+
+    with pytest.raises(QueryBudgetExceeded, match=f"executed {DEFAULT_QUERY_BUDGET + 1} statements"):
+        check_query_budget(request_context(statements))
+
+def test_log_mode_prints_instead_of_raising(monkeypatch, capsys):
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "log")
+    check_query_budget(request_context([f"SELECT * FROM contacts WHERE id = {i}" for i in range(10)]))
+    assert "Query budget exceeded: GET /api/test" in capsys.readouterr().out
+
+def test_off_mode_and_untracked_requests_pass(monkeypatch):
+    lookups = [f"SELECT * FROM contacts WHERE id = {i}" for i in range(10)]
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "off")
+    check_query_budget(request_context(lookups))
+
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    check_query_budget(RequestContext("/api/test", "GET"))
+
+def test_engine_hook_records_statements_for_the_bound_request(monkeypatch):
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    engine = create_engine("sqlite://")
+    install_query_budget(engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        context = RequestContext("/api/test", "GET")
+        token = bind_request_context(context)
+        try:
+            for i in range(REPEATED_STATEMENT_LIMIT + 1):
+                connection.execute(text(f"SELECT {i} AS value"))
+        finally:
+            reset_request_context(token)
+
+    assert context.statement_counts == Counter({"SELECT ? AS value": REPEATED_STATEMENT_LIMIT + 1})
+    with pytest.raises(QueryBudgetExceeded):
+        check_query_budget(context)
@@ -0,0 +1,241 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Query Budget Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+
+The suite runs with QUERY_BUDGET_MODE=raise, so a route that goes over its budget or repeats
+a SELECT per row fails the request. Each test also checks the statement count stays the same
+as the seeded data grows.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from starlette.requests import Request
+
+import main
+from conftest import TEST_COMPANY_ID, create_tables
+from models import resources, financial, communications
+from models.resources import Employee, ResourceAllocation, TimeEntry
+from models.financial import FinancialProject, ProjectBudget, ProjectStatus
+from models.communications import Contact, Communication, CommunicationType, CommunicationStatus
+from models.market_research import CompetitorProfile, TeamingRelationship
+from services import query_budget
+from services.award_warehouse import AwardWarehouseLoader, FIXTURE_PATH, iter_award_archive
+from services.financial_ledger import LedgerImportService
+from services.gsa_pricing import GSAPricingLoader
+from services.pricing_stats import invalidate_pricing_stats
+from services.teaming_graph import invalidate_teaming_graph
+from services.query_budget import get_route_budget
+from services.request_context import resolve_route_template
+
+SMALL, LARGE = 5, 40
+AGENCIES = ("Department of Defense", "Department of Energy", "General Services Administration")
+LEDGER_PROJECT_CODE = "LEDGER"
+
+@pytest.fixture(scope="module", autouse=True)
+def tables(client):
+    assert query_budget.QUERY_BUDGET_MODE == "raise"
+    create_tables(financial.Base, resources.Base, communications.Base)
+
+def seed_employees(db, count: int) -> None:
+    now = datetime.now()
+    start = db.query(Employee).count()
+    for i in range(start, start + count):
+        employee = Employee(
+            company_id=TEST_COMPANY_ID, employee_id=f"E{i}", email=f"e{i}@example.com",
+            first_name="Test", last_name=str(i), position_title="Engineer", is_active=True
+        )
+        db.add(employee)
+        db.flush()
+        for day in range(3):
+            allocation = ResourceAllocation(
+                employee_id=employee.id, role_title="Engineer", allocation_percentage=50,
+                start_date=now - timedelta(days=20), end_date=now + timedelta(days=20)
+            )
+            db.add(allocation)
+            db.flush()
+            db.add(TimeEntry(
+                employee_id=employee.id, allocation_id=allocation.id, work_date=now - timedelta(days=day),
+                hours_worked=8, billable_hours=6
+            ))
+    db.commit()
+
+def seed_projects(db, count: int) -> None:
+    start = db.query(FinancialProject).count()
+    statuses = list(ProjectStatus)
+    for i in range(start, start + count):
+        project = FinancialProject(
+            project_name=f"Project {i}", project_code=f"P{i}", status=statuses[i % len(statuses)],
+            created_by=TEST_COMPANY_ID, estimated_value=100000.0 + i, contract_value=90000.0 + i
+        )
+        db.add(project)
+        db.flush()
+        for version in range(2):
+            db.add(ProjectBudget(project_id=project.id, budget_version=f"{version + 1}.0", total_price=120000.0, total_cost=100000.0))
+    db.commit()
+
+def seed_communications(db, count: int) -> None:
+    for i in range(count):
+        contact = Contact(company_id=TEST_COMPANY_ID, first_name="Contact", last_name=str(i), organization="Agency")
+        db.add(contact)
+        db.flush()
+        db.add(Communication(
+            company_id=TEST_COMPANY_ID, contact_id=contact.id, communication_type=CommunicationType.EMAIL,
+            subject=f"Subject {i}", status=CommunicationStatus.SENT, direction="outbound",
+            ai_generated=False, requires_response=False
+        ))
+    db.commit()
+
+def award_csv(count: int) -> bytes:
+    """A USAspending export of count new awards, each to its own recipient"""
+
+    with open(FIXTURE_PATH, newline="") as f:
+        header = next(csv.reader(f))
+
+    start = award_csv.generated
+    award_csv.generated += count
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=header)
+    writer.writeheader()
+    for i in range(start, start + count):
+        award_date = (datetime.now() - timedelta(days=30 * (i % 24))).strftime("%Y-%m-%d")
+        writer.writerow({
+            "contract_award_unique_key": f"CONT_AWD_BUDGET{i}", "award_id_piid": f"BUDGET{i}", "modification_number": "0",
+            "action_date": award_date, "award_base_action_date": award_date,
+            "federal_action_obligation": "250000.00", "total_dollars_obligated": "250000.00",
+            "base_and_exercised_options_value": "250000.00", "base_and_all_options_value": f"{500000 + i * 1000}.00",
+            "awarding_agency_name": AGENCIES[i % len(AGENCIES)], "recipient_name": f"BUDGET CONTRACTOR {i} LLC",
+            "recipient_duns": f"{900000000 + i}", "naics_code": "541512" if i % 2 else "541511",
+            "product_or_service_code": "D399", "type_of_set_aside": "SMALL BUSINESS SET ASIDE - TOTAL"
+        })
+    return output.getvalue().encode()
+
+award_csv.generated = 0
+
+def gsa_csv(count: int) -> bytes:
+    """A CALC labor rate export of count new rates"""
+
+    start = gsa_csv.generated
+    gsa_csv.generated += count
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["labor_category", "current_price", "schedule", "sin", "vendor_name", "idv_piid"])
+    for i in range(start, start + count):
+        writer.writerow([f"Software Engineer {i}", f"{100 + i % 80}.00", "MAS", "54151S", f"Vendor {i}", f"47QTCA{i:07d}"])
+    return output.getvalue().encode()
+
+gsa_csv.generated = 0
+
+def expense_csv(count: int) -> bytes:
+    """count new expenses against the ledger project"""
+
+    start = expense_csv.generated
+    expense_csv.generated += count
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["external_reference", "project_code", "expense_date", "description", "category", "amount"])
+    for i in range(start, start + count):
+        writer.writerow([f"EXP-{i}", LEDGER_PROJECT_CODE, "2025-03-01", f"Expense {i}", "travel", "125.50"])
+    return output.getvalue().encode()
+
+expense_csv.generated = 0
+
+def expense_ndjson(count: int) -> bytes:
+    rows = csv.DictReader(io.StringIO(expense_csv(count).decode()))
+    return "\n".join(json.dumps(row) for row in rows).encode()
+
+def seed_awards(db, count: int) -> None:
+    """Awards, their competitor profiles and a teaming relationship from the first profile to each new one"""
+
+    AwardWarehouseLoader(db).load(iter_award_archive(io.BytesIO(award_csv(count)), "budget.csv"))
+    profiles = db.query(CompetitorProfile).filter(CompetitorProfile.company_name.like("BUDGET CONTRACTOR%")).order_by(CompetitorProfile.id).all()
+    teamed = {partner_id for partner_id, in db.query(TeamingRelationship.partner_id)}
+    for profile in profiles[1:]:
+        if profile.id not in teamed:
+            db.add(TeamingRelationship(
+                prime_contractor=profiles[0].company_name, partner_id=profile.id, relationship_type="prime-sub",
+                partner_role="subcontractor", start_date=datetime.now()
+            ))
+    db.commit()
+
+def seed_gsa_prices(db, count: int) -> None:
+    GSAPricingLoader(db).load(iter_award_archive(io.BytesIO(gsa_csv(count)), "budget.csv"))
+
+def ledger_project(db) -> FinancialProject:
+    project = db.query(FinancialProject).filter(FinancialProject.project_code == LEDGER_PROJECT_CODE).first()
+    if project is None:
+        project = FinancialProject(
+            project_name="Ledger", project_code=LEDGER_PROJECT_CODE, status=ProjectStatus.ACTIVE, created_by=TEST_COMPANY_ID
+        )
+        db.add(project)
+        db.commit()
+    return project
+
+def seed_expenses(db, count: int) -> None:
+    ledger_project(db)
+    records = csv.DictReader(io.StringIO(expense_csv(count).decode()))
+    LedgerImportService(db).import_records("expenses", TEST_COMPANY_ID, enumerate(records, start=2))
+
+def route_budget(method: str, path: str) -> int:
+    """The budget the middleware applies to a request, looked up by its route template"""
+
+    request = Request({"type": "http", "app": main.app, "method": method, "path": path.split("?")[0], "root_path": "", "headers": []})
+    return get_route_budget(method, resolve_route_template(request))
+
+def count_statements(client, statements, method: str, path: str, **kwargs) -> int:
+    # Computed results are cached per process; each measured request starts cold
+    invalidate_pricing_stats()
+    invalidate_teaming_graph()
+    with statements:
+        response = client.request(method, path, **kwargs)
+    assert response.status_code == 200, response.text
+    return statements.count
+
+@pytest.mark.parametrize("method, path, seed", [
+    ("GET", "/api/resources/resource-utilization", seed_employees),
+    ("GET", "/api/financial/reporting/portfolio-analysis", seed_projects),
+    ("GET", "/api/communications/communications", seed_communications),
+    ("GET", "/api/market-research/competitors", seed_awards),
+    ("GET", "/api/market-research/competitors?naics_code=541512", seed_awards),
+    ("GET", "/api/market-research/pricing-intelligence?naics_code=541512", seed_awards),
+    ("GET", "/api/market-research/market-trends", seed_awards),
+    ("GET", "/api/market-research/teaming/partners?company=BUDGET CONTRACTOR 0 LLC", seed_awards),
+    ("GET", "/api/market-research/teaming/paths?company=BUDGET CONTRACTOR 0 LLC&agency=Department of Energy", seed_awards),
+    ("GET", "/api/market-research/teaming/centrality", seed_awards),
+    ("GET", "/api/market-research/gsa-rates?naics_code=541512", seed_gsa_prices),
+    ("GET", "/api/market-research/gsa-rates?naics_code=541512&q=software engineer", seed_gsa_prices),
+    ("GET", "/api/financial/ledger/expenses/export", seed_expenses),
+    ("POST", "/api/admin/award-warehouse/rebuild-cube", seed_awards),
+    ("POST", "/api/admin/competitor-index/rebuild", seed_awards),
+    ("POST", "/api/admin/teaming-graph/rebuild", seed_awards),
+    ("POST", "/api/admin/gsa-pricing/rebuild-index", seed_gsa_prices),
+])
+def test_statement_count_does_not_grow_with_rows(client, db, statements, method, path, seed):
+    seed(db, SMALL)
+    small = count_statements(client, statements, method, path)
+
+    seed(db, LARGE)
+    large = count_statements(client, statements, method, path)
+
+    assert large == small
+    assert large <= route_budget(method, path)
+
+@pytest.mark.parametrize("path, body, content_type", [
+    ("/api/admin/award-warehouse/import", award_csv, "text/csv"),
+    ("/api/admin/gsa-pricing/import", gsa_csv, "text/csv"),
+    ("/api/financial/ledger/expenses/import", expense_csv, "text/csv"),
+    ("/api/financial/ledger/expenses/import", expense_ndjson, "application/x-ndjson"),
+])
+def test_import_statement_count_does_not_grow_with_rows(client, db, statements, path, body, content_type):
+    ledger_project(db)
+    headers = {"content-type": content_type}
+    small = count_statements(client, statements, "POST", path, content=body(SMALL), headers=headers)
+    large = count_statements(client, statements, "POST", path, content=body(LARGE), headers=headers)
+
+    assert large == small
+    assert large <= route_budget("POST", path)
@@ -0,0 +1,92 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Schema Migration Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, MetaData, Table, Column
+from sqlalchemy.orm import Session
+
+from models.financial import CashFlowProjection, ProjectExpense, ProjectInvoice
+from models.market_research import CompetitorProfile, CompetitorNaics, CompetitorCertification
+from services.cash_flow_arrays import ensure_cash_flow_projections, projection_arrays, projection_horizon
+from services.financial_ledger import ensure_financial_ledger
+from services.competitor_index import backfill_competitor_index, ensure_competitor_index
+
+def legacy_table(engine, model, added_columns):
+    """Create the model's table as it was before `added_columns` existed"""
+
+    table = Table(
+        model.__tablename__, MetaData(),
+        *[
+            Column(column.name, column.type, primary_key=column.primary_key)
+            for column in model.__table__.columns if column.name not in added_columns
+        ]
+    )
+    table.create(bind=engine)
+    return table
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+def test_cash_flow_projections_gain_packed_columns_and_legacy_rows_are_packed(engine):
+    table = legacy_table(engine, CashFlowProjection, {"horizon_months", "inflows", "outflows"})
+    with engine.begin() as connection:
+        connection.execute(table.insert().values(
+            project_id=1, month_1_inflow=100.0, month_1_outflow=40.0, month_6_outflow=25.0,
+            extended_projections=[{"month": 7, "inflow": 10.0, "outflow": 5.0}, {"month": 8, "inflow": 0.0, "outflow": 3.0}]
+        ))
+
+    assert ensure_cash_flow_projections(engine) == 1
+    assert {"horizon_months", "inflows", "outflows"} <= {column["name"] for column in inspect(engine).get_columns("cash_flow_projections")}
+
+    with Session(bind=engine) as session:
+        cash_flow = session.query(CashFlowProjection).one()
+        assert cash_flow.inflows is not None and cash_flow.outflows is not None
+        assert projection_horizon(cash_flow) == cash_flow.horizon_months == 8
+        inflows, outflows = projection_arrays(cash_flow)
+
+    assert np.array_equal(inflows[:8], [100, 0, 0, 0, 0, 0, 10, 0])
+    assert np.array_equal(outflows[:8], [40, 0, 0, 0, 0, 25, 5, 3])
+
+    # Running again neither alters the table nor repacks rows
+    assert ensure_cash_flow_projections(engine) == 0
+
+def test_ledger_tables_gain_indexed_external_reference(engine):
+    for model in (ProjectExpense, ProjectInvoice):
+        legacy_table(engine, model, {"external_reference"})
+
+    ensure_financial_ledger(engine)
+    ensure_financial_ledger(engine)
+
+    inspector = inspect(engine)
+    for model in (ProjectExpense, ProjectInvoice):
+        assert "external_reference" in {column["name"] for column in inspector.get_columns(model.__tablename__)}
+        assert any(index["column_names"] == ["external_reference"] for index in inspector.get_indexes(model.__tablename__))
+
+def test_competitor_index_is_backfilled_for_existing_profiles(engine):
+    CompetitorProfile.__table__.create(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(CompetitorProfile.__table__.insert(), [
+            {"company_name": "Orion", "naics_codes": ["541512", "541511"], "certifications": ["8(a)"]},
+            {"company_name": "Cascade", "naics_codes": [], "certifications": ["WOSB", " "]},
+        ])
+
+    ensure_competitor_index(engine)
+    assert backfill_competitor_index(engine) == 2
+
+    with Session(bind=engine) as session:
+        assert sorted(code for (code,) in session.query(CompetitorNaics.naics_code)) == ["541511", "541512"]
+        assert sorted(value for (value,) in session.query(CompetitorCertification.certification)) == ["8(a)", "WOSB"]
+
+    # Already indexed, so later startups leave the tables alone
+    assert backfill_competitor_index(engine) == 0
+
+def test_missing_tables_are_left_for_create_all(engine):
+    assert ensure_cash_flow_projections(engine) == 0
+    ensure_financial_ledger(engine)
+    assert not inspect(engine).get_table_names()
@@ -0,0 +1,99 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Skill Index Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from conftest import TEST_COMPANY_ID, create_tables
+from models import resources
+from models.resources import Employee, EmployeeSkill
+from services import skills_index
+from services.skills_index import invalidate_skill_matrix
+
+@pytest.fixture(scope="module", autouse=True)
+def tables(client):
+    create_tables(resources.Base)
+
+@pytest.fixture(autouse=True)
+def empty_company(db):
+    """Each test starts with no employees, skill rows or cached matrix for the test company"""
+
+    db.query(EmployeeSkill).filter(EmployeeSkill.company_id == TEST_COMPANY_ID).delete(synchronize_session=False)
+    db.query(Employee).filter(Employee.company_id == TEST_COMPANY_ID).delete(synchronize_session=False)
+    db.commit()
+    invalidate_skill_matrix(TEST_COMPANY_ID)
+    yield
+    invalidate_skill_matrix(TEST_COMPANY_ID)
+
+def add_employee_row(db, number: int, primary, secondary=()) -> Employee:
+    """Written straight to the table, as employees created before the skill index or by another process are"""
+
+    employee = Employee(
+        company_id=TEST_COMPANY_ID, employee_id=f"SK-{number}", email=f"sk{number}@example.com", first_name="Test",
+        last_name=str(number), position_title="Engineer", primary_skills=list(primary), secondary_skills=list(secondary), is_active=True
+    )
+    db.add(employee)
+    db.commit()
+    return employee
+
+def search(client, skill: str):
+    response = client.get("/api/resources/skills/search", params={"skills": [skill]})
+    assert response.status_code == 200, response.text
+    return sorted(match["email"] for match in response.json())
+
+def test_existing_employees_are_indexed_on_first_query(client, db):
+    add_employee_row(db, 1, ["Python", "AWS"], ["Terraform"])
+    add_employee_row(db, 2, ["SQL"], ["python"])
+
+    employees = client.get("/api/resources/employees", params={"skill": "python"}).json()
+    assert [employee["email"] for employee in employees] == ["sk1@example.com"]
+
+    inventory = client.get("/api/resources/skills-inventory").json()["skills_inventory"]
+    assert inventory["Python"] == {"primary": 1, "secondary": 1, "total": 2}
+
+def test_unindexed_employees_are_found_alongside_indexed_ones(client, db):
+    add_employee_row(db, 1, ["Python"])
+    assert search(client, "python") == ["sk1@example.com"]
+
+    # The company now has skill rows, but this employee has none
+    add_employee_row(db, 2, ["Python"])
+
+    employees = client.get("/api/resources/employees", params={"skill": "python"}).json()
+    assert sorted(employee["email"] for employee in employees) == ["sk1@example.com", "sk2@example.com"]
+
+def test_matrix_expires_so_other_workers_writes_show_up(client, db, monkeypatch):
+    add_employee_row(db, 1, ["Go"])
+    assert search(client, "go") == ["sk1@example.com"]
+
+    # Written without invalidating this process's matrix
+    add_employee_row(db, 2, ["Go"])
+    assert search(client, "go") == ["sk1@example.com"]
+
+    monkeypatch.setattr(skills_index, "MATRIX_MAX_AGE", timedelta(0))
+    assert search(client, "go") == ["sk1@example.com", "sk2@example.com"]
+
+def test_updated_skills_are_searchable(client, db):
+    add_employee_row(db, 1, ["Python"])
+    employee = add_employee_row(db, 2, ["SQL"], ["python"])
+
+    response = client.put(f"/api/resources/employees/{employee.id}", json={"primary_skills": ["SQL", "Kubernetes"]})
+    assert response.status_code == 200, response.text
+
+    assert search(client, "kubernetes") == ["sk2@example.com"]
+    # The secondary python skill was left alone
+    assert search(client, "python") == ["sk1@example.com", "sk2@example.com"]
+
+def test_deactivated_employees_leave_the_matrix(client, db):
+    add_employee_row(db, 1, ["Rust"])
+    employee = add_employee_row(db, 2, ["Rust"])
+    assert search(client, "rust") == ["sk1@example.com", "sk2@example.com"]
+
+    response = client.put(f"/api/resources/employees/{employee.id}", json={"is_active": False})
+    assert response.status_code == 200, response.text
+
+    assert search(client, "rust") == ["sk1@example.com"]
@@ -0,0 +1,120 @@
+"""
+© 2025 Aliff Capital, Quartermasters FZC, and SkillvenzA. All rights reserved.
+
+Syntraq AI - Teaming Graph Tests
+A Joint Innovation by Aliff Capital, Quartermasters FZC, and SkillvenzA
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.market_research import CompetitorProfile, ContractAward, TeamingRelationship
+from services import teaming_graph
+from services.award_warehouse import ensure_award_warehouse
+from services.teaming_graph import TeamingGraphService, ensure_teaming_graph
+
+# Alpha teams with Bravo twice and with Charlie once, Charlie with Delta, and Echo primes Alpha
+# without a linked contract. Delta holds the largest Energy award but is two hops from Alpha.
+COMPANIES = ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]
+AWARDS = [
+    ("A1", "541512", "Department of Energy", 100.0, 1),
+    ("A2", "541611", "Department of Energy", 50.0, 2),
+    ("A3", "541512", "NASA", 300.0, 4),
+    ("A4", "541512", "Department of Energy", 500.0, 4),
+]
+TEAMINGS = [
+    ("Alpha", 2, 1),
+    ("Alpha", 2, 2),
+    ("Alpha", 3, 3),
+    ("Charlie", 4, 3),
+    ("Echo", 1, None),
+]
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    ensure_award_warehouse(engine)
+    ensure_teaming_graph(engine)
+    session = sessionmaker(bind=engine)()
+
+    now = datetime.utcnow()
+    session.execute(insert(CompetitorProfile), [{"company_name": name} for name in COMPANIES])
+    session.execute(insert(ContractAward), [
+        {"contract_number": number, "naics_code": naics_code, "agency": agency, "total_value": value, "contractor_id": contractor_id, "award_date": now}
+        for number, naics_code, agency, value, contractor_id in AWARDS
+    ])
+    session.execute(insert(TeamingRelationship), [
+        {"prime_contractor": prime, "partner_id": partner_id, "contract_id": contract_id, "relationship_type": "prime-sub", "start_date": now}
+        for prime, partner_id, contract_id in TEAMINGS
+    ])
+    session.commit()
+
+    teaming_graph._graph.update(graph=None, checked_at=None, state=None)
+    yield session
+    teaming_graph._graph.update(graph=None, checked_at=None, state=None)
+    session.close()
+
+@pytest.fixture
+def graph(session):
+    return TeamingGraphService(session).rebuild()
+
+def test_top_partners(graph):
+    assert graph.top_partners("Alpha") == [
+        {"company": "Bravo", "teamings": 2, "as_prime": 2, "total_value": 150.0},
+        {"company": "Charlie", "teamings": 1, "as_prime": 1, "total_value": 300.0},
+        {"company": "Echo", "teamings": 1, "as_prime": 0, "total_value": 0.0},
+    ]
+
+def test_top_partners_in_naics(graph):
+    partners = graph.top_partners(" alpha ", naics_code="541512")
+
+    assert [(partner["company"], partner["total_value"]) for partner in partners] == [("Charlie", 300.0), ("Bravo", 100.0)]
+    assert graph.top_partners("Alpha", naics_code="999999") == []
+    assert graph.top_partners("Unknown Co") == []
+
+def test_paths_to_agency(graph):
+    paths = graph.paths_to_agency("Alpha", "department of energy")
+
+    assert paths["direct"] == [
+        {"path": ["Alpha", "Bravo"], "teamings": 2, "agency_awards": 1, "agency_award_value": 50.0}
+    ]
+    assert paths["two_hop"] == [
+        {"path": ["Alpha", "Charlie", "Delta"], "teamings": 1, "agency_awards": 1, "agency_award_value": 500.0}
+    ]
+
+def test_paths_to_unknown_agency(graph):
+    assert graph.paths_to_agency("Alpha", "Department of Magic") == {"direct": [], "two_hop": []}
+
+def test_centrality(graph):
+    ranking = graph.centrality()
+
+    assert [(row["company"], row["partners"], row["teamings"]) for row in ranking] == [
+        ("Alpha", 3, 4), ("Charlie", 2, 2), ("Bravo", 1, 2), ("Delta", 1, 1), ("Echo", 1, 1)
+    ]
+    assert ranking[0]["degree_centrality"] == pytest.approx(0.75)
+    assert len(graph.centrality(limit=2)) == 2
+
+def test_centrality_in_naics(graph):
+    assert graph.centrality("541611") == [
+        {"company": "Alpha", "partners": 1, "teamings": 1, "degree_centrality": 1.0},
+        {"company": "Bravo", "partners": 1, "teamings": 1, "degree_centrality": 1.0},
+    ]
+
+def test_refresh_folds_in_new_relationships_and_snapshot_reloads(session, graph):
+    session.execute(insert(TeamingRelationship), [
+        {"prime_contractor": "Delta", "partner_id": 5, "contract_id": 4, "relationship_type": "prime-sub", "start_date": datetime.utcnow()}
+    ])
+    session.commit()
+
+    refreshed = TeamingGraphService(session).refresh()
+    assert refreshed.edge_count == graph.edge_count + 1
+    assert [partner["company"] for partner in refreshed.top_partners("Echo")] == ["Delta", "Alpha"]
+
+    # A fresh process starts from the saved snapshot
+    teaming_graph._graph.update(graph=None, checked_at=None, state=None)
+    reloaded = TeamingGraphService(session).refresh()
+    assert reloaded.edge_count == refreshed.edge_count
+    assert reloaded.centrality() == refreshed.centrality()